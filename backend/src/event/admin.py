@@ -221,6 +221,11 @@ class EventAdmin(admin.ModelAdmin):
 
     has_image.short_description = "Изображение"
 
+    def save_related(self, request, form, formsets, change):
+        """Теги сохраняются после самого события: пересчитываем макрокатегорию"""
+        super().save_related(request, form, formsets, change)
+        form.instance.refresh_macro_category()
+
     def has_delete_permission(self, request, obj=None):
         """Разрешаем удаление событий"""
         return True  # Разрешаем удаление всем авторизованным пользователям
@@ -306,6 +311,11 @@ class PlaceAdmin(admin.ModelAdmin):
 
     has_image.short_description = "Изображение"
 
+    def save_related(self, request, form, formsets, change):
+        """Теги сохраняются после самого места: пересчитываем макрокатегорию"""
+        super().save_related(request, form, formsets, change)
+        form.instance.refresh_macro_category()
+
     def has_delete_permission(self, request, obj=None):
         """Разрешаем удаление мест"""
         return True  # Разрешаем удаление всем авторизованным пользователям
@@ -5,3 +5,6 @@ class EventConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "event"
     verbose_name = "Мероприятия"
+
+    def ready(self):
+        from event import signals  # noqa: F401
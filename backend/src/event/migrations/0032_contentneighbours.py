@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0031_cacheversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentNeighbours",
+            fields=[
+                (
+                    "content",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="neighbours",
+                        serialize=False,
+                        to="event.content",
+                        verbose_name="Контент",
+                    ),
+                ),
+                (
+                    "neighbours",
+                    models.JSONField(default=list, verbose_name="Похожий контент"),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожий контент",
+                "verbose_name_plural": "Похожий контент",
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+# Макрокатегория первого (по id) тега каждого контента
+FILL_MACRO_CATEGORY_SQL = """
+UPDATE event_content
+SET macro_category = (
+    SELECT event_macrocategory.name
+    FROM event_content_tags
+    JOIN event_tags ON event_tags.id = event_content_tags.tags_id
+    LEFT JOIN event_macrocategory
+        ON event_macrocategory.id = event_tags.macro_category_id
+    WHERE event_content_tags.content_id = event_content.id
+    ORDER BY event_tags.id
+    LIMIT 1
+)
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0032_contentneighbours"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="content",
+            name="macro_category",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=250,
+                null=True,
+                verbose_name="Макрокатегория",
+            ),
+        ),
+        migrations.RunSQL(FILL_MACRO_CATEGORY_SQL, migrations.RunSQL.noop),
+    ]
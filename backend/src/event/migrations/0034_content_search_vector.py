@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# Взвешенный вектор полнотекстового поиска (русская конфигурация):
+# название — A, место — B, описание — C. Столбец генерируемый, поэтому
+# Postgres сам пересчитывает его при любой вставке и изменении полей —
+# и из Django, и из FastAPI. Django-модель о столбце не знает: его читает
+# только поиск FastAPI (utils.full_text)
+ADD_SEARCH_VECTOR_SQL = """
+ALTER TABLE event_content ADD COLUMN search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian', coalesce(name, '')), 'A')
+    || setweight(to_tsvector('russian', coalesce(location, '')), 'B')
+    || setweight(to_tsvector('russian', coalesce(description, '')), 'C')
+) STORED;
+CREATE INDEX event_content_search_vector_idx
+    ON event_content USING GIN (search_vector);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP INDEX IF EXISTS event_content_search_vector_idx;
+ALTER TABLE event_content DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0033_content_macro_category"),
+    ]
+
+    operations = [
+        migrations.RunSQL(ADD_SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+    ]
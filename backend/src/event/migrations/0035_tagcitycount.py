@@ -0,0 +1,87 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Начальные счётчики: текущее число контента и маршрутов с тегом в городе
+FILL_TAG_CITY_COUNTS_SQL = """
+INSERT INTO event_tagcitycount (tag_id, city, content_count, route_count, updated)
+SELECT tag_id, city, sum(content_count), sum(route_count), now()
+FROM (
+    SELECT ct.tags_id AS tag_id, c.city, count(*) AS content_count, 0 AS route_count
+    FROM event_content_tags ct JOIN event_content c ON c.id = ct.content_id
+    GROUP BY ct.tags_id, c.city
+    UNION ALL
+    SELECT rt.tags_id, r.city, 0, count(*)
+    FROM event_route_tags rt JOIN event_route r ON r.id = rt.route_id
+    GROUP BY rt.tags_id, r.city
+) counts
+GROUP BY tag_id, city;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("event", "0034_content_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TagCityCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "city",
+                    models.CharField(
+                        choices=[
+                            ("spb", "Санкт-Петербург"),
+                            ("msk", "Москва"),
+                            ("ekb", "Екатеринбург"),
+                            ("nsk", "Новосибирск"),
+                            ("nn", "Нижний Новгород"),
+                        ],
+                        max_length=50,
+                        verbose_name="Город",
+                    ),
+                ),
+                (
+                    "content_count",
+                    models.IntegerField(default=0, verbose_name="Контент"),
+                ),
+                (
+                    "route_count",
+                    models.IntegerField(default=0, verbose_name="Маршруты"),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="city_counts",
+                        to="event.tags",
+                        verbose_name="Тег",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Счётчик тега в городе",
+                "verbose_name_plural": "Счётчики тегов в городах",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="tagcitycount",
+            constraint=models.UniqueConstraint(
+                fields=("tag", "city"), name="unique_tag_city"
+            ),
+        ),
+        migrations.RunSQL(FILL_TAG_CITY_COUNTS_SQL, migrations.RunSQL.noop),
+    ]
@@ -141,6 +141,16 @@ class Content(GenericModel):
         verbose_name="Тип издателя",
     )
     publisher_id = models.IntegerField(default=1_000_000, verbose_name="ID издателя")
+    # Макрокатегория первого тега (по id), хранится в строке контента,
+    # чтобы API не обходило теги ради неё. См. refresh_macro_category.
+    macro_category = models.CharField(
+        max_length=250,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Макрокатегория",
+    )
 
     def get_tags(self):
         tags = self.tags.all()
@@ -162,6 +172,25 @@ class Content(GenericModel):
 
     get_macro.short_description = "Категория"
 
+    def compute_macro_category(self):
+        """Название макрокатегории первого тега контента (по id)"""
+        tag = self.tags.select_related("macro_category").order_by("id").first()
+        if tag and tag.macro_category:
+            return tag.macro_category.name
+        return None
+
+    def refresh_macro_category(self):
+        """
+        Пересчитывает сохранённую макрокатегорию после изменения тегов.
+        Пишет через update(), чтобы не вызывать save() и его сигналы повторно.
+        """
+        if not self.pk:
+            return
+        macro_category = self.compute_macro_category()
+        if macro_category != self.macro_category:
+            Content.objects.filter(pk=self.pk).update(macro_category=macro_category)
+            self.macro_category = macro_category
+
     def __str__(self):
         return f"{self.name}"
 
@@ -226,6 +255,7 @@ class Event(Content):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        self.refresh_macro_category()
 
 
 class Place(Content):
@@ -240,6 +270,7 @@ class Place(Content):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        self.refresh_macro_category()
 
 
 class Organisation(GenericModel):
@@ -513,3 +544,71 @@ class RoutePhoto(GenericModel):
 
     def __str__(self):
         return f"Фото маршрута {self.route.name}"
+
+
+class CacheVersion(models.Model):
+    """Версии данных, по которым FastAPI-бэкенд сбрасывает свои кэши"""
+
+    scope = models.CharField(max_length=100, unique=True, verbose_name="Область")
+    version = models.BigIntegerField(default=0, verbose_name="Версия")
+    updated = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Версия кэша"
+        verbose_name_plural = "Версии кэшей"
+
+    def __str__(self):
+        return f"{self.scope} - {self.version}"
+
+
+class ContentNeighbours(models.Model):
+    """
+    Похожий контент по лайкам пользователей.
+    Таблицу целиком перестраивает офлайн-задача FastAPI-бэкенда.
+    """
+
+    content = models.OneToOneField(
+        Content,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="neighbours",
+        verbose_name="Контент",
+    )
+    neighbours = models.JSONField(default=list, verbose_name="Похожий контент")
+    updated = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Похожий контент"
+        verbose_name_plural = "Похожий контент"
+
+    def __str__(self):
+        return f"{self.content} - {len(self.neighbours)}"
+
+
+class TagCityCount(models.Model):
+    """
+    Число контента и маршрутов с тегом в городе.
+    Счётчики правят FastAPI при записи и сигналы Django, расхождения
+    исправляет ночная сверка FastAPI-бэкенда.
+    """
+
+    tag = models.ForeignKey(
+        Tags,
+        on_delete=models.CASCADE,
+        related_name="city_counts",
+        verbose_name="Тег",
+    )
+    city = models.CharField(max_length=50, choices=CITY_CHOICES, verbose_name="Город")
+    content_count = models.IntegerField(default=0, verbose_name="Контент")
+    route_count = models.IntegerField(default=0, verbose_name="Маршруты")
+    updated = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Счётчик тега в городе"
+        verbose_name_plural = "Счётчики тегов в городах"
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "city"], name="unique_tag_city")
+        ]
+
+    def __str__(self):
+        return f"{self.tag} - {self.city}: {self.content_count}"
@@ -0,0 +1,261 @@
+from django.db.models import Count, F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from event.models import (
+    CacheVersion,
+    Content,
+    Event,
+    Like,
+    MacroCategory,
+    Place,
+    RemovedFavorite,
+    Route,
+    TagCityCount,
+    Tags,
+    User,
+)
+
+# Proxy-модели шлют сигналы от своего имени, поэтому подписываемся на все три
+CONTENT_MODELS = (Content, Event, Place)
+
+
+def bump_cache_version(scope):
+    """Увеличивает версию области, по которой FastAPI сбрасывает кэш"""
+    updated = CacheVersion.objects.filter(scope=scope).update(version=F("version") + 1)
+    if not updated:
+        CacheVersion.objects.get_or_create(scope=scope, defaults={"version": 1})
+
+
+def bump_content_version(city):
+    """Контент города изменился: кэши города и кэши без фильтра по городу"""
+    bump_cache_version(f"content:{city}")
+    bump_cache_version("content:all")
+
+
+def bump_all_content_versions():
+    for city in Content.objects.values_list("city", flat=True).distinct():
+        bump_content_version(city)
+
+
+def recount_tag_counts(tag_ids):
+    """
+    Пересчитывает счётчики тегов по городам для перечисленных тегов.
+    Правки в админке редки, поэтому тег считается целиком по связям.
+    """
+    for tag_id in set(tag_ids):
+        counts = {}
+        for city, count in (
+            Content.objects.filter(tags=tag_id)
+            .values_list("city")
+            .annotate(count=Count("pk"))
+        ):
+            counts.setdefault(city, [0, 0])[0] = count
+        for city, count in (
+            Route.objects.filter(tags=tag_id)
+            .values_list("city")
+            .annotate(count=Count("pk"))
+        ):
+            counts.setdefault(city, [0, 0])[1] = count
+
+        TagCityCount.objects.filter(tag_id=tag_id).exclude(city__in=counts).delete()
+        for city, (content_count, route_count) in counts.items():
+            TagCityCount.objects.update_or_create(
+                tag_id=tag_id,
+                city=city,
+                defaults={"content_count": content_count, "route_count": route_count},
+            )
+
+
+def refresh_macro_categories(content_ids):
+    """Пересчитывает сохранённую макрокатегорию у перечисленного контента"""
+    for content in Content.objects.filter(pk__in=content_ids):
+        content.refresh_macro_category()
+
+
+@receiver(pre_save)
+def remember_content_city(sender, instance, **kwargs):
+    """Запоминаем прежний город, чтобы сбросить кэш и у него"""
+    if sender not in CONTENT_MODELS or not instance.pk:
+        return
+    instance._previous_city = (
+        Content.objects.filter(pk=instance.pk).values_list("city", flat=True).first()
+    )
+
+
+@receiver(pre_delete)
+def remember_deleted_tags(sender, instance, **kwargs):
+    """Связи с тегами удаляются каскадом без m2m_changed: запоминаем теги"""
+    if sender in CONTENT_MODELS or sender is Route:
+        instance._deleted_tag_ids = list(instance.tags.values_list("pk", flat=True))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def content_changed(sender, instance, **kwargs):
+    if sender not in CONTENT_MODELS:
+        return
+    bump_content_version(instance.city)
+    previous_city = getattr(instance, "_previous_city", None)
+    if previous_city and previous_city != instance.city:
+        bump_content_version(previous_city)
+        recount_tag_counts(instance.tags.values_list("pk", flat=True))
+    if hasattr(instance, "_deleted_tag_ids"):
+        recount_tag_counts(instance._deleted_tag_ids)
+
+
+@receiver(pre_save, sender=Route)
+def remember_route_city(sender, instance, **kwargs):
+    instance._previous_city = (
+        Route.objects.filter(pk=instance.pk).values_list("city", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Route)
+def route_saved(sender, instance, created, **kwargs):
+    if not created and instance._previous_city != instance.city:
+        recount_tag_counts(instance.tags.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Route)
+def route_deleted(sender, instance, **kwargs):
+    recount_tag_counts(instance._deleted_tag_ids)
+
+
+def changed_tag_ids(instance, action, pk_set):
+    """
+    Теги, счётчики которых затронуты изменением связей.
+    Для clear теги запоминаются на pre_clear: после него связей уже нет.
+    """
+    if action == "pre_clear":
+        if not isinstance(instance, Tags):
+            instance._cleared_tag_ids = list(instance.tags.values_list("pk", flat=True))
+        return []
+    if isinstance(instance, Tags):
+        return [instance.pk]
+    if action == "post_clear":
+        return getattr(instance, "_cleared_tag_ids", [])
+    return pk_set or []
+
+
+@receiver(m2m_changed, sender=Route.tags.through)
+def route_tags_changed(sender, instance, action, pk_set, **kwargs):
+    if action in ("pre_clear", "post_add", "post_remove", "post_clear"):
+        recount_tag_counts(changed_tag_ids(instance, action, pk_set))
+
+
+@receiver(m2m_changed, sender=Content.tags.through)
+def content_tags_changed(sender, instance, action, **kwargs):
+    if action in ("pre_clear", "post_add", "post_remove", "post_clear"):
+        recount_tag_counts(changed_tag_ids(instance, action, kwargs.get("pk_set")))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if isinstance(instance, Content):
+        instance.refresh_macro_category()
+        bump_content_version(instance.city)
+    else:
+        # Изменение со стороны тега: затронут контент всех городов
+        if kwargs.get("pk_set"):
+            refresh_macro_categories(kwargs["pk_set"])
+        bump_all_content_versions()
+
+
+@receiver(pre_save, sender=Tags)
+def remember_tag_macro_category(sender, instance, **kwargs):
+    instance._previous_macro_category_id = (
+        Tags.objects.filter(pk=instance.pk)
+        .values_list("macro_category_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Tags)
+def tag_saved(sender, instance, created, **kwargs):
+    """Тег перенесли в другую макрокатегорию — меняется и его контент"""
+    if created or instance._previous_macro_category_id == instance.macro_category_id:
+        return
+    refresh_macro_categories(instance.contents.values_list("pk", flat=True))
+    bump_all_content_versions()
+
+
+@receiver(pre_delete, sender=Tags)
+def remember_tag_contents(sender, instance, **kwargs):
+    instance._content_ids = list(instance.contents.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tags)
+def tag_deleted(sender, instance, **kwargs):
+    refresh_macro_categories(instance._content_ids)
+    bump_all_content_versions()
+
+
+@receiver(pre_save, sender=MacroCategory)
+def remember_macro_category_name(sender, instance, **kwargs):
+    instance._previous_name = (
+        MacroCategory.objects.filter(pk=instance.pk)
+        .values_list("name", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=MacroCategory)
+def macro_category_renamed(sender, instance, created, **kwargs):
+    previous_name = instance._previous_name
+    if created or previous_name == instance.name:
+        return
+    Content.objects.filter(
+        macro_category=previous_name, tags__macro_category=instance
+    ).update(macro_category=instance.name)
+    bump_all_content_versions()
+
+
+@receiver(pre_delete, sender=MacroCategory)
+def remember_macro_category_contents(sender, instance, **kwargs):
+    instance._content_ids = list(
+        Content.objects.filter(tags__macro_category=instance)
+        .values_list("pk", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=MacroCategory)
+def macro_category_deleted(sender, instance, **kwargs):
+    refresh_macro_categories(instance._content_ids)
+    bump_all_content_versions()
+
+
+@receiver(post_save, sender=Tags)
+@receiver(post_delete, sender=Tags)
+@receiver(post_save, sender=MacroCategory)
+@receiver(post_delete, sender=MacroCategory)
+def catalog_changed(sender, instance, **kwargs):
+    """FastAPI перечитывает справочник тегов и макрокатегорий"""
+    bump_cache_version("catalog")
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=RemovedFavorite)
+@receiver(post_delete, sender=RemovedFavorite)
+def exclusions_changed(sender, instance, **kwargs):
+    """Лайки и удалённое из избранного правят вне API: сбрасываем исключения"""
+    bump_cache_version("exclusions")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Пользователя правят в админке: FastAPI сбрасывает кэш username → id"""
+    bump_cache_version("users")
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from utils.logs import logger
+
+from utils.catalog import catalog
+from utils.counting import count_cache
+from utils.exclusions import exclusion_cache
+from utils.feed_cache import feed_candidate_cache
+from utils.identity import identity_cache
+from utils.search_cache import search_result_cache
+from utils.tag_counts import city_tag_count_cache
+
+router_cache_stats = APIRouter(prefix="/api/v1", tags=["cache"])
+
+
+def collect_cache_stats() -> dict[str, dict]:
+    return {
+        "identity": identity_cache.stats(),
+        "feed_candidates": feed_candidate_cache.stats(),
+        "exclusions": exclusion_cache.stats(),
+        "counts": count_cache.stats(),
+        "search_results": search_result_cache.stats(),
+        "tag_counts": city_tag_count_cache.stats(),
+        "catalog": catalog.stats(),
+    }
+
+
+@router_cache_stats.get("/cache/stats", response_model=dict[str, dict])
+def get_cache_stats():
+    """
+    Размер и счётчики попаданий/промахов кэшей этого процесса
+    (у каждого воркера — свои)
+    """
+    logger.info("Query to get cache stats")
+    return collect_cache_stats()
@@ -1,29 +1,37 @@
+import hashlib
+
 from fastapi import (
     APIRouter,
+    Request,
+    Response,
 )
 from schemas import (
     CitiesResponseSchema,
 )
-from loguru import logger
+from utils.catalog import CITY_CHOICES, catalog_cache_control
+from utils.http_cache import etag_matches, not_modified, set_cache_headers
+from utils.logs import logger
 
 router_cities = APIRouter(prefix="/api/v1", tags=["cities"])
 
+# Города заданы в коде: ETag — хэш списка, одинаковый у всех воркеров
+CITIES_ETAG = '"cities-{}"'.format(
+    hashlib.sha1(repr(CITY_CHOICES).encode()).hexdigest()[:16]
+)
 
-CITY_CHOICES = [
-    ("spb", "Санкт-Петербург"),
-    ("msk", "Москва"),
-    ("ekb", "Екатеринбург"),
-    ("nsk", "Новосибирск"),
-    ("nn", "Нижний Новгород"),
-]
 
 @router_cities.get("/cities", response_model=CitiesResponseSchema)
-def get_cities():
+def get_cities(request: Request, response: Response):
     logger.info("Query to get cities")
 
+    cache_control = catalog_cache_control()
+    if etag_matches(request, CITIES_ETAG):
+        return not_modified(CITIES_ETAG, cache_control)
+    set_cache_headers(response, CITIES_ETAG, cache_control)
+
     cities = [city[0] for city in CITY_CHOICES]
-    logger.debug(f"List of cities: {cities}")
+    logger.debug("List of cities: {}", cities)
 
-    logger.info(f"Sent list of cities: {cities}")
+    logger.info("Sent list of cities: {}", cities)
 
     return CitiesResponseSchema(cities=[city[0] for city in CITY_CHOICES])
@@ -6,11 +6,15 @@ from fastapi import (
     File,
     UploadFile,
     Form,
+    Request,
+    Response,
 )
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, select, exists
+from sqlalchemy import and_
 from datetime import date, datetime
 from typing import Optional, List
+import itertools
+from bisect import bisect_right
 import json
 from io import BytesIO
 import random
@@ -18,206 +22,401 @@ import random
 from models import (
     User,
     Content,
-    Tags,
     Like,
-    RemovedFavorite,
     UserCategoryPreference,
     get_db,
     Organisation,
     PublisherType,
 )
 from utils.minio_utils import minio_client, bucket_name
-from schemas import ContentSchema, UserSchema, EventType
-from loguru import logger
+from utils.cache_versions import bump_content_version
+from utils.catalog import catalog, session_tags
+from utils.async_db import async_session_endpoint, off_loop
+from utils.date_filters import create_date_filter
+from utils.feed import (
+    SEED_LIMIT,
+    cached_shuffled_order,
+    new_feed_seed,
+    shuffled_order,
+)
+from utils.identity import UserIdentity, get_current_user_async, resolve_user
+from utils.exclusions import exclusion_cache
+from utils.feed_cache import feed_candidate_cache
+from utils.counting import count_cache
+from utils.search_cache import search_result_cache
+from utils.content_tags import content_tag_map
+from utils.search_index import search_index
+from utils.suggestions import suggestion_index
+from utils.tag_counts import apply_tag_change, city_tag_count_cache, tagged_in
+from utils.http_cache import conditional_response, content_cache_control, make_etag
+from utils.fast_json import (
+    CONTENT_COLUMNS,
+    content_dicts,
+    content_dicts_by_ids,
+    fast_json_enabled,
+    fast_json_response,
+)
+from utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    SortKey,
+    decode_cursor,
+    decode_keyset_cursor,
+    encode_cursor,
+    encode_keyset_cursor,
+    keyset_order,
+    paginate_keyset,
+)
+from utils.ranking import content_stats_cache, rank_candidates
+from schemas import ContentSchema, UserSchema, EventType, FeedOrder
+from utils.replicas import read_your_writes
+from utils.logs import logger
+from utils.metrics import track_minio
 
 router_contents = APIRouter(prefix="/api/v1", tags=["contents"])
 
+DEFAULT_FEED_PAGE_SIZE = 20
+LOAD_CONTENTS_CHUNK_SIZE = 500
 
-def create_date_filter(date_start: date, date_end: date):
-    q_filter = []
-
-    if date_start and date_end:
-        q_filter.append(Content.date_start <= date_end)
-        q_filter.append(Content.date_end >= date_start)
-    elif date_start:
-        q_filter.append(Content.date_start == date_start)
-    elif date_end:
-        q_filter.append(Content.date_end <= date_end)
-
-    return q_filter
-
-
-def create_filter_excluded_contend(db, current_user):
-    excluded_content_subquery = (
-        db.query(Like.content_id)
-        .filter(Like.user_id == current_user.id)
-        .union(
-            db.query(RemovedFavorite.content_id).filter(
-                RemovedFavorite.user_id == current_user.id
-            )
-        )
-        .subquery()
-    )
-    return excluded_content_subquery
+# Порядок списков контента: по дате начала, при равенстве — новые первыми
+CONTENT_SORT_KEYS = [
+    SortKey(Content.date_start, nulls_last=True),
+    SortKey(Content.created, descending=True),
+    SortKey(Content.id, descending=True),
+]
+# Порядок кандидатов в кэше ленты (см. candidate_sort_key)
+CANDIDATE_SORT_KEYS = [
+    SortKey(Content.date_start, nulls_last=True),
+    SortKey(Content.id),
+]
 
 
 @router_contents.get("/contents_feed", response_model=list[ContentSchema])
+@async_session_endpoint
 def get_content_for_feed(
-    username: str,
+    response: Response,
     date_start: date | None = None,
     date_end: date | None = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=100),
+    cursor: Optional[str] = None,
+    seed: Optional[int] = Query(default=None, ge=1, le=SEED_LIMIT),
+    order: FeedOrder = FeedOrder.RANDOM,
+    current_user: UserIdentity = Depends(get_current_user_async),
     db: Session = Depends(get_db),
 ):
-    logger.info(f"Fetching content for feed for user: {username}")
+    """
+    Лента контента для свайпов.
 
-    q_filter = create_date_filter(date_start, date_end)
-    current_user = db.query(User).filter(User.username == username).first()
+    Без limit и cursor возвращает всю ленту, перемешанную случайно.
+    С limit (или cursor) работает постранично: порядок задаётся сидом сессии,
+    курсор следующей страницы отдаётся в заголовке X-Next-Cursor.
+    Пока сид тот же, порядок стабилен между страницами.
 
-    if not current_user:
-        logger.warning(f"User {username} not found")
-        raise HTTPException(status_code=404, detail="User not found")
+    С order=ranked возвращает лучшие limit (без limit — всю ленту) по скору:
+    совпадение с предпочтениями, близость даты, доля лайков, средняя оценка
+    и штраф за повтор макрокатегории. Курсор в этом режиме не нужен:
+    просмотренный контент уходит из ленты сам.
 
-    logger.info(f"User {username} found, applying filters for content feed")
+    Кандидаты города берутся из кэша, уже просмотренный пользователем
+    контент отсекается по его закэшированному множеству исключений.
+    """
+    username = current_user.username
+    logger.info("User {} found, applying filters for content feed", username)
 
-    preferred_tags_subquery = (
-        db.query(UserCategoryPreference.tag_id)
-        .filter(UserCategoryPreference.user_id == current_user.id)
-        .subquery()
+    preferred_tag_ids = [
+        tag_id
+        for (tag_id,) in db.query(UserCategoryPreference.tag_id).filter(
+            UserCategoryPreference.user_id == current_user.id
+        )
+    ]
+    exclusions = exclusion_cache.get(db, current_user.id)
+
+    if order == FeedOrder.RANKED:
+        content_ids = get_ranked_feed(
+            db,
+            current_user.city,
+            date_start,
+            date_end,
+            preferred_tag_ids,
+            exclusions,
+            limit,
+        )
+        return contents_response(db, content_ids, response)
+
+    candidates = feed_candidate_cache.get(
+        db, current_user.city, date_start, date_end, tag_ids=preferred_tag_ids
     )
-    excluded_content_subquery = create_filter_excluded_contend(db, current_user)
-    content_query = (
-        db.query(Content)
-        .filter(and_(*q_filter))
-        .filter(Content.city == current_user.city)
-        .filter(~Content.id.in_(select(excluded_content_subquery)))
-        .options(joinedload(Content.tags).joinedload(Tags.macro_category))
+    if limit is None and cursor is None:
+        # Перемешиваем контент для разнообразия
+        content_ids = exclusions.filter(candidates.ids)
+        random.shuffle(content_ids)
+    else:
+        content_ids = get_feed_page(
+            candidates, exclusions, response, limit, cursor, seed
+        )
+
+    logger.info(
+        "Returning {} shuffled contents for feed for user: {}",
+        len(content_ids),
+        username,
+    )
+
+    return contents_response(db, content_ids, response)
+
+
+def get_ranked_feed(
+    db: Session,
+    city: Optional[str],
+    date_start: Optional[date],
+    date_end: Optional[date],
+    preferred_tag_ids: list[int],
+    exclusions,
+    limit: Optional[int],
+) -> list[int]:
+    """
+    Ранжированная лента: скорятся все кандидаты города за период,
+    предпочтения влияют на скор, а не отсекают контент
+    """
+    candidates = feed_candidate_cache.get(db, city, date_start, date_end)
+    return off_loop(
+        rank_candidates,
+        candidates,
+        content_stats_cache.get(db, city),
+        preferred_tag_ids,
+        exclusions.ids,
+        limit,
     )
 
-    if db.query(preferred_tags_subquery).count() > 0:
-        content_query = content_query.filter(
-            Content.tags.any(Tags.id.in_(select(preferred_tags_subquery)))
+
+def get_feed_page(
+    candidates,
+    exclusions,
+    response: Response,
+    limit: Optional[int],
+    cursor: Optional[str],
+    seed: Optional[int],
+) -> list[int]:
+    """
+    Одна страница перемешанной ленты: кандидаты сортируются по (ключ сида, ID),
+    страница начинается после последней выданной пары. Порядок сида
+    хранится в записи кэша кандидатов, так что страница — бинарный поиск
+    и проход по limit кандидатам плюс исключённые между ними.
+    """
+    last = None
+    if cursor:
+        payload = decode_cursor(cursor)
+        try:
+            seed = int(payload["seed"])
+            last = (int(payload["key"]), int(payload["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not 1 <= seed <= SEED_LIMIT:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    elif seed is None:
+        seed = new_feed_seed()
+    limit = limit or DEFAULT_FEED_PAGE_SIZE
+
+    logger.info("Fetching feed page: seed={}, limit={}", seed, limit)
+    order = cached_shuffled_order(candidates, seed)
+    if order is None:
+        order = off_loop(shuffled_order, candidates, seed)
+    page = []
+    i = order.start_after(last)
+    while i < len(order.ids) and len(page) <= limit:
+        content_id = order.ids[i]
+        if content_id not in exclusions:
+            page.append((order.keys[i], content_id))
+        i += 1
+
+    if len(page) > limit:
+        page = page[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            {"seed": seed, "key": page[-1][0], "id": page[-1][1]}
         )
 
-    contents = content_query.all()
+    return [content_id for _, content_id in page]
 
-    # Добавляем macro_category для каждого контента
-    for content in contents:
-        if content.tags and content.tags[0].macro_category:
-            content.macro_category = content.tags[0].macro_category.name
-        else:
-            content.macro_category = None
 
-    # Перемешиваем контент для разнообразия
-    random.shuffle(contents)
+def load_contents(db: Session, content_ids: list[int]) -> list[Content]:
+    """
+    Загружает контент с тегами по списку ID, сохраняя порядок списка.
+    ID разбиваются на пачки, чтобы не упираться в лимит параметров запроса.
+    """
+    contents_by_id = {}
+    for i in range(0, len(content_ids), LOAD_CONTENTS_CHUNK_SIZE):
+        chunk = content_ids[i : i + LOAD_CONTENTS_CHUNK_SIZE]
+        contents_by_id.update(
+            (content.id, content)
+            for content in db.query(Content)
+            .options(joinedload(Content.tags))
+            .filter(Content.id.in_(chunk))
+        )
+    return [contents_by_id[i] for i in content_ids if i in contents_by_id]
 
-    logger.info(
-        f"Returning {len(contents)} shuffled contents for feed for user: {username}"
-    )
 
-    return contents
+def contents_response(db: Session, content_ids: list[int], response: Response):
+    """
+    Контент по списку ID: ORM-объекты для response_model или,
+    при FAST_JSON_RESPONSES, готовый JSON из строк SQL
+    """
+    if fast_json_enabled():
+        return fast_json_response(content_dicts_by_ids(db, content_ids), response)
+    return load_contents(db, content_ids)
 
 
 @router_contents.get("/contents", response_model=List[ContentSchema])
+@async_session_endpoint
 def get_content(
-    username: str,
+    response: Response,
     tag: Optional[str] = None,
     date_start: Optional[date] = None,
     date_end: Optional[date] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: UserIdentity = Depends(get_current_user_async),
     db: Session = Depends(get_db),
 ) -> List[ContentSchema]:
-    logger.info(f"Fetching content for user: {username} with tag: {tag}")
+    """
+    Контент тега в городе пользователя, по дате начала.
 
-    q_filter = create_date_filter(date_start, date_end)
-    q_filter.append(Content.tags.any(Tags.name == tag))
-    current_user = db.query(User).filter(User.username == username).first()
+    Без limit и cursor возвращает весь список. С ними — страницу,
+    курсор следующей страницы отдаётся в заголовке X-Next-Cursor.
+    """
+    username = current_user.username
+    logger.info("Fetching content for user: {} with tag: {}", username, tag)
 
-    if not current_user:
-        logger.warning(f"User {username} not found")
-        raise HTTPException(status_code=404, detail="User not found")
+    tag_ids = catalog.get(db).tag_ids_by_name(tag)
+    if not tag_ids:
+        logger.info("Tag {} not found, returning no contents", tag)
+        return []
 
-    if current_user.city:
-        q_filter.append(Content.city == current_user.city)
+    candidates = feed_candidate_cache.get(
+        db, current_user.city or None, date_start, date_end, tag_ids=tag_ids
+    )
+    exclusions = exclusion_cache.get(db, current_user.id)
+    if limit is None and cursor is None:
+        content_ids = exclusions.filter(candidates.ids)
+    else:
+        content_ids, next_cursor = page_candidates(
+            candidates.candidates, exclusions, limit or DEFAULT_FEED_PAGE_SIZE, cursor
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
-    excluded_content_subquery = create_filter_excluded_contend(db, current_user)
-    content_query = (
-        db.query(Content)
-        .filter(and_(*q_filter))
-        .filter(~Content.id.in_(select(excluded_content_subquery)))
-        .options(joinedload(Content.tags).joinedload(Tags.macro_category))
+    logger.info(
+        "Returning {} contents for user: {} with tag: {}",
+        len(content_ids),
+        username,
+        tag,
     )
 
-    contents = content_query.all()
+    return contents_response(db, content_ids, response)
 
-    # Добавляем macro_category для каждого контента
-    for content in contents:
-        if content.tags and content.tags[0].macro_category:
-            content.macro_category = content.tags[0].macro_category.name
-        else:
-            content.macro_category = None
 
-    logger.info(
-        f"Returning {len(contents)} contents for user: {username} with tag: {tag}"
+def content_sort_values(content: Content) -> list:
+    """Значения CONTENT_SORT_KEYS для курсора"""
+    return [content.date_start, content.created, content.id]
+
+
+def candidate_sort_key(candidate) -> tuple:
+    """Порядок кандидатов в кэше: date_start (NULL в конце), затем id"""
+    return (
+        candidate.date_start is None,
+        candidate.date_start or date.min,
+        candidate.id,
     )
 
-    return contents
+
+def page_candidates(
+    candidates: list, exclusions, limit: int, cursor: Optional[str]
+) -> tuple[list[int], Optional[str]]:
+    """
+    Keyset-страница по закэшированным кандидатам: начало страницы
+    ищется бинарным поиском по ключу из курсора
+    """
+    start = 0
+    if cursor:
+        last_start, last_id = decode_keyset_cursor(cursor, CANDIDATE_SORT_KEYS)
+        start = bisect_right(
+            candidates,
+            (last_start is None, last_start or date.min, last_id),
+            key=candidate_sort_key,
+        )
+
+    page = []
+    for candidate in itertools.islice(candidates, start, None):
+        if candidate.id in exclusions:
+            continue
+        page.append(candidate)
+        if len(page) > limit:
+            last = page[limit - 1]
+            return [c.id for c in page[:limit]], encode_keyset_cursor(
+                [last.date_start, last.id]
+            )
+    return [c.id for c in page], None
 
 
 @router_contents.get("/contents/liked", response_model=list[ContentSchema])
+@async_session_endpoint
 def get_liked_content(
-    username: str,
+    response: Response,
     date_start: date | None = None,
     date_end: date | None = None,
     value: bool = True,
+    limit: Optional[int] = Query(default=None, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: UserIdentity = Depends(get_current_user_async),
     db: Session = Depends(get_db),
 ) -> list[ContentSchema]:
-    logger.info(f"Fetching liked content for user: {username}")
-
-    user_id = db.query(User.id).filter(User.username == username).scalar()
-
-    if not user_id:
-        logger.warning(f"User {username} not found")
-        raise HTTPException(status_code=404, detail="User not found")
+    """
+    Лайкнутый (или дизлайкнутый при value=false) контент, новые лайки первыми.
+    С limit или cursor — постранично, курсор в заголовке X-Next-Cursor.
+    """
+    username, user_id = current_user.username, current_user.id
+    logger.info("Fetching liked content for user: {}", username)
 
     likes_subquery = (
         db.query(Like.content_id, Like.created)
-        .filter(
-            Like.user_id == user_id,
-            Like.value.is_(value),
-            Like.content_id == Content.id,
-        )
+        .filter(Like.user_id == user_id, Like.value.is_(value))
         .subquery()
     )
-    likes_exists = (
-        exists().where(likes_subquery.c.content_id == Content.id).correlate(Content)
-    )
-    date_filters = create_date_filter(date_start, date_end)
-    filters = [likes_exists] + date_filters if date_filters else [likes_exists]
-    content_query = (
-        db.query(Content)
-        .filter(*filters)
-        .options(joinedload(Content.tags).joinedload(Tags.macro_category))
-        .options(joinedload(Content.tags).joinedload(Tags.macro_category))
-        .join(likes_subquery, Content.id == likes_subquery.c.content_id)
-        .order_by(likes_subquery.c.created.desc())
-    )
-    content = content_query.all()
-
-    for item in content:
-        if item.tags and item.tags[0].macro_category:
-            macro_category = item.tags[0].macro_category.name
-        else:
-            macro_category = None
-        item.macro_category = macro_category
+    liked_at = likes_subquery.c.created.label("liked_at")
+    fast = fast_json_enabled()
+    if fast:
+        content_query = db.query(*CONTENT_COLUMNS, liked_at)
+    else:
+        content_query = db.query(Content, liked_at).options(joinedload(Content.tags))
+    content_query = content_query.join(
+        likes_subquery, Content.id == likes_subquery.c.content_id
+    ).filter(*create_date_filter(date_start, date_end))
+    keys = [
+        SortKey(likes_subquery.c.created, descending=True),
+        SortKey(Content.id, descending=True),
+    ]
+
+    if limit is None and cursor is None:
+        rows = content_query.order_by(*keyset_order(keys)).all()
+    else:
+        rows, next_cursor = paginate_keyset(
+            content_query,
+            keys,
+            limit or DEFAULT_FEED_PAGE_SIZE,
+            cursor,
+            lambda row: [row.liked_at, row.id if fast else row.Content.id],
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
-    logger.info(f"Returning {len(content)} liked contents for user: {username}")
-    return content
+    logger.info("Returning {} liked contents for user: {}", len(rows), username)
+    if fast:
+        return fast_json_response(content_dicts(db, rows), response)
+    return [row.Content for row in rows]
 
 
 async def upload_file_to_minio(file: UploadFile, object_name: str) -> str:
     """
     Upload a file to MinIO and return the object name
     """
-    logger.info(f"Uploading file to MinIO: {object_name}")
+    logger.info("Uploading file to MinIO: {}", object_name)
     try:
         # Read the file into memory
         file_data = await file.read()
@@ -228,19 +427,20 @@ async def upload_file_to_minio(file: UploadFile, object_name: str) -> str:
         file_data_io = BytesIO(file_data)
 
         # Upload the file to MinIO
-        minio_client.put_object(
-            bucket_name,
-            object_name,
-            file_data_io,
-            length=len(file_data),
-            content_type=content_type,
-        )
+        with track_minio():
+            minio_client.put_object(
+                bucket_name,
+                object_name,
+                file_data_io,
+                length=len(file_data),
+                content_type=content_type,
+            )
 
-        logger.info(f"File uploaded to MinIO: {object_name}")
+        logger.info("File uploaded to MinIO: {}", object_name)
         return object_name
     except Exception as e:
         print(f"Error uploading file to MinIO: {e}")
-        logger.error(f"Error uploading file to MinIO: {e}")
+        logger.error("Error uploading file to MinIO: {}", e)
         raise HTTPException(status_code=500, detail="Error uploading file")
     finally:
         # Reset file pointer for potential future use
@@ -266,7 +466,7 @@ async def create_content(
     image: UploadFile = File(None),
     db: Session = Depends(get_db),
 ):
-    logger.info(f"Creating content for user {username}")
+    logger.info("Creating content for user {}", username)
 
     # Парсим JSON поля
     try:
@@ -278,30 +478,30 @@ async def create_content(
         try:
             # Пробуем распарсить как JSON
             tags_list = json.loads(tags)
-            logger.info(f"Tags parsed as JSON: {tags_list}")
+            logger.info("Tags parsed as JSON: {}", tags_list)
             if not isinstance(tags_list, list):
                 tags_list = [tags_list]
-                logger.info(f"Tags parsed as list: {tags_list}")
+                logger.info("Tags parsed as list: {}", tags_list)
         except json.JSONDecodeError:
             # Если не JSON, разбиваем по запятой
-            logger.info(f"Tags not JSON, splitting by comma: {tags}")
+            logger.info("Tags not JSON, splitting by comma: {}", tags)
             tags_list = [int(tag.strip()) for tag in tags.split(",") if tag.strip()]
         except ValueError:
             # Если одиночное значение
-            logger.info(f"Tags parsed as single value: {tags}")
+            logger.info("Tags parsed as single value: {}", tags)
             tags_list = [int(tags)]
 
     except (json.JSONDecodeError, ValueError) as e:
-        logger.error(f"Error parsing JSON: {e}")
+        logger.error("Error parsing JSON: {}", e)
         raise HTTPException(status_code=400, detail=f"Invalid JSON format: {str(e)}")
 
     # Преобразуем даты если они предоставлены
     try:
-        logger.info(f"Date start: {date_start}, Date end: {date_end}")
+        logger.info("Date start: {}, Date end: {}", date_start, date_end)
         date_start_obj = date.fromisoformat(date_start) if date_start else None
         date_end_obj = date.fromisoformat(date_end) if date_end else None
     except ValueError as e:
-        logger.error(f"Error parsing date: {e}")
+        logger.error("Error parsing date: {}", e)
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
 
     # Определяем тип публикации и проверяем права
@@ -315,11 +515,13 @@ async def create_content(
 
         # Проверяем существование пользователя и его права на организацию
         logger.info(
-            f"Checking user {username} and his organisation {organisation_id} permissions"
+            "Checking user {} and his organisation {} permissions",
+            username,
+            organisation_id,
         )
-        user = db.query(User).filter(User.username == username).first()
+        user = resolve_user(db, username)
         if not user:
-            logger.warning(f"User {username} not found")
+            logger.warning("User {} not found", username)
             raise HTTPException(status_code=404, detail="User not found")
 
         organisation = (
@@ -329,13 +531,16 @@ async def create_content(
         )
         if not organisation:
             logger.warning(
-                f"User {username} doesn't have permission to publish content for organisation {organisation_id}"
+                "User {} doesn't have permission to publish content for organisation {}",
+                username,
+                organisation_id,
             )
             raise HTTPException(
                 status_code=403,
                 detail="You don't have permission to publish content for this organisation",
             )
         publisher_id = organisation_id
+        organisation_name = organisation.name
     else:  # publisher_type == "user"
         if organisation_id is not None:
             logger.error("organisation_id should not be set when publishing as user")
@@ -345,25 +550,28 @@ async def create_content(
             )
 
         # Проверяем существование пользователя
-        logger.info(f"Checking user {username}")
-        user = db.query(User).filter(User.username == username).first()
+        logger.info("Checking user {}", username)
+        user = resolve_user(db, username)
         if not user:
-            logger.warning(f"User {username} not found")
+            logger.warning("User {} not found", username)
             raise HTTPException(status_code=404, detail="User not found")
         publisher_id = user.id
-
-    # Проверяем существование всех тегов
-    logger.info(f"Checking tags: {tags_list}")
-    tags = db.query(Tags).filter(Tags.id.in_(tags_list)).all()
-    if len(tags) != len(tags_list):
-        logger.warning(f"Some tags not found: {tags_list}")
+        organisation_name = None
+
+    # Проверяем существование всех тегов (по справочнику в памяти)
+    logger.info("Checking tags: {}", tags_list)
+    snapshot = catalog.get(db)
+    catalog_tags = snapshot.tags(tags_list)
+    if catalog_tags is None or len(set(tags_list)) != len(tags_list):
+        logger.warning("Some tags not found: {}", tags_list)
         raise HTTPException(status_code=400, detail="Some tags not found")
+    tags = session_tags(db, catalog_tags)
 
     # Создаем уникальный идентификатор
     unique_id = f"{name}_{publisher_type}_{publisher_id}_{datetime.now().timestamp()}"
 
     # Обрабатываем загрузку изображения
-    logger.info(f"Uploading image: {image}")
+    logger.info("Uploading image: {}", image)
     image_path = None
     if image:
         # Проверяем тип файла
@@ -377,7 +585,7 @@ async def create_content(
 
         # Загружаем файл в MinIO
         image_path = await upload_file_to_minio(image, image_filename)
-        logger.info(f"Image uploaded to MinIO: {image_path}")
+        logger.info("Image uploaded to MinIO: {}", image_path)
 
     # Создаем новый контент
     db_content = Content(
@@ -396,84 +604,91 @@ async def create_content(
         publisher_type=publisher_type,
         publisher_id=publisher_id,
         tags=tags,
+        macro_category=snapshot.macro_category_name(catalog_tags),
     )
-    logger.info(f"Creating new content: {db_content}")
+    logger.info("Creating new content: {}", db_content)
 
+    # индексы в памяти обновляются после коммита, когда теги уже истекли
+    tag_ids = [tag.id for tag in tags]
+    tag_names = [tag.name for tag in tags]
     db.add(db_content)
+    bump_content_version(db, city)
+    apply_tag_change(db, None, tagged_in(city, tag_ids))
     db.commit()
+    read_your_writes.mark(username)
     db.refresh(db_content)
+    feed_candidate_cache.invalidate_city(city)
+    search_result_cache.invalidate_city(city)
+    count_cache.invalidate("search")
+    count_cache.invalidate("organisation_contents")
+    city_tag_count_cache.invalidate_city(city)
+    search_index.add_content(db_content, tag_ids)
+    content_tag_map.add_content(db_content.id, city, tag_ids)
+    suggestion_index.add_content(db_content, tag_names, organisation_name)
 
-    # Получаем макро-категорию для ответа
-    macro_category = None
-    if db_content.tags and db_content.tags[0].macro_category:
-        macro_category = db_content.tags[0].macro_category.name
-
-    logger.info(f"Content created: {db_content}")
-    return ContentSchema.model_validate(
-        {
-            **db_content.__dict__,
-            "tags": tags,
-            "macro_category": macro_category,
-        }
-    )
+    logger.info("Content created: {}", db_content)
+    return ContentSchema.model_validate({**db_content.__dict__, "tags": tags})
 
 
 @router_contents.get("/users/{username}/contents", response_model=List[ContentSchema])
 def get_user_contents(
     username: str,
+    response: Response,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=10, ge=1, le=100),
+    cursor: Optional[str] = None,
     date_start: Optional[date] = None,
     date_end: Optional[date] = None,
     event_type: Optional[EventType] = None,
     db: Session = Depends(get_db),
 ):
+    """
+    Контент, опубликованный пользователем.
+    Курсор следующей страницы — в заголовке X-Next-Cursor; с cursor
+    страница строится по ключу сортировки, и skip не нужен.
+    """
     # Проверяем существование пользователя
-    logger.info(f"Checking user {username}")
-    user = db.query(User).filter(User.username == username).first()
+    logger.info("Checking user {}", username)
+    user = resolve_user(db, username)
     if not user:
-        logger.warning(f"User {username} not found")
+        logger.warning("User {} not found", username)
         raise HTTPException(status_code=404, detail="User not found")
 
     # Базовый запрос для контента
-    query = (
-        db.query(Content)
-        .options(joinedload(Content.tags).joinedload(Tags.macro_category))
-        .filter(
-            Content.publisher_type == "user",
-            Content.publisher_id == user.id,
-        )
+    fast = fast_json_enabled()
+    if fast:
+        query = db.query(*CONTENT_COLUMNS)
+    else:
+        query = db.query(Content).options(joinedload(Content.tags))
+    query = query.filter(
+        Content.publisher_type == "user",
+        Content.publisher_id == user.id,
     )
 
     # Применяем фильтры по датам
-    logger.info(f"Applying date filters: date_start={date_start}, date_end={date_end}")
+    logger.info(
+        "Applying date filters: date_start={}, date_end={}", date_start, date_end
+    )
     if date_start or date_end:
         date_filters = create_date_filter(date_start, date_end)
         query = query.filter(and_(*date_filters))
 
     # Фильтр по типу мероприятия
-    logger.info(f"Applying event type filter: event_type={event_type}")
+    logger.info("Applying event type filter: event_type={}", event_type)
     if event_type:
         query = query.filter(Content.event_type == event_type)
 
     # Применяем пагинацию и сортировку
-    logger.info(f"Applying pagination: skip={skip}, limit={limit}")
-    contents = (
-        query.order_by(Content.date_start.asc().nullslast(), Content.created.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    logger.info("Applying pagination: skip={}, limit={}", skip, limit)
+    contents, next_cursor = paginate_keyset(
+        query, CONTENT_SORT_KEYS, limit, cursor, content_sort_values, skip=skip
     )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
-    # Добавляем macro_category для каждого контента
-    logger.info("Adding macro_category for each content")
-    for content in contents:
-        if content.tags and content.tags[0].macro_category:
-            content.macro_category = content.tags[0].macro_category.name
-        else:
-            content.macro_category = None
-
-    logger.info(f"Returning contents: {contents}")
+    logger.info("Returning {} contents of user {}", len(contents), username)
+    if fast:
+        return fast_json_response(content_dicts(db, contents), response)
     return contents
 
 
@@ -494,28 +709,30 @@ async def delete_content(content_id: int, username: str, db: Session = Depends(g
         403: Нет прав на удаление мероприятия
     """
     # Проверяем существование пользователя
-    logger.info(f"Checking user {username}")
-    user = db.query(User).filter(User.username == username).first()
+    logger.info("Checking user {}", username)
+    user = resolve_user(db, username)
     if not user:
-        logger.warning(f"User {username} not found")
+        logger.warning("User {} not found", username)
         raise HTTPException(status_code=404, detail="User not found")
 
     # Получаем мероприятие с информацией о владельце
-    logger.info(f"Fetching content {content_id}")
+    logger.info("Fetching content {}", content_id)
     content = db.query(Content).filter(Content.id == content_id).first()
     if not content:
-        logger.warning(f"Content {content_id} not found")
+        logger.warning("Content {} not found", content_id)
         raise HTTPException(status_code=404, detail="Content not found")
 
     # Проверяем права на удаление
     logger.info(
-        f"Checking permissions for user {username} to delete content {content_id}"
+        "Checking permissions for user {} to delete content {}", username, content_id
     )
     if content.publisher_type == PublisherType.USER:
         # Для контента, опубликованного пользователем
         if content.publisher_id != user.id:
             logger.warning(
-                f"User {username} doesn't have permission to delete content {content_id}"
+                "User {} doesn't have permission to delete content {}",
+                username,
+                content_id,
             )
             raise HTTPException(
                 status_code=403,
@@ -523,7 +740,7 @@ async def delete_content(content_id: int, username: str, db: Session = Depends(g
             )
     else:
         # Для контента, опубликованного организацией
-        logger.info(f"Fetching organisation for content {content_id}")
+        logger.info("Fetching organisation for content {}", content_id)
         organisation = (
             db.query(Organisation)
             .filter(
@@ -533,7 +750,9 @@ async def delete_content(content_id: int, username: str, db: Session = Depends(g
         )
         if not organisation:
             logger.warning(
-                f"User {username} doesn't have permission to delete content {content_id}"
+                "User {} doesn't have permission to delete content {}",
+                username,
+                content_id,
             )
             raise HTTPException(
                 status_code=403,
@@ -543,27 +762,41 @@ async def delete_content(content_id: int, username: str, db: Session = Depends(g
     try:
         # Если есть изображение, удаляем его из MinIO
         if content.image:
-            logger.info(f"Deleting image from MinIO: {content.image}")
+            logger.info("Deleting image from MinIO: {}", content.image)
             try:
                 # Получаем путь к файлу из полного URL
                 image_path = content.image.split(f"{bucket_name}/")[-1]
-                minio_client.remove_object(bucket_name, image_path)
-                logger.info(f"Image deleted from MinIO: {content.image}")
+                with track_minio():
+                    minio_client.remove_object(bucket_name, image_path)
+                logger.info("Image deleted from MinIO: {}", content.image)
             except Exception as e:
                 # Логируем ошибку, но продолжаем удаление контента
                 print(f"Error deleting image from MinIO: {e}")
-                logger.error(f"Error deleting image from MinIO: {e}")
+                logger.error("Error deleting image from MinIO: {}", e)
 
         # Удаляем мероприятие из базы данных
+        city = content.city
+        tagged = tagged_in(city, (tag.id for tag in content.tags))
         db.delete(content)
+        bump_content_version(db, city)
+        apply_tag_change(db, tagged, None)
         db.commit()
-        logger.info(f"Content {content_id} deleted successfully")
+        read_your_writes.mark(username)
+        feed_candidate_cache.invalidate_city(city)
+        search_result_cache.invalidate_city(city)
+        count_cache.invalidate("search")
+        count_cache.invalidate("organisation_contents")
+        city_tag_count_cache.invalidate_city(city)
+        search_index.remove_content(content_id, city)
+        content_tag_map.remove_content(content_id, city)
+        suggestion_index.remove_content(content_id, city)
+        logger.info("Content {} deleted successfully", content_id)
 
         return None  # 204 No Content
 
     except Exception as e:
         db.rollback()
-        logger.error(f"Error deleting content: {e}")
+        logger.error("Error deleting content: {}", e)
         raise HTTPException(status_code=500, detail=f"Error deleting content: {str(e)}")
 
 
@@ -573,7 +806,7 @@ async def delete_content(content_id: int, username: str, db: Session = Depends(g
 def get_users_who_liked_content(content_id: int, db: Session = Depends(get_db)):
     content = db.query(Content).filter(Content.id == content_id).first()
     if not content:
-        logger.warning(f"Content {content_id} not found")
+        logger.warning("Content {} not found", content_id)
         raise HTTPException(status_code=404, detail="Content not found")
 
     likes = (
@@ -582,31 +815,47 @@ def get_users_who_liked_content(content_id: int, db: Session = Depends(get_db)):
         .filter(Like.content_id == content_id, Like.value == True)  # noqa: E712
         .all()
     )
-    logger.info(f"Users who liked content {content_id}: {likes}")
+    logger.info("{} users liked content {}", len(likes), content_id)
+    logger.opt(lazy=True).debug(
+        "Users who liked content {}: {}",
+        lambda: content_id,
+        lambda: [user.username for user in likes],
+    )
     return likes
 
 
 @router_contents.get("/contents/{content_id}", response_model=ContentSchema)
-def get_content_by_id(content_id: int, db: Session = Depends(get_db)) -> ContentSchema:
-    logger.info(f"Получение события с ID {content_id}")
+@async_session_endpoint
+def get_content_by_id(
+    content_id: int, request: Request, response: Response, db: Session = Depends(get_db)
+) -> ContentSchema:
+    logger.info("Получение события с ID {}", content_id)
 
     content = (
         db.query(Content)
-        .options(joinedload(Content.tags).joinedload(Tags.macro_category))
+        .options(joinedload(Content.tags))
         .filter(Content.id == content_id)
         .first()
     )
     if not content:
-        logger.warning(f"Событие с ID {content_id} не найдено")
+        logger.warning("Событие с ID {} не найдено", content_id)
         raise HTTPException(
             status_code=404, detail=f"Событие с ID {content_id} не найдено"
         )
 
-    # Добавляем macro_category
-    if content.tags and content.tags[0].macro_category:
-        content.macro_category = content.tags[0].macro_category.name
-    else:
-        content.macro_category = None
+    # тело собирается из строки контента и его тегов: их версии и есть ETag.
+    # macro_category Django пересчитывает через .update() без updated
+    etag = make_etag(
+        "content",
+        content.id,
+        content.updated,
+        content.macro_category,
+        sorted((tag.id, tag.updated) for tag in content.tags),
+    )
+    cached = conditional_response(request, response, etag, content_cache_control())
+    if cached is not None:
+        logger.info("Событие с ID {} не изменилось", content_id)
+        return cached
 
-    logger.info(f"Событие с ID {content_id} успешно получено")
+    logger.info("Событие с ID {} успешно получено", content_id)
     return content
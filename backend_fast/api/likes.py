@@ -7,7 +7,6 @@ from fastapi import (
 from sqlalchemy.orm import Session
 
 from models import (
-    User,
     Content,
     Like,
     get_db,
@@ -16,7 +15,10 @@ from schemas import (
     LikeSchema,
     LikeRequestSchema,
 )
-from loguru import logger
+from utils.exclusions import exclusion_cache
+from utils.identity import get_or_create_user
+from utils.replicas import read_your_writes
+from utils.logs import logger
 
 app = FastAPI()
 
@@ -25,17 +27,12 @@ router_likes = APIRouter(prefix="/api/v1", tags=["likes"])
 
 @router_likes.post("/like", response_model=LikeSchema)
 def set_like(request_data: LikeRequestSchema, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == request_data.username).first()
-    if not user:
-        user = User(username=request_data.username)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    user = get_or_create_user(db, request_data.username)
 
     content = db.query(Content).filter(Content.id == request_data.content_id).first()
 
     if not content:
-        logger.warning(f"Content {request_data.content_id} not found")
+        logger.warning("Content {} not found", request_data.content_id)
         raise HTTPException(status_code=404, detail="Content not found")
 
     like = (
@@ -50,7 +47,9 @@ def set_like(request_data: LikeRequestSchema, db: Session = Depends(get_db)):
         db.add(like)
 
     db.commit()
-    logger.info(f"Like saved from {user.username} for content {content.id}")
+    read_your_writes.mark(user.username)
+    exclusion_cache.add(user.id, content.id)
+    logger.info("Like saved from {} for content {}", user.username, content.id)
     return {
         "user": user.username,
         "content": content.id,
@@ -60,16 +59,11 @@ def set_like(request_data: LikeRequestSchema, db: Session = Depends(get_db)):
 
 @router_likes.post("/dislike", response_model=LikeSchema)
 def set_dislike(request_data: LikeRequestSchema, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == request_data.username).first()
-    if not user:
-        user = User(username=request_data.username)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    user = get_or_create_user(db, request_data.username)
 
     content = db.query(Content).filter(Content.id == request_data.content_id).first()
     if not content:
-        logger.warning(f"Content {request_data.content_id} not found")
+        logger.warning("Content {} not found", request_data.content_id)
         raise HTTPException(status_code=404, detail="Content not found")
 
     like = (
@@ -84,7 +78,9 @@ def set_dislike(request_data: LikeRequestSchema, db: Session = Depends(get_db)):
         db.add(like)
 
     db.commit()
-    logger.info(f"Dislike saved from {user.username} for content {content.id}")
+    read_your_writes.mark(user.username)
+    exclusion_cache.add(user.id, content.id)
+    logger.info("Dislike saved from {} for content {}", user.username, content.id)
     return {
         "user": user.username,
         "content": content.id,
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from models import get_db, MacroCategory
+from models import get_read_db
 from schemas import MacroCategorySchema, MacroCategoriesResponseSchema
+from utils.catalog import catalog, catalog_cache_control
+from utils.counting import CountMode
+from utils.http_cache import etag_matches, not_modified, set_cache_headers
 
 router_macro_categories = APIRouter(prefix="/api/v1", tags=["macro-categories"])
 
@@ -11,32 +14,37 @@ router_macro_categories = APIRouter(prefix="/api/v1", tags=["macro-categories"])
     "/macro-categories", response_model=MacroCategoriesResponseSchema
 )
 def get_macro_categories(
+    request: Request,
+    response: Response,
     skip: int = Query(default=0, ge=0, description="Количество пропускаемых записей"),
     limit: int = Query(
         default=50, ge=1, le=100, description="Количество возвращаемых записей"
     ),
-    db: Session = Depends(get_db),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Как считать total_count: exact, estimate, none"
+    ),
+    db: Session = Depends(get_read_db),
 ):
     """
     Получить список всех макрокатегорий
 
     - **skip**: количество записей для пропуска (для пагинации)
     - **limit**: максимальное количество возвращаемых записей
+    - **count**: как считать total_count (utils.counting)
     """
-    # Получаем общее количество макрокатегорий
-    total_count = db.query(MacroCategory).count()
-
-    # Получаем макрокатегории с пагинацией
-    macro_categories = (
-        db.query(MacroCategory)
-        .order_by(MacroCategory.name.asc())  # Сортируем по имени
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    # Макрокатегории из справочника в памяти: total_count всегда точный
+    snapshot = catalog.get(db)
+    if etag_matches(request, snapshot.etag):
+        return not_modified(snapshot.etag, catalog_cache_control())
+    set_cache_headers(response, snapshot.etag, catalog_cache_control())
 
+    macro_categories = snapshot.macro_categories
     return MacroCategoriesResponseSchema(
-        macro_categories=macro_categories, total_count=total_count
+        macro_categories=[
+            MacroCategorySchema.model_validate(category)
+            for category in macro_categories[skip : skip + limit]
+        ],
+        total_count=None if count is CountMode.NONE else len(macro_categories),
     )
 
 
@@ -45,7 +53,9 @@ def get_macro_categories(
 )
 def get_macro_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
 ):
     """
     Получить конкретную макрокатегорию по ID
@@ -54,11 +64,14 @@ def get_macro_category(
     """
     from fastapi import HTTPException
 
-    macro_category = (
-        db.query(MacroCategory).filter(MacroCategory.id == category_id).first()
-    )
+    snapshot = catalog.get(db)
+    macro_category = snapshot.macro_categories_by_id.get(category_id)
 
     if not macro_category:
         raise HTTPException(status_code=404, detail="Macro category not found")
 
-    return macro_category
+    if etag_matches(request, snapshot.etag):
+        return not_modified(snapshot.etag, catalog_cache_control())
+    set_cache_headers(response, snapshot.etag, catalog_cache_control())
+
+    return MacroCategorySchema.model_validate(macro_category)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from api.cache_stats import collect_cache_stats
+from utils.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    render_cache_metrics,
+    render_prometheus,
+)
+
+router_metrics = APIRouter(tags=["metrics"])
+
+
+@router_metrics.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Метрики запросов этого процесса по шаблонам маршрутов и попадания
+    в кэши процесса в текстовом формате Prometheus
+    """
+    return PlainTextResponse(
+        render_prometheus() + render_cache_metrics(collect_cache_stats()),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
@@ -18,9 +18,25 @@ from io import BytesIO
 from fastapi.responses import JSONResponse
 from passlib.context import CryptContext
 from utils.minio_utils import minio_client, bucket_name
+from utils.fast_json import (
+    CONTENT_COLUMNS,
+    content_dicts,
+    fast_json_enabled,
+    fast_json_response,
+)
+from utils.date_filters import create_date_filter
+from utils.pagination import paginate_keyset
+from utils.counting import (
+    CountMode,
+    count_cache,
+    count_key,
+    count_total,
+    paginate_with_total,
+)
+from utils.identity import UserIdentity, get_current_user, resolve_user
+from api.contents import CONTENT_SORT_KEYS, content_sort_values
 
 from models import (
-    User,
     Content,
     get_db,
     Organisation,
@@ -31,47 +47,29 @@ from schemas import (
     OrganisationListResponse,
     OrganisationContentListResponse,
 )
-from loguru import logger
+from utils.replicas import read_your_writes
+from utils.logs import logger
+from utils.metrics import track_minio
 
 router_organisations = APIRouter(prefix="/api/v1", tags=["organisations"])
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def create_date_filter(date_start: date, date_end: date):
-    q_filter = []
-
-    if date_start and date_end:
-        q_filter.append(Content.date_start <= date_end)
-        q_filter.append(Content.date_end >= date_start)
-    elif date_start:
-        q_filter.append(Content.date_start == date_start)
-    elif date_end:
-        q_filter.append(Content.date_end <= date_end)
-
-    return q_filter
-
-
 @router_organisations.post(
     "/organisations", response_model=OrganisationResponse, status_code=201
 )
 async def create_organisation(
-    username: str,
     name: str = Form(...),
     phone: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
     image: Optional[UploadFile] = File(None),
+    user: UserIdentity = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    # Проверяем существование пользователя
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        logger.warning(f"User {username} not found")
-        raise HTTPException(status_code=404, detail="User not found")
-
     # Проверяем уникальность email
     if db.query(exists().where(Organisation.email == email)).scalar():
-        logger.warning(f"Email {email} already registered")
+        logger.warning("Email {} already registered", email)
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Хешируем пароль
@@ -100,25 +98,28 @@ async def create_organisation(
             file_content = await image.read()
 
             # Загружаем файл в MinIO
-            minio_client.put_object(
-                bucket_name=bucket_name,
-                object_name=object_name,
-                data=BytesIO(file_content),
-                length=len(file_content),
-                content_type=image.content_type,
-            )
+            with track_minio():
+                minio_client.put_object(
+                    bucket_name=bucket_name,
+                    object_name=object_name,
+                    data=BytesIO(file_content),
+                    length=len(file_content),
+                    content_type=image.content_type,
+                )
 
             # Сохраняем только путь к файлу, без полного URL
             organisation.image = object_name
 
         except Exception as e:
-            logger.error(f"Error uploading image: {e}")
+            logger.error("Error uploading image: {}", e)
             raise HTTPException(
                 status_code=500, detail=f"Error uploading image: {str(e)}"
             )
 
     db.add(organisation)
     db.commit()
+    read_your_writes.mark(user.username)
+    count_cache.invalidate("organisations")
     db.refresh(organisation)
 
     # Преобразуем URL изображения для ответа
@@ -134,6 +135,9 @@ def get_organisations(
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=10, ge=1, le=100),
     search: Optional[str] = None,
+    count: CountMode = Query(
+        CountMode.EXACT, description="Как считать total_count: exact, estimate, none"
+    ),
     db: Session = Depends(get_db),
 ):
     # Базовый запрос с подгрузкой пользователя
@@ -142,20 +146,21 @@ def get_organisations(
     # Если есть поисковый запрос, фильтруем по имени или email
     if search:
         search = f"%{search}%"
-        logger.info(f"Search query: {search}")
+        logger.info("Search query: {}", search)
         query = query.filter(
             Organisation.name.ilike(search) | Organisation.email.ilike(search)
         )
-        logger.info(f"Filtered query: {query}")
-
-    # Получаем общее количество организаций
-    logger.info("Getting total organisation count")
-    total_count = query.count()
-
-    # Применяем пагинацию
-    logger.info("Applying pagination")
-    organisations = (
-        query.order_by(Organisation.created.desc()).offset(skip).limit(limit).all()
+        logger.info("Filtered query: {}", query)
+
+    # Применяем пагинацию и получаем общее количество организаций
+    logger.info("Applying pagination and getting total organisation count")
+    organisations, total_count = paginate_with_total(
+        db,
+        query.order_by(Organisation.created.desc()),
+        skip,
+        limit,
+        count,
+        count_key("organisations", search=search),
     )
 
     # Преобразуем URL изображений в полные URL
@@ -178,6 +183,13 @@ def get_organisation_contents(
     organisation_id: int,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    with_total: bool = Query(
+        default=True, description="Считать total_count (False — как count=none)"
+    ),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Как считать total_count: exact, estimate, none"
+    ),
     date_start: Optional[date] = None,
     date_end: Optional[date] = None,
     event_type: Optional[EventType] = None,
@@ -202,13 +214,14 @@ def get_organisation_contents(
 
     # Базовый запрос для контента
     logger.info("Creating base query for content")
-    query = (
-        db.query(Content)
-        .options(selectinload(Content.tags))
-        .filter(
-            Content.publisher_type == "organisation",
-            Content.publisher_id == organisation_id,
-        )
+    fast = fast_json_enabled()
+    if fast:
+        query = db.query(*CONTENT_COLUMNS)
+    else:
+        query = db.query(Content).options(selectinload(Content.tags))
+    query = query.filter(
+        Content.publisher_type == "organisation",
+        Content.publisher_id == organisation_id,
     )
 
     # Применяем фильтры по датам
@@ -224,19 +237,42 @@ def get_organisation_contents(
 
     # Получаем общее количество контента
     logger.info("Getting total content count")
-    total_count = query.count()
+    total_count = count_total(
+        db,
+        query,
+        count if with_total else CountMode.NONE,
+        count_key(
+            "organisation_contents",
+            organisation_id=organisation_id,
+            date_start=date_start,
+            date_end=date_end,
+            event_type=event_type,
+        ),
+    )
 
     # Применяем пагинацию и сортировку
     logger.info("Applying pagination and sorting")
-    contents = (
-        query.order_by(Content.date_start.asc().nullslast(), Content.created.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    contents, next_cursor = paginate_keyset(
+        query, CONTENT_SORT_KEYS, limit, cursor, content_sort_values, skip=skip
     )
 
+    if fast:
+        return fast_json_response(
+            {
+                "organisation": OrganisationResponse.model_validate(
+                    organisation
+                ).model_dump(),
+                "contents": content_dicts(db, contents),
+                "total_count": total_count,
+                "next_cursor": next_cursor,
+            }
+        )
+
     return OrganisationContentListResponse(
-        organisation=organisation, contents=contents, total_count=total_count
+        organisation=organisation,
+        contents=contents,
+        total_count=total_count,
+        next_cursor=next_cursor,
     )
 
 
@@ -250,9 +286,9 @@ def get_user_organisations(
     db: Session = Depends(get_db),
 ):
     # Проверяем существование пользователя
-    user = db.query(User).filter(User.username == username).first()
+    user = resolve_user(db, username)
     if not user:
-        logger.warning(f"User {username} not found")
+        logger.warning("User {} not found", username)
         raise HTTPException(status_code=404, detail="User not found")
 
     # Получаем организации пользователя
@@ -288,7 +324,7 @@ def get_user_organisations(
 )
 def delete_organisation(
     organisation_id: int,
-    username: str = Query(..., description="Username of the user requesting deletion"),
+    user: UserIdentity = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     # Получаем организацию
@@ -301,13 +337,6 @@ def delete_organisation(
         logger.warning("Organisation not found")
         raise HTTPException(status_code=404, detail="Organisation not found")
 
-    # Получаем пользователя
-    logger.info("Getting user")
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        logger.warning("User not found")
-        raise HTTPException(status_code=404, detail="User not found")
-
     # Проверка, что пользователь владелец организации
     logger.info("Checking if user is owner of the organisation")
     if organisation.user_id != user.id:
@@ -320,5 +349,8 @@ def delete_organisation(
     logger.info("Deleting organisation")
     db.delete(organisation)
     db.commit()
+    read_your_writes.mark(user.username)
+    count_cache.invalidate("organisations")
+    count_cache.invalidate("organisation_contents")
 
     return JSONResponse(status_code=status.HTTP_204_NO_CONTENT, content=None)
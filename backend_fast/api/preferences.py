@@ -6,36 +6,33 @@ from fastapi import (
 )
 from sqlalchemy.orm import Session
 
-from models import User, Tags, UserCategoryPreference, get_db
+from models import Tags, UserCategoryPreference, get_db
 from schemas import (
     UserPreferencesResponseSchema,
 )
-from loguru import logger
+from utils.catalog import catalog
+from utils.identity import UserIdentity, get_current_user
+from utils.replicas import read_your_writes
+from utils.logs import logger
 
 router_preferences = APIRouter(prefix="/api/v1", tags=["preferences"])
 
 
 @router_preferences.post("/preferences/categories", response_model=dict)
 def set_category_preference(
-    username: str = Query(...),
+    user: UserIdentity = Depends(get_current_user),
     tag_id: int = Query(...),
     db: Session = Depends(get_db),
 ):
     """
     Устанавливает предпочтение пользователя для указанной категории (тега).
     """
-    user = db.query(User).filter(User.username == username).first()
-
-    if not user:
-        logger.warning(f"User {username} not found")
-        raise HTTPException(status_code=404, detail="User not found")
-
-    tag = db.query(Tags).filter(Tags.id == tag_id).first()
+    tag = catalog.get(db).tag(tag_id)
     if not tag:
-        logger.warning(f"Tag {tag_id} not found")
+        logger.warning("Tag {} not found", tag_id)
         raise HTTPException(status_code=404, detail="Tag not found")
 
-    logger.info(f"Setting preference for user {user.username} and tag {tag.name}")
+    logger.info("Setting preference for user {} and tag {}", user.username, tag.name)
     preference = (
         db.query(UserCategoryPreference)
         .filter(
@@ -45,30 +42,27 @@ def set_category_preference(
         .first()
     )
     if not preference:
-        logger.info(f"Creating new preference for user {user.username} and tag {tag.name}")
+        logger.info(
+            "Creating new preference for user {} and tag {}", user.username, tag.name
+        )
         preference = UserCategoryPreference(user_id=user.id, tag_id=tag_id)
         db.add(preference)
         db.commit()
+        read_your_writes.mark(user.username)
 
     return {"message": f"Preference for tag_id {tag_id} added successfully"}
 
 
 @router_preferences.delete("/preferences/categories", response_model=dict)
 def delete_category_preference(
-    username: str = Query(...),
+    user: UserIdentity = Depends(get_current_user),
     tag_id: int = Query(...),
     db: Session = Depends(get_db),
 ):
     """
     Удаляет предпочтение пользователя по категории (тегу).
     """
-    user = db.query(User).filter(User.username == username).first()
-
-    if not user:
-        logger.warning(f"User {username} not found")
-        raise HTTPException(status_code=404, detail="User not found")
-
-    logger.info(f"Deleting preference for user {user.username} and tag {tag_id}")
+    logger.info("Deleting preference for user {} and tag {}", user.username, tag_id)
     preference = (
         db.query(UserCategoryPreference)
         .filter(
@@ -78,13 +72,16 @@ def delete_category_preference(
         .first()
     )
     if not preference:
-        logger.warning(f"Preference not found for user {user.username} and tag {tag_id}")
+        logger.warning(
+            "Preference not found for user {} and tag {}", user.username, tag_id
+        )
         raise HTTPException(
             status_code=404, detail="Preference not found for the specified tag"
         )
 
     db.delete(preference)
     db.commit()
+    read_your_writes.mark(user.username)
     return {"message": f"Preference for tag_id {tag_id} deleted successfully"}
 
 
@@ -92,24 +89,19 @@ def delete_category_preference(
     "/preferences/categories", response_model=UserPreferencesResponseSchema
 )
 def get_user_preferences(
-    username: str = Query(...),
+    user: UserIdentity = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Возвращает список всех предпочтений пользователя по категориям (тегам).
     """
-    logger.info(f"Getting preferences for user {username}")
-    user = db.query(User).filter(User.username == username).first()
-
-    if not user:
-        logger.warning(f"User {username} not found")
-        raise HTTPException(status_code=404, detail="User not found")
-
-    preferences = (
-        db.query(UserCategoryPreference)
+    logger.info("Getting preferences for user {}", user.username)
+    # Имена тегов тем же запросом, без ленивой загрузки pref.tag на каждую строку
+    categories = [
+        name
+        for (name,) in db.query(Tags.name)
+        .join(UserCategoryPreference, UserCategoryPreference.tag_id == Tags.id)
         .filter(UserCategoryPreference.user_id == user.id)
-        .join(Tags, UserCategoryPreference.tag_id == Tags.id)
-        .all()
-    )
-    categories = [pref.tag.name for pref in preferences]
+        .order_by(UserCategoryPreference.id)
+    ]
     return UserPreferencesResponseSchema(categories=categories)
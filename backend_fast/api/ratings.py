@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from models import get_db, User, Content, Rating
+from models import get_db, get_read_db, Content, Rating
 from schemas import RatingCreateSchema, RatingResponseSchema, ContentRatingStatsSchema
-from loguru import logger
+from utils.http_cache import conditional_response, make_etag, rating_stats_cache_control
+from utils.identity import resolve_user
+from utils.replicas import read_your_writes
+from utils.logs import logger
 
 router_ratings = APIRouter(prefix="/api/v1", tags=["ratings"])
 
@@ -18,7 +21,7 @@ def create_or_update_rating(
     """
     # Проверяем существование пользователя
     logger.info("Checking if user exists")
-    user = db.query(User).filter(User.username == rating_data.username).first()
+    user = resolve_user(db, rating_data.username)
     if not user:
         logger.info("User not found")
         raise HTTPException(
@@ -47,6 +50,7 @@ def create_or_update_rating(
         logger.info("Updating existing rating")
         existing_rating.rating = rating_data.rating
         db.commit()
+        read_your_writes.mark(user.username)
         db.refresh(existing_rating)
 
         # Создаем ответ с именем пользователя
@@ -70,6 +74,7 @@ def create_or_update_rating(
         )
         db.add(new_rating)
         db.commit()
+        read_your_writes.mark(user.username)
         db.refresh(new_rating)
 
         # Создаем ответ с именем пользователя
@@ -88,7 +93,12 @@ def create_or_update_rating(
 @router_ratings.get(
     "/ratings/stats/{content_id}", response_model=ContentRatingStatsSchema
 )
-def get_content_rating_stats(content_id: int, db: Session = Depends(get_db)):
+def get_content_rating_stats(
+    content_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
     """
     Получить статистику оценок для конкретного мероприятия:
     - Средняя оценка
@@ -120,30 +130,39 @@ def get_content_rating_stats(content_id: int, db: Session = Depends(get_db)):
     # Если нет оценок, возвращаем нули
     if total_ratings == 0:
         logger.info("No ratings found, returning zero values")
-        return ContentRatingStatsSchema(
-            content_id=content_id,
-            average_rating=0.0,
-            total_ratings=0,
-            ratings_distribution={},
+        average_rating = 0.0
+        ratings_distribution = {}
+    else:
+        # Получаем распределение оценок
+        logger.info("Getting rating distribution")
+        ratings_distribution_query = (
+            db.query(Rating.rating, func.count(Rating.rating).label("count"))
+            .filter(Rating.content_id == content_id)
+            .group_by(Rating.rating)
+            .all()
         )
 
-    # Получаем распределение оценок
-    logger.info("Getting rating distribution")
-    ratings_distribution_query = (
-        db.query(Rating.rating, func.count(Rating.rating).label("count"))
-        .filter(Rating.content_id == content_id)
-        .group_by(Rating.rating)
-        .all()
+        logger.info("Setting rating distribution")
+        average_rating = round(float(avg_rating_result), 2)
+        ratings_distribution = {
+            rating: count for rating, count in ratings_distribution_query
+        }
+
+    # ETag из посчитанных значений: они и есть всё тело ответа
+    etag = make_etag(
+        "rating-stats",
+        content_id,
+        average_rating,
+        total_ratings,
+        sorted(ratings_distribution.items()),
     )
-
-    logger.info("Setting rating distribution")
-    ratings_distribution = {
-        rating: count for rating, count in ratings_distribution_query
-    }
+    cached = conditional_response(request, response, etag, rating_stats_cache_control())
+    if cached is not None:
+        return cached
 
     return ContentRatingStatsSchema(
         content_id=content_id,
-        average_rating=round(float(avg_rating_result), 2),
+        average_rating=average_rating,
         total_ratings=total_ratings,
         ratings_distribution=ratings_distribution,
     )
@@ -156,7 +175,7 @@ def delete_rating(content_id: int, username: str, db: Session = Depends(get_db))
     """
     # Проверяем существование пользователя
     logger.info("Checking if user exists")
-    user = db.query(User).filter(User.username == username).first()
+    user = resolve_user(db, username)
     if not user:
         logger.info("User not found")
         raise HTTPException(
@@ -181,20 +200,21 @@ def delete_rating(content_id: int, username: str, db: Session = Depends(get_db))
     logger.info("Deleting rating")
     db.delete(rating)
     db.commit()
+    read_your_writes.mark(user.username)
 
     return {"message": "Оценка успешно удалена"}
 
 
 @router_ratings.get("/users/{username}/ratings")
 def get_user_ratings(
-    username: str, skip: int = 0, limit: int = 20, db: Session = Depends(get_db)
+    username: str, skip: int = 0, limit: int = 20, db: Session = Depends(get_read_db)
 ):
     """
     Получить все оценки пользователя с пагинацией
     """
     # Проверяем существование пользователя
     logger.info("Checking if user exists")
-    user = db.query(User).filter(User.username == username).first()
+    user = resolve_user(db, username)
     if not user:
         logger.info("User not found")
         raise HTTPException(
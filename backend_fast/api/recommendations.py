@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from utils.logs import logger
+
+from api.contents import load_contents
+from models import ContentNeighbours, Like, get_read_db
+from schemas import ContentSchema
+from utils.exclusions import exclusion_cache
+from utils.identity import UserIdentity, get_current_user_read
+from utils.item_neighbours import merge_neighbours
+
+router_recommendations = APIRouter(prefix="/api/v1", tags=["recommendations"])
+
+# Сколько последних лайков пользователя учитывать
+RECENT_LIKES_COUNT = 50
+# Запас кандидатов на случай, если часть соседей окажется в другом городе
+CITY_OVERFETCH_FACTOR = 3
+
+
+@router_recommendations.get("/recommendations", response_model=list[ContentSchema])
+def get_recommendations(
+    limit: int = Query(default=20, ge=1, le=100),
+    user: UserIdentity = Depends(get_current_user_read),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Рекомендации «похоже на то, что вам понравилось».
+
+    Соседи последних лайков пользователя читаются одним запросом
+    по индексу лайков и первичному ключу таблицы соседей, а затем
+    объединяются в памяти. Таблицу соседей строит задача
+    jobs.build_item_neighbours.
+    """
+    logger.info("Fetching recommendations for user: {}", user.username)
+
+    neighbour_lists = [
+        neighbours
+        for (neighbours,) in db.query(ContentNeighbours.neighbours)
+        .join(Like, Like.content_id == ContentNeighbours.content_id)
+        .filter(Like.user_id == user.id, Like.value.is_(True))
+        .order_by(Like.id.desc())
+        .limit(RECENT_LIKES_COUNT)
+    ]
+    content_ids = merge_neighbours(
+        neighbour_lists,
+        exclusion_cache.get(db, user.id),
+        limit * CITY_OVERFETCH_FACTOR if user.city else limit,
+    )
+
+    contents = [
+        content
+        for content in load_contents(db, content_ids)
+        if not user.city or content.city == user.city
+    ][:limit]
+
+    logger.info(
+        "Returning {} recommendations for user: {}", len(contents), user.username
+    )
+    return contents
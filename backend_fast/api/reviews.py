@@ -3,21 +3,27 @@ from fastapi import (
     Depends,
     HTTPException,
     Query,
+    Request,
+    Response,
 )
 from sqlalchemy.orm import Session, joinedload
 
 from models import (
-    User,
     Content,
     Review,
     get_db,
+    get_read_db,
 )
 from schemas import (
     ReviewCreateSchema,
     ReviewResponseSchema,
     ReviewListResponseSchema,
 )
-from loguru import logger
+from utils.http_cache import conditional_response, make_etag, reviews_cache_control
+from utils.counting import CountMode, count_cache, count_key, paginate_with_total
+from utils.identity import resolve_user
+from utils.replicas import read_your_writes
+from utils.logs import logger
 
 router_reviews = APIRouter(prefix="/api/v1", tags=["reviews"])
 
@@ -29,7 +35,7 @@ def create_review(review_data: ReviewCreateSchema, db: Session = Depends(get_db)
     """
     # Проверяем существование пользователя
     logger.info("Checking if user exists")
-    user = db.query(User).filter(User.username == review_data.username).first()
+    user = resolve_user(db, review_data.username)
     if not user:
         logger.info("User not found")
         raise HTTPException(status_code=404, detail="User not found")
@@ -49,6 +55,9 @@ def create_review(review_data: ReviewCreateSchema, db: Session = Depends(get_db)
 
     db.add(review)
     db.commit()
+    read_your_writes.mark(user.username)
+    count_cache.invalidate("reviews")
+    count_cache.invalidate("user_reviews")
     db.refresh(review)
 
     # Формируем ответ с именем пользователя
@@ -77,7 +86,7 @@ def delete_review(
     """
     # Проверяем существование пользователя
     logger.info("Checking if user exists")
-    user = db.query(User).filter(User.username == username).first()
+    user = resolve_user(db, username)
     if not user:
         logger.info("User not found")
         raise HTTPException(status_code=404, detail="User not found")
@@ -100,18 +109,26 @@ def delete_review(
     logger.info("Deleting review")
     db.delete(review)
     db.commit()
+    read_your_writes.mark(user.username)
+    count_cache.invalidate("reviews")
+    count_cache.invalidate("user_reviews")
 
     return {"message": "Review deleted successfully"}
 
 
 @router_reviews.get("/reviews", response_model=ReviewListResponseSchema)
 def get_reviews_for_content(
+    request: Request,
+    response: Response,
     content_id: int = Query(..., description="ID of the content to get reviews for"),
     skip: int = Query(default=0, ge=0, description="Number of reviews to skip"),
     limit: int = Query(
         default=10, ge=1, le=100, description="Number of reviews to return"
     ),
-    db: Session = Depends(get_db),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Как считать total_count: exact, estimate, none"
+    ),
+    db: Session = Depends(get_read_db),
 ):
     """
     Получение всех отзывов для конкретного мероприятия
@@ -132,13 +149,28 @@ def get_reviews_for_content(
         .order_by(Review.created.desc())
     )
 
-    # Подсчитываем общее количество
-    logger.info("Counting total count")
-    total_count = reviews_query.count()
+    # Применяем пагинацию и подсчитываем общее количество
+    logger.info("Applying pagination and counting total count")
+    reviews, total_count = paginate_with_total(
+        db,
+        reviews_query,
+        skip,
+        limit,
+        count,
+        count_key("reviews", content_id=content_id),
+    )
 
-    # Применяем пагинацию
-    logger.info("Applying pagination")
-    reviews = reviews_query.offset(skip).limit(limit).all()
+    # ETag из версий отзывов страницы и их авторов: при совпадении
+    # If-None-Match схемы ответа не собираются
+    etag = make_etag(
+        "reviews",
+        [(review.id, review.updated, review.user.updated) for review in reviews],
+        total_count,
+    )
+    cached = conditional_response(request, response, etag, reviews_cache_control())
+    if cached is not None:
+        logger.info("Reviews not modified")
+        return cached
 
     # Формируем ответ
     logger.info("Forming response")
@@ -168,14 +200,17 @@ def get_user_reviews(
     limit: int = Query(
         default=10, ge=1, le=100, description="Number of reviews to return"
     ),
-    db: Session = Depends(get_db),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Как считать total_count: exact, estimate, none"
+    ),
+    db: Session = Depends(get_read_db),
 ):
     """
     Получение всех отзывов конкретного пользователя
     """
     # Проверяем существование пользователя
     logger.info("Checking if user exists")
-    user = db.query(User).filter(User.username == username).first()
+    user = resolve_user(db, username)
     if not user:
         logger.warning("User not found")
         raise HTTPException(status_code=404, detail="User not found")
@@ -189,13 +224,16 @@ def get_user_reviews(
         .order_by(Review.created.desc())
     )
 
-    # Подсчитываем общее количество
-    logger.info("Counting total count")
-    total_count = reviews_query.count()
-
-    # Применяем пагинацию
-    logger.info("Applying pagination")
-    reviews = reviews_query.offset(skip).limit(limit).all()
+    # Применяем пагинацию и подсчитываем общее количество
+    logger.info("Applying pagination and counting total count")
+    reviews, total_count = paginate_with_total(
+        db,
+        reviews_query,
+        skip,
+        limit,
+        count,
+        count_key("user_reviews", user_id=user.id),
+    )
 
     # Формируем ответ
     logger.info("Forming response")
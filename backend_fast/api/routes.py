@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional
 
-from models import get_db, Route, Content, Tags
+from models import get_db, get_read_db, Route, Content, Tags
+from utils.catalog import catalog, session_tags
+from utils.http_cache import conditional_response, make_etag, route_cache_control
+from utils.counting import CountMode, count_cache, count_key, paginate_with_total
+from utils.tag_counts import ROUTE_COUNT, apply_tag_change, tagged_in
 from schemas import (
     RouteSchema,
     RouteListSchema,
@@ -13,6 +17,13 @@ from schemas import (
 
 router = APIRouter(prefix="/api/v1", tags=["routes"])
 
+# Коллекции маршрута в ответе: по одному запросу на коллекцию, а не на маршрут
+ROUTE_COLLECTIONS = (
+    selectinload(Route.tags),
+    selectinload(Route.places),
+    selectinload(Route.photos),
+)
+
 
 @router.get("/routes", response_model=RouteListResponseSchema)
 def get_routes(
@@ -20,13 +31,14 @@ def get_routes(
     limit: int = Query(20, ge=1, le=100, description="Максимальное количество записей"),
     city: Optional[str] = Query(None, description="Фильтр по городу"),
     tag_id: Optional[int] = Query(None, description="Фильтр по тегу"),
-    db: Session = Depends(get_db),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Как считать total_count: exact, estimate, none"
+    ),
+    db: Session = Depends(get_read_db),
 ):
     """Получить список маршрутов с пагинацией и фильтрами"""
 
-    query = db.query(Route).options(
-        joinedload(Route.tags), joinedload(Route.places), joinedload(Route.photos)
-    )
+    query = db.query(Route)
 
     # Применяем фильтры
     if city:
@@ -35,11 +47,20 @@ def get_routes(
     if tag_id:
         query = query.join(Route.tags).filter(Tags.id == tag_id)
 
-    # Получаем общее количество
-    total_count = query.count()
-
-    # Применяем пагинацию и сортировку
-    routes = query.order_by(Route.created.desc()).offset(skip).limit(limit).all()
+    # Применяем пагинацию и сортировку, total_count — по стратегии count.
+    # Коллекции догружаются отдельными запросами по ID страницы
+    # (selectinload): joinedload трёх коллекций перемножал бы места,
+    # теги и фото в строках ответа базы
+    routes, total_count = paginate_with_total(
+        db,
+        query.options(*ROUTE_COLLECTIONS).order_by(
+            Route.created.desc(), Route.id.desc()
+        ),
+        skip,
+        limit,
+        count,
+        count_key("routes", city=city, tag_id=tag_id),
+    )
 
     # Форматируем данные для ответа
     route_list = []
@@ -63,24 +84,44 @@ def get_routes(
 
 
 @router.get("/routes/{route_id}", response_model=RouteSchema)
-def get_route(route_id: int, db: Session = Depends(get_db)):
+def get_route(
+    route_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
     """Получить детальную информацию о маршруте"""
 
     route = (
-        db.query(Route)
-        .options(
-            joinedload(Route.tags), joinedload(Route.places), joinedload(Route.photos)
-        )
-        .filter(Route.id == route_id)
-        .first()
+        db.query(Route).options(*ROUTE_COLLECTIONS).filter(Route.id == route_id).first()
     )
 
     if not route:
         raise HTTPException(status_code=404, detail="Маршрут не найден")
 
+    etag = make_etag(
+        "route",
+        route.id,
+        route.updated,
+        [(place.id, place.updated) for place in route.places],
+        sorted((tag.id, tag.updated) for tag in route.tags),
+        sorted((photo.id, photo.updated) for photo in route.photos),
+    )
+    cached = conditional_response(request, response, etag, route_cache_control())
+    if cached is not None:
+        return cached
+
     return route
 
 
+def route_tags(db: Session, tag_ids: list[int]) -> list[Tags]:
+    """Теги маршрута по ID из справочника; 400, если какого-то нет"""
+    catalog_tags = catalog.get(db).tags(tag_ids)
+    if catalog_tags is None or len(set(tag_ids)) != len(tag_ids):
+        raise HTTPException(status_code=400, detail="Некоторые теги не найдены")
+    return session_tags(db, catalog_tags)
+
+
 @router.post("/routes", response_model=RouteSchema)
 def create_route(route_data: RouteCreateSchema, db: Session = Depends(get_db)):
     """Создать новый маршрут"""
@@ -90,10 +131,8 @@ def create_route(route_data: RouteCreateSchema, db: Session = Depends(get_db)):
     if len(places) != len(route_data.places):
         raise HTTPException(status_code=400, detail="Некоторые места не найдены")
 
-    # Проверяем существование тегов
-    tags = db.query(Tags).filter(Tags.id.in_(route_data.tags)).all()
-    if len(tags) != len(route_data.tags):
-        raise HTTPException(status_code=400, detail="Некоторые теги не найдены")
+    # Проверяем существование тегов (по справочнику в памяти)
+    tags = route_tags(db, route_data.tags)
 
     # Создаем маршрут
     route = Route(
@@ -110,7 +149,11 @@ def create_route(route_data: RouteCreateSchema, db: Session = Depends(get_db)):
     route.tags = tags
 
     db.add(route)
+    apply_tag_change(
+        db, None, tagged_in(route.city, route_data.tags), column=ROUTE_COUNT
+    )
     db.commit()
+    count_cache.invalidate("routes")
     db.refresh(route)
 
     return route
@@ -126,6 +169,8 @@ def update_route(
     if not route:
         raise HTTPException(status_code=404, detail="Маршрут не найден")
 
+    before = tagged_in(route.city, (tag.id for tag in route.tags))
+
     # Обновляем поля
     for field, value in route_data.model_dump(exclude_unset=True).items():
         if field == "places" and value is not None:
@@ -136,14 +181,18 @@ def update_route(
                 )
             route.places = places
         elif field == "tags" and value is not None:
-            tags = db.query(Tags).filter(Tags.id.in_(value)).all()
-            if len(tags) != len(value):
-                raise HTTPException(status_code=400, detail="Некоторые теги не найдены")
-            route.tags = tags
+            route.tags = route_tags(db, value)
         else:
             setattr(route, field, value)
 
+    apply_tag_change(
+        db,
+        before,
+        tagged_in(route.city, (tag.id for tag in route.tags)),
+        column=ROUTE_COUNT,
+    )
     db.commit()
+    count_cache.invalidate("routes")
     db.refresh(route)
 
     return route
@@ -157,7 +206,10 @@ def delete_route(route_id: int, db: Session = Depends(get_db)):
     if not route:
         raise HTTPException(status_code=404, detail="Маршрут не найден")
 
+    tagged = tagged_in(route.city, (tag.id for tag in route.tags))
     db.delete(route)
+    apply_tag_change(db, tagged, None, column=ROUTE_COUNT)
     db.commit()
+    count_cache.invalidate("routes")
 
     return {"message": "Маршрут успешно удален"}
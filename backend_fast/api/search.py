@@ -1,9 +1,23 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func, case
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, and_, func, case, literal
 from typing import Optional, List
 from datetime import date
-from models import get_db, Content, Tags, User
+from models import get_db, Content, Tags
+from utils.async_db import async_session_endpoint, off_loop
+from utils.fast_json import (
+    CONTENT_COLUMNS,
+    content_dicts,
+    content_dicts_by_ids,
+    fast_json_enabled,
+    fast_json_response,
+)
+from utils.pagination import (
+    SortKey,
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+    paginate_keyset,
+)
 from schemas import (
     ContentSchema,
     EventType,
@@ -12,7 +26,21 @@ from schemas import (
     PopularTagsResponseSchema,
     PopularTagSchema,
 )
-from loguru import logger
+from utils.full_text import (
+    full_text_enabled,
+    full_text_filter,
+    full_text_rank,
+    prefix_tsquery,
+    search_words,
+)
+from utils.counting import CountMode, count_key, count_total
+from utils.identity import resolve_user
+from utils.logs import logger
+from utils.search_cache import SearchPage, search_cache_key, search_result_cache
+from utils.search_index import search_index, tokenize
+from utils.suggestions import suggestion_index
+from utils.tag_counts import popular_tags
+from settings import settings
 
 router_search = APIRouter(prefix="/api/v1", tags=["search"])
 
@@ -45,15 +73,15 @@ def build_text_search_filter(search_query: str):
     return and_(*word_conditions)
 
 
-def build_relevance_order(search_query: str):
+def build_relevance_score(search_query: str):
     """
-    Создает сортировку по релевантности на основе поискового запроса
+    Создает выражение релевантности на основе поискового запроса
     """
     logger.info("Splitting search query into words and cleaning them")
     words = [word.strip().lower() for word in search_query.split() if word.strip()]
 
     if not words:
-        return Content.date_start.asc().nullslast()
+        return None
 
     # Считаем релевантность:
     # - Совпадение в названии = 10 баллов за слово
@@ -74,12 +102,117 @@ def build_relevance_order(search_query: str):
             (func.lower(Content.location).like(word_pattern), 5), else_=0
         )
 
-    # Сортируем по релевантности (убывание), потом по дате (возрастание)
-    logger.info("Sorting by relevance score and date")
-    return [relevance_score.desc(), Content.date_start.asc().nullslast()]
+    return relevance_score
+
+
+def build_text_search(db, search_query: str):
+    """
+    Фильтр и выражение релевантности для текстового запроса: полнотекстовый
+    поиск по search_vector на Postgres, LIKE по словам на SQLite
+    """
+    if not full_text_enabled(db):
+        return (
+            build_text_search_filter(search_query),
+            build_relevance_score(search_query),
+        )
+
+    words = search_words(search_query)
+    if not words:
+        logger.info("No words found in search query")
+        return None, None
+    logger.info("Building full text search query for words: {}", words)
+    tsquery = prefix_tsquery(words)
+    return full_text_filter(tsquery), full_text_rank(tsquery)
+
+
+def index_search_response(
+    db,
+    q,
+    filter_city,
+    event_type,
+    date_from,
+    date_to,
+    tags,
+    skip,
+    limit,
+    cursor,
+    count,
+    fast,
+    search_params,
+):
+    """
+    /search по индексу в памяти: ID страницы берутся из индекса,
+    строки контента — одним запросом по ID. Курсор того же формата,
+    что и у поиска в базе.
+    """
+    words = tokenize(q)
+    keys = [SortKey(Content.date_start), SortKey(Content.id)]
+    if words:
+        keys.insert(0, SortKey(literal(0)))
+    after = decode_keyset_cursor(cursor, keys) if cursor else None
+
+    logger.info("Searching in memory index")
+    found, total_count, has_more = off_loop(
+        search_index.search,
+        q,
+        city=filter_city,
+        event_type=event_type.value if event_type else None,
+        date_from=date_from,
+        date_to=date_to,
+        tags=tags,
+        skip=skip,
+        limit=limit,
+        after=after,
+    )
+    next_cursor = None
+    if has_more:
+        content_id, relevance, date_start = found[-1]
+        next_cursor = encode_keyset_cursor(
+            [relevance, date_start, content_id] if words else [date_start, content_id]
+        )
+    # индекс считает точно и бесплатно
+    if count is CountMode.NONE:
+        total_count = None
+
+    page = SearchPage(
+        [content_id for content_id, _, _ in found], total_count, has_more, next_cursor
+    )
+    return search_page_response(db, page, skip, limit, fast, search_params)
+
+
+def search_page_response(db, page, skip, limit, fast, search_params):
+    """Ответ /search по странице из ID (индекс в памяти или кэш)"""
+    content_ids = page.content_ids
+    if fast:
+        contents = content_dicts_by_ids(db, content_ids)
+    else:
+        by_id = {
+            content.id: content
+            for content in db.query(Content)
+            .options(selectinload(Content.tags))
+            .filter(Content.id.in_(content_ids))
+        }
+        contents = [
+            ContentSchema.model_validate(by_id[content_id])
+            for content_id in content_ids
+            if content_id in by_id
+        ]
+    payload = {
+        "contents": contents,
+        "total_count": page.total_count,
+        "skip": skip,
+        "limit": limit,
+        "has_more": page.has_more,
+        "next_cursor": page.next_cursor,
+        "search_params": search_params,
+    }
+    if fast:
+        return fast_json_response(payload)
+    return SearchResponseSchema(**payload)
 
 
 @router_search.get("/search", response_model=SearchResponseSchema)
+@async_session_endpoint
 def search_content(
     q: Optional[str] = Query(None, description="Поисковый запрос"),
     city: Optional[str] = Query(None, description="Город"),
@@ -89,6 +222,15 @@ def search_content(
     tags: Optional[List[int]] = Query(None, description="ID тегов"),
     skip: int = Query(0, ge=0, description="Пропустить записей"),
     limit: int = Query(20, ge=1, le=100, description="Количество записей"),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (вместо skip)"
+    ),
+    with_total: bool = Query(
+        True, description="Считать total_count (False — как count=none)"
+    ),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Как считать total_count: exact, estimate, none"
+    ),
     username: Optional[str] = Query(
         None, description="Имя пользователя для фильтрации по городу"
     ),
@@ -97,11 +239,15 @@ def search_content(
     """
     Поиск контента по различным критериям:
     - q: поиск по отдельным словам в названии, описании и локации
+      (на Postgres — полнотекстовый, со стеммингом и поиском по префиксу)
     - city: фильтр по городу
     - event_type: фильтр по типу мероприятия (online/offline)
     - date_from/date_to: фильтр по датам
     - tags: фильтр по тегам
-    - skip/limit: пагинация
+    - skip/limit: пагинация; cursor — следующая страница по ключу сортировки
+      (курсор отдаётся в next_cursor)
+    - with_total: считать ли total_count
+    - count: как считать total_count (utils.counting)
     - username: для фильтрации по городу пользователя
 
     Поиск работает по принципу "И" между словами:
@@ -112,38 +258,87 @@ def search_content(
     filter_city = city
 
     if username:
-        logger.info(f"Getting user city for username: {username}")
-        user = db.query(User).filter(User.username == username).first()
+        logger.info("Getting user city for username: {}", username)
+        user = resolve_user(db, username)
         if user:
             filter_city = user.city
-            logger.info(f"User {username} city: {filter_city}")
+            logger.info("User {} city: {}", username, filter_city)
         else:
-            logger.warning(f"User {username} not found")
+            logger.warning("User {} not found", username)
+
+    search_params = {
+        "q": q,
+        "city": city,
+        "event_type": event_type,
+        "date_from": date_from,
+        "date_to": date_to,
+        "tags": tags,
+    }
+    fast = fast_json_enabled()
+    if not with_total:
+        count = CountMode.NONE
+
+    # Индекс в памяти (запрос только из знаков препинания — в базу)
+    if (
+        settings.SEARCH_INDEX_ENABLED
+        and (not (q and q.strip()) or tokenize(q))
+        and search_index.usable(db)
+    ):
+        return index_search_response(
+            db,
+            q,
+            filter_city,
+            event_type,
+            date_from,
+            date_to,
+            tags,
+            skip,
+            limit,
+            cursor,
+            count,
+            fast,
+            search_params,
+        )
+
+    # Кэш страниц (страницы по курсору не кэшируются)
+    cache_key = None
+    if not cursor:
+        cache_key = search_cache_key(
+            q, filter_city, event_type, date_from, date_to, tags, skip, limit, count
+        )
+        page, cache_version = search_result_cache.lookup(db, cache_key, filter_city)
+        if page is not None:
+            logger.info("Search result cache hit")
+            return search_page_response(db, page, skip, limit, fast, search_params)
 
     # Базовый запрос
     logger.info("Building base query")
-    query = db.query(Content)
+    if fast:
+        query = db.query(*CONTENT_COLUMNS)
+    else:
+        query = db.query(Content).options(selectinload(Content.tags))
 
-    # Поиск по тексту (улучшенный поиск по словам)
+    # Поиск по тексту (полнотекстовый на Postgres, по словам на SQLite)
     logger.info("Building text search filter")
+    text_filter = relevance_score = None
     if q and q.strip():
-        text_filter = build_text_search_filter(q.strip())
+        text_filter, relevance_score = build_text_search(db, q.strip())
         if text_filter is not None:
             query = query.filter(text_filter)
 
     # Фильтр по городу (явно указанный или город пользователя)
     if filter_city:
-        logger.info(f"Filtering by city: {filter_city}")
+        logger.info("Filtering by city: {}", filter_city)
         query = query.filter(Content.city == filter_city)
 
     # Фильтр по типу мероприятия
     if event_type:
-        logger.info(f"Filtering by event type: {event_type}")
+        logger.info("Filtering by event type: {}", event_type)
         query = query.filter(Content.event_type == event_type.value)
 
     # Фильтр по датам
     if date_from:
-        logger.info(f"Filtering by date from: {date_from}")
+        logger.info("Filtering by date from: {}", date_from)
         query = query.filter(
             or_(
                 Content.date_start >= date_from,
@@ -152,7 +347,7 @@ def search_content(
         )
 
     if date_to:
-        logger.info(f"Filtering by date to: {date_to}")
+        logger.info("Filtering by date to: {}", date_to)
         query = query.filter(
             or_(
                 Content.date_start <= date_to,
@@ -163,42 +358,77 @@ def search_content(
 
     # Фильтр по тегам
     if tags:
-        logger.info(f"Filtering by tags: {tags}")
-        query = query.join(Content.tags).filter(Tags.id.in_(tags))
+        logger.info("Filtering by tags: {}", tags)
+        query = query.filter(Content.tags.any(Tags.id.in_(tags)))
 
-    # Сортировка по релевантности и дате
-    if q and q.strip():
+    # Подсчет общего количества
+    logger.info("Counting total count")
+    total_count = count_total(
+        db,
+        query,
+        count,
+        count_key(
+            "search",
+            q=" ".join((q or "").lower().split()),
+            city=filter_city,
+            event_type=event_type,
+            date_from=date_from,
+            date_to=date_to,
+            tags=tags,
+        ),
+    )
+
+    # Сортировка по релевантности и дате, id — для однозначного порядка
+    keys = [SortKey(Content.date_start, nulls_last=True), SortKey(Content.id)]
+    if relevance_score is not None:
         # При поиске сортируем по релевантности
         logger.info("Sorting by relevance score and date")
-        order_clauses = build_relevance_order(q.strip())
-        query = query.order_by(*order_clauses)
+        keys.insert(0, SortKey(relevance_score, descending=True))
+        query = query.add_columns(relevance_score.label("relevance"))
     else:
         # Без поиска сортируем по дате
         logger.info("Sorting by date")
-        query = query.order_by(Content.date_start.asc().nullslast())
 
-    # Подсчет общего количества
-    logger.info("Counting total count")
-    total_count = query.count()
+    def key_values(row):
+        if relevance_score is None:
+            return [row.date_start, row.id]
+        content = row if fast else row.Content
+        return [row.relevance, content.date_start, content.id]
 
-    # Применяем пагинацию
-    logger.info("Applying pagination")
-    contents = query.offset(skip).limit(limit).all()
+    rows, next_cursor = paginate_keyset(
+        query, keys, limit, cursor, key_values, skip=skip
+    )
+    if relevance_score is not None and not fast:
+        rows = [row.Content for row in rows]
+    if cache_key is not None:
+        search_result_cache.store(
+            db,
+            cache_key,
+            cache_version,
+            SearchPage(
+                [row.id for row in rows],
+                total_count,
+                next_cursor is not None,
+                next_cursor,
+            ),
+        )
+
+    if fast:
+        logger.info("Returning fast search response")
+        return fast_json_response(
+            {
+                "contents": content_dicts(db, rows),
+                "total_count": total_count,
+                "skip": skip,
+                "limit": limit,
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor,
+                "search_params": search_params,
+            }
+        )
 
     # Преобразуем в схемы
-    content_schemas = []
-    for content in contents:
-        # Получаем макрокатегорию для контента
-        logger.info("Getting macro category for content")
-        macro_category = None
-        if content.tags:
-            first_tag = content.tags[0]
-            if first_tag.macro_category:
-                macro_category = first_tag.macro_category.name
-
-        content_schema = ContentSchema.model_validate(content)
-        content_schema.macro_category = macro_category
-        content_schemas.append(content_schema)
+    content_schemas = [ContentSchema.model_validate(content) for content in rows]
 
     logger.info("Returning search response")
     return SearchResponseSchema(
@@ -206,19 +436,14 @@ def search_content(
         total_count=total_count,
         skip=skip,
         limit=limit,
-        has_more=(skip + limit) < total_count,
-        search_params={
-            "q": q,
-            "city": city,
-            "event_type": event_type,
-            "date_from": date_from,
-            "date_to": date_to,
-            "tags": tags,
-        },
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
+        search_params=search_params,
     )
 
 
 @router_search.get("/search/suggestions", response_model=SearchSuggestionsSchema)
+@async_session_endpoint
 def get_search_suggestions(
     q: str = Query(
         ..., min_length=2, description="Поисковый запрос (минимум 2 символа)"
@@ -231,19 +456,27 @@ def get_search_suggestions(
 ):
     """
     Получить подсказки для поиска на основе названий мероприятий
-    с учетом города пользователя (если передан username)
+    с учетом города пользователя (если передан username).
+    С SUGGESTIONS_INDEX_ENABLED — из индекса в памяти: названия, места,
+    теги и организации по префиксу слова, популярные первыми.
     """
 
     filter_city = None
 
     if username:
-        logger.info(f"Getting user city for username: {username}")
-        user = db.query(User).filter(User.username == username).first()
+        logger.info("Getting user city for username: {}", username)
+        user = resolve_user(db, username)
         if user:
             filter_city = user.city
-            logger.info(f"User {username} city: {filter_city}")
+            logger.info("User {} city: {}", username, filter_city)
         else:
-            logger.warning(f"User {username} not found")
+            logger.warning("User {} not found", username)
+
+    if settings.SUGGESTIONS_INDEX_ENABLED and suggestion_index.usable(db):
+        logger.info("Getting suggestions from memory index")
+        return SearchSuggestionsSchema(
+            suggestions=suggestion_index.suggest(q, filter_city, limit), query=q
+        )
 
     # Берем последнее слово для подсказок (как в Google)
     logger.info("Getting last word for suggestions")
@@ -263,7 +496,7 @@ def get_search_suggestions(
 
     # Фильтруем по городу пользователя, если он определен
     if filter_city:
-        logger.info(f"Filtering suggestions by city: {filter_city}")
+        logger.info("Filtering suggestions by city: {}", filter_city)
         suggestions_query = suggestions_query.filter(Content.city == filter_city)
 
     suggestions = suggestions_query.distinct().limit(limit).all()
@@ -274,28 +507,21 @@ def get_search_suggestions(
 
 
 @router_search.get("/search/popular-tags", response_model=PopularTagsResponseSchema)
+@async_session_endpoint
 def get_popular_search_tags(
     limit: int = Query(10, ge=1, le=50, description="Количество популярных тегов"),
     db: Session = Depends(get_db),
 ):
     """
-    Получить популярные теги для поиска (по количеству связанного контента)
+    Получить популярные теги для поиска (по количеству связанного контента).
+    Числа берутся из счётчиков тегов по городам (utils.tag_counts).
     """
     logger.info("Getting popular search tags")
-    popular_tags = (
-        db.query(Tags, func.count(Content.id).label("content_count"))
-        .join(Tags.contents)
-        .group_by(Tags.id)
-        .order_by(func.count(Content.id).desc())
-        .limit(limit)
-        .all()
-    )
-
     popular_tags_list = [
         PopularTagSchema(
             id=tag.id, name=tag.name, description=tag.description, content_count=count
         )
-        for tag, count in popular_tags
+        for tag, count in popular_tags(db, limit)
     ]
 
     return PopularTagsResponseSchema(popular_tags=popular_tags_list)
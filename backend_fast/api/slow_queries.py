@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+
+from utils.admin import require_admin
+from utils.logs import logger
+from utils.slow_queries import slow_query_recorder
+
+router_slow_queries = APIRouter(
+    prefix="/api/v1/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
+
+
+@router_slow_queries.get("/slow-queries", response_model=list[dict])
+def get_slow_queries():
+    """
+    Медленные SQL-запросы этого процесса, новые первыми: время, параметры,
+    маршрут и (на Postgres) план EXPLAIN
+    """
+    logger.info("Query to get slow queries")
+    return slow_query_recorder.entries()
+
+
+@router_slow_queries.delete("/slow-queries")
+def clear_slow_queries():
+    """Очистить буфер медленных запросов"""
+    logger.info("Clearing slow queries")
+    slow_query_recorder.clear()
+    return {"message": "Slow queries cleared"}
@@ -2,21 +2,22 @@ from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
+    Request,
+    Response,
 )
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func, case
-from sqlalchemy import and_
+from sqlalchemy import and_, select, union
 from datetime import date
 from typing import Optional
 
 from models import (
-    User,
     Content,
+    ContentTags,
     Tags,
     Like,
     RemovedFavorite,
     UserCategoryPreference,
-    MacroCategory,
     get_db,
 )
 from schemas import (
@@ -26,28 +27,19 @@ from schemas import (
     TagWithDetailsSchema,
     MacroCategoryInTagsResponseSchema,
 )
-from loguru import logger
+from settings import settings
+from utils.async_db import async_session_endpoint
+from utils.catalog import catalog, catalog_cache_control
+from utils.content_tags import content_tag_map
+from utils.exclusions import exclusion_cache
+from utils.http_cache import etag_matches, not_modified, set_cache_headers
+from utils.identity import UserIdentity, get_current_user_async
+from utils.logs import logger
+from utils.tag_counts import city_tag_count_cache, city_tag_counts
 
 router_tags = APIRouter(prefix="/api/v1", tags=["tags"])
 
 
-def create_date_filter(date_start: Optional[date], date_end: Optional[date]):
-    """
-    Create date filters for content queries
-    """
-    q_filter = []
-
-    if date_start and date_end:
-        q_filter.append(Content.date_start <= date_end)
-        q_filter.append(Content.date_end >= date_start)
-    elif date_start:
-        q_filter.append(Content.date_start == date_start)
-    elif date_end:
-        q_filter.append(Content.date_end <= date_end)
-
-    return q_filter
-
-
 def create_date_condition(date_start: Optional[date], date_end: Optional[date]):
     """
     Create date condition for case statements
@@ -62,29 +54,18 @@ def create_date_condition(date_start: Optional[date], date_end: Optional[date]):
         return True  # No date filter
 
 
-@router_tags.get("/tags", response_model=TagsResponseSchema)
-def get_tags(
-    username: str,
-    macro_category: str,
-    date_start: Optional[date] = None,
-    date_end: Optional[date] = None,
-    db: Session = Depends(get_db),
+def tags_with_dated_counts(
+    db: Session,
+    user: UserIdentity,
+    macro_category_id: int,
+    date_start: Optional[date],
+    date_end: Optional[date],
 ):
-    user = db.query(User).filter(User.username == username).first()
-
-    if not user:
-        logger.warning(f"User {username} not found")
-        raise HTTPException(status_code=404, detail="User not found")
-
-    logger.info(f"Getting macro category {macro_category} for user {user.username}")
-    macro_category_obj = (
-        db.query(MacroCategory).filter(MacroCategory.name == macro_category).first()
-    )
-
-    if not macro_category_obj:
-        logger.warning(f"Macro category {macro_category} not found")
-        return TagsResponseSchema(tags=[], preferences=[])
-
+    """
+    Теги макрокатегории с числом контента города в диапазоне дат
+    за вычетом лайкнутого и удалённого пользователем. Счётчики тегов
+    по городам дат не знают, поэтому считается по связям.
+    """
     logger.info("Getting liked and removed content for user")
     liked_content_ids = (
         db.query(Like.content_id).filter(Like.user_id == user.id).subquery()
@@ -130,12 +111,74 @@ def get_tags(
             ).label("content_count"),
         )
         .outerjoin(Tags.contents)
-        .filter(Tags.macro_category_id == macro_category_obj.id)
+        .filter(Tags.macro_category_id == macro_category_id)
         .filter(Content.city == user.city)
         .group_by(Tags.id, Tags.name, Tags.description)
     )
 
-    tags = tags_query.all()
+    return tags_query.all()
+
+
+def excluded_tag_counts(user: UserIdentity):
+    """Подзапрос (tag_id, count): лайкнутый и удалённый контент города по тегам"""
+    excluded_ids = union(
+        select(Like.content_id).where(Like.user_id == user.id),
+        select(RemovedFavorite.content_id).where(RemovedFavorite.user_id == user.id),
+    ).subquery()
+    return (
+        select(ContentTags.tags_id.label("tag_id"), func.count().label("count"))
+        .join(excluded_ids, excluded_ids.c.content_id == ContentTags.content_id)
+        .join(Content, Content.id == ContentTags.content_id)
+        .where(Content.city == user.city)
+        .group_by(ContentTags.tags_id)
+        .subquery()
+    )
+
+
+def tags_with_city_counts(db: Session, user: UserIdentity, macro_category_id: int):
+    """
+    Теги макрокатегории с числом контента города из счётчиков тегов
+    за вычетом лайкнутого и удалённого пользователем. С картой тегов
+    контента в памяти из закэшированных чисел города вычитаются
+    закэшированные исключения пользователя — O(исключений); без неё
+    вычитает подзапрос.
+    """
+    if not (settings.CONTENT_TAGS_INDEX_ENABLED and content_tag_map.usable(db)):
+        return city_tag_counts(
+            db, user.city, macro_category_id, excluded_tag_counts(user)
+        )
+
+    city_counts = city_tag_count_cache.get(db, user.city, macro_category_id)
+    exclusions = exclusion_cache.get(db, user.id)
+    excluded = content_tag_map.count_tags(exclusions.ids, user.city)
+    return [
+        tag._replace(content_count=tag.content_count - excluded[tag.id])
+        for tag in city_counts
+    ]
+
+
+@router_tags.get("/tags", response_model=TagsResponseSchema)
+@async_session_endpoint
+def get_tags(
+    macro_category: str,
+    date_start: Optional[date] = None,
+    date_end: Optional[date] = None,
+    user: UserIdentity = Depends(get_current_user_async),
+    db: Session = Depends(get_db),
+):
+    logger.info("Getting macro category {} for user {}", macro_category, user.username)
+    macro_category_obj = catalog.get(db).macro_category_by_name(macro_category)
+
+    if not macro_category_obj:
+        logger.warning("Macro category {} not found", macro_category)
+        return TagsResponseSchema(tags=[], preferences=[])
+
+    if date_start or date_end:
+        tags = tags_with_dated_counts(
+            db, user, macro_category_obj.id, date_start, date_end
+        )
+    else:
+        tags = tags_with_city_counts(db, user, macro_category_obj.id)
 
     logger.info("Getting preferences for user")
     preferences = (
@@ -163,31 +206,32 @@ def get_tags(
     "/tags/by-macro-category/{macro_category_name}",
     response_model=TagsByMacroCategoryResponseSchema,
 )
-def get_tags_by_macro_category(macro_category_name: str, db: Session = Depends(get_db)):
+@async_session_endpoint
+def get_tags_by_macro_category(
+    macro_category_name: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
     """
     Получить все теги, связанные с конкретной макрокатегорией
 
     - **macro_category_name**: название макрокатегории (например, "events")
     """
-    # Ищем макрокатегорию по имени
-    macro_category_obj = (
-        db.query(MacroCategory)
-        .filter(MacroCategory.name == macro_category_name)
-        .first()
-    )
+    # Макрокатегория и её теги (по имени) — из справочника в памяти
+    snapshot = catalog.get(db)
+    macro_category_obj = snapshot.macro_category_by_name(macro_category_name)
 
     if not macro_category_obj:
         raise HTTPException(
             status_code=404, detail=f"Macro category '{macro_category_name}' not found"
         )
 
-    # Получаем все теги, связанные с этой макрокатегорией
-    tags = (
-        db.query(Tags)
-        .filter(Tags.macro_category_id == macro_category_obj.id)
-        .order_by(Tags.name.asc())
-        .all()
-    )
+    if etag_matches(request, snapshot.etag):
+        return not_modified(snapshot.etag, catalog_cache_control())
+    set_cache_headers(response, snapshot.etag, catalog_cache_control())
+
+    tags = snapshot.tags_by_macro_category.get(macro_category_obj.id, [])
 
     # Формируем ответ
     return TagsByMacroCategoryResponseSchema(
@@ -12,32 +12,29 @@ from models import (
 from schemas import (
     UserSchema,
 )
-from loguru import logger
+from utils.catalog import CITY_CODES
+from utils.identity import bump_users_version, identity_cache, resolve_user
+from utils.replicas import read_your_writes
+from utils.logs import logger
 
 router_users = APIRouter(prefix="/api/v1", tags=["users"])
 
-CITY_CHOICES = [
-    ("spb", "Санкт-Петербург"),
-    ("msk", "Москва"),
-    ("ekb", "Екатеринбург"),
-    ("nsk", "Новосибирск"),
-    ("nn", "Нижний Новгород"),
-]
-
 
 @router_users.post("/register", status_code=201)
 def register_user(user_data: UserSchema, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = resolve_user(db, user_data.username)
     if existing_user:
-        logger.warning(f"User {user_data.username} already exists")
+        logger.warning("User {} already exists", user_data.username)
         raise HTTPException(status_code=400, detail="Пользователь уже существует")
 
     new_user = User(username=user_data.username, city=user_data.city)
     db.add(new_user)
     db.commit()
+    read_your_writes.mark(user_data.username)
     db.refresh(new_user)
+    identity_cache.invalidate(user_data.username)
 
-    logger.info(f"User {user_data.username} registered successfully")
+    logger.info("User {} registered successfully", user_data.username)
     return {"message": "Пользователь успешно зарегистрирован", "user_id": new_user.id}
 
 
@@ -49,16 +46,21 @@ def change_city(
     user = db.query(User).filter(User.username == request_data.username).first()
 
     if not user:
-        logger.warning(f"User {request_data.username} not found")
+        logger.warning("User {} not found", request_data.username)
         raise HTTPException(status_code=404, detail="User not found")
 
-    if request_data.city not in [item[0] for item in CITY_CHOICES]:
-        logger.warning(f"Invalid city {request_data.city}")
+    if request_data.city not in CITY_CODES:
+        logger.warning("Invalid city {}", request_data.city)
         raise HTTPException(status_code=400, detail="Invalid city")
 
     user.city = request_data.city
+    bump_users_version(db)
     db.commit()
-    logger.info(f"City for user {request_data.username} changed to {request_data.city}")
+    read_your_writes.mark(request_data.username)
+    identity_cache.invalidate(request_data.username)
+    logger.info(
+        "City for user {} changed to {}", request_data.username, request_data.city
+    )
     return {"status": "ok"}
 
 
@@ -67,10 +69,10 @@ def get_user(
     username: str = Query(...),
     db: Session = Depends(get_db),
 ):
-    user = db.query(User).filter(User.username == username).first()
+    user = resolve_user(db, username)
     if not user:
-        logger.warning(f"User {username} not found")
+        logger.warning("User {} not found", username)
         raise HTTPException(status_code=404, detail="User not found")
 
-    logger.info(f"User {username} found")
+    logger.info("User {} found", username)
     return UserSchema(id=user.id, city=user.city, username=user.username)
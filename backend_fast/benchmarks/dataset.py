@@ -0,0 +1,347 @@
+"""
+Генератор синтетических данных production-объёма для бенчмарков.
+
+По умолчанию (--scale 1): 100k мероприятий по всем городам CITY_CHOICES
+с 1–4 тегами у каждого, 50k пользователей, 5M лайков, 200k отзывов,
+1M оценок, маршруты и предпочтения. Популярность контента и активность
+пользователей распределены со скосом, как в жизни: немного хитов и длинный
+хвост. Данные детерминированы сидом.
+
+База должна быть пустой. Для SQLite схема создаётся по моделям, для Postgres —
+миграциями Django.
+
+Запуск из каталога backend_fast:
+    python -m benchmarks.dataset --database-url sqlite:///bench.db --scale 0.1
+"""
+
+import argparse
+import datetime
+import time
+from typing import NamedTuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import create_engine, func, select, text
+
+from utils.catalog import CITY_CHOICES
+from models import (
+    Base,
+    Content,
+    ContentTags,
+    Like,
+    MacroCategory,
+    Rating,
+    Review,
+    Route,
+    RoutePlaces,
+    RouteTags,
+    Tags,
+    User,
+    UserCategoryPreference,
+)
+
+INSERT_CHUNK_SIZE = 10_000
+CITIES = [city for city, _ in CITY_CHOICES]
+
+MACRO_CATEGORIES = {
+    "events": ["Концерты", "Театр", "Стендап", "Фестивали", "Вечеринки", "Лекции"],
+    "places": ["Музеи", "Парки", "Галереи", "Кофейни", "Бары", "Смотровые"],
+    "organisations": ["Кружки", "Спорт", "Курсы", "Клубы", "Волонтёрство"],
+    "trips": ["Экскурсии", "Походы", "Сплавы", "Выезды"],
+    "movies": ["Кино", "Премьеры", "Ретроспективы"],
+}
+NAME_WORDS = [
+    "джаз", "концерт", "выставка", "фестиваль", "лекция", "мастер-класс",
+    "экскурсия", "спектакль", "рок", "классика", "стендап", "квиз",
+    "ярмарка", "кино", "фотография", "архитектура", "история", "вино",
+    "книги", "танцы", "йога", "электроника", "поэзия", "импровизация",
+]  # fmt: skip
+LOCATIONS = [
+    "Центральный парк", "Дом культуры", "Филармония", "Набережная",
+    "Арт-пространство", "Городской музей", "Клуб «Подвал»", "Площадь Ленина",
+]  # fmt: skip
+
+
+class DatasetSizes(NamedTuple):
+    contents: int = 100_000
+    users: int = 50_000
+    likes: int = 5_000_000
+    reviews: int = 200_000
+    ratings: int = 1_000_000
+    routes: int = 1_000
+
+    def scaled(self, scale: float) -> "DatasetSizes":
+        return DatasetSizes(*(max(1, int(size * scale)) for size in self))
+
+
+def skewed_ids(rng, count: int, size: int, exponent: float = 0.8) -> np.ndarray:
+    """ID от 1 до count, где малые ID встречаются чаще (хиты и длинный хвост)"""
+    weights = 1.0 / np.arange(10, count + 10) ** exponent
+    weights /= weights.sum()
+    return rng.choice(np.arange(1, count + 1), size=size, p=weights)
+
+
+def unique_pairs(rng, users: int, contents: int, size: int) -> np.ndarray:
+    """size уникальных пар (user_id, content_id) со скосом по обоим"""
+    size = min(size, users * contents)
+    keys = np.empty(0, dtype=np.int64)
+    while len(keys) < size:
+        batch = int((size - len(keys)) * 1.3) + 100
+        user_ids = skewed_ids(rng, users, batch, exponent=0.5).astype(np.int64)
+        content_ids = skewed_ids(rng, contents, batch).astype(np.int64)
+        keys = np.unique(
+            np.concatenate([keys, user_ids * (contents + 1) + content_ids])
+        )
+    keys = rng.permutation(keys)[:size]
+    return np.stack([keys // (contents + 1), keys % (contents + 1)], axis=1)
+
+
+def insert_rows(conn, table, rows):
+    """Вставка пачками; rows — итератор словарей"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == INSERT_CHUNK_SIZE:
+            conn.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+
+
+def generate(engine, sizes: DatasetSizes = DatasetSizes(), seed: int = 42):
+    """Заполняет пустую базу; возвращает фактические размеры таблиц"""
+    rng = np.random.default_rng(seed)
+    now = datetime.datetime.utcnow()
+    today = now.date()
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(Content.__table__)).scalar():
+            raise RuntimeError("Database is not empty")
+
+        started = time.perf_counter()
+        tag_ids_by_macro = {}
+        tag_id = 0
+        insert_rows(
+            conn,
+            MacroCategory.__table__,
+            (
+                {"id": i, "name": name, "description": name}
+                for i, name in enumerate(MACRO_CATEGORIES, start=1)
+            ),
+        )
+        tag_rows = []
+        for macro_id, (macro, tag_names) in enumerate(MACRO_CATEGORIES.items(), 1):
+            tag_ids_by_macro[macro] = []
+            for name in tag_names:
+                tag_id += 1
+                tag_ids_by_macro[macro].append(tag_id)
+                tag_rows.append(
+                    {
+                        "id": tag_id,
+                        "name": name,
+                        "description": name,
+                        "macro_category_id": macro_id,
+                        "created": now,
+                        "updated": now,
+                    }
+                )
+        insert_rows(conn, Tags.__table__, tag_rows)
+        macros = list(tag_ids_by_macro)
+
+        user_cities = rng.choice(CITIES, size=sizes.users)
+        insert_rows(
+            conn,
+            User.__table__,
+            (
+                {
+                    "id": i,
+                    "username": f"user{i}",
+                    "city": str(user_cities[i - 1]),
+                    "created": now,
+                    "updated": now,
+                }
+                for i in range(1, sizes.users + 1)
+            ),
+        )
+        logger.info("Users: {:.1f}s", time.perf_counter() - started)
+
+        # Мероприятия: город по кругу, даты от месяца назад до полугода вперёд,
+        # у 10% дат нет (места, а не события)
+        content_macros = rng.integers(0, len(macros), size=sizes.contents)
+        starts = rng.integers(-30, 180, size=sizes.contents)
+        lengths = rng.integers(0, 4, size=sizes.contents)
+        undated = rng.random(sizes.contents) < 0.1
+        name_words = rng.integers(0, len(NAME_WORDS), size=(sizes.contents, 3))
+        content_rows = []
+        content_tag_rows = []
+        for i in range(1, sizes.contents + 1):
+            macro = macros[content_macros[i - 1]]
+            words = [NAME_WORDS[w] for w in name_words[i - 1]]
+            date_start = None
+            date_end = None
+            if not undated[i - 1]:
+                date_start = today + datetime.timedelta(days=int(starts[i - 1]))
+                date_end = date_start + datetime.timedelta(days=int(lengths[i - 1]))
+            content_rows.append(
+                {
+                    "id": i,
+                    "name": f"{words[0].capitalize()} {words[1]} #{i}",
+                    "description": " ".join(words * 10),
+                    "image": f"synthetic/{i}.png",
+                    "contact": [{"phone": "+70000000000"}],
+                    "date_start": date_start,
+                    "date_end": date_end,
+                    "location": LOCATIONS[i % len(LOCATIONS)],
+                    "cost": int(rng.integers(0, 5000)),
+                    "city": CITIES[i % len(CITIES)],
+                    "unique_id": f"synthetic_{i}",
+                    "event_type": "online" if i % 10 == 0 else "offline",
+                    "publisher_type": "user",
+                    "publisher_id": 1_000_000,
+                    "macro_category": macro,
+                    "created": now,
+                    "updated": now,
+                }
+            )
+            macro_tags = tag_ids_by_macro[macro]
+            fan_out = int(rng.integers(1, min(4, len(macro_tags)) + 1))
+            for tag in rng.choice(macro_tags, size=fan_out, replace=False):
+                content_tag_rows.append({"content_id": i, "tags_id": int(tag)})
+        insert_rows(conn, Content.__table__, content_rows)
+        insert_rows(conn, ContentTags.__table__, content_tag_rows)
+        del content_rows
+        logger.info("Contents: {:.1f}s", time.perf_counter() - started)
+
+        def pair_rows(pairs, extra):
+            for i, (user_id, content_id) in enumerate(pairs.tolist(), start=1):
+                row = {
+                    "id": i,
+                    "user_id": user_id,
+                    "content_id": content_id,
+                    "created": now,
+                    "updated": now,
+                }
+                row.update(extra(i))
+                yield row
+
+        likes = unique_pairs(rng, sizes.users, sizes.contents, sizes.likes)
+        values = rng.random(len(likes)) < 0.8
+        insert_rows(
+            conn,
+            Like.__table__,
+            pair_rows(likes, lambda i: {"value": bool(values[i - 1])}),
+        )
+        logger.info("Likes: {:.1f}s", time.perf_counter() - started)
+
+        ratings = unique_pairs(rng, sizes.users, sizes.contents, sizes.ratings)
+        scores = rng.choice(
+            [1, 2, 3, 4, 5], size=len(ratings), p=[0.05, 0.1, 0.2, 0.35, 0.3]
+        )
+        insert_rows(
+            conn,
+            Rating.__table__,
+            pair_rows(ratings, lambda i: {"rating": int(scores[i - 1])}),
+        )
+        reviews = unique_pairs(rng, sizes.users, sizes.contents, sizes.reviews)
+        insert_rows(
+            conn,
+            Review.__table__,
+            pair_rows(reviews, lambda i: {"text": f"Отзыв {i}: " + "понравилось " * 8}),
+        )
+        logger.info("Ratings and reviews: {:.1f}s", time.perf_counter() - started)
+
+        preference_rows = []
+        preference_id = 0
+        for user_id in range(1, sizes.users + 1):
+            for tag in rng.choice(tag_id, size=int(rng.integers(0, 6)), replace=False):
+                preference_id += 1
+                preference_rows.append(
+                    {"id": preference_id, "user_id": user_id, "tag_id": int(tag) + 1}
+                )
+        insert_rows(conn, UserCategoryPreference.__table__, preference_rows)
+
+        route_rows = []
+        route_place_rows = []
+        route_tag_rows = []
+        for i in range(1, sizes.routes + 1):
+            city = CITIES[i % len(CITIES)]
+            route_rows.append(
+                {
+                    "id": i,
+                    "name": f"Маршрут {i}",
+                    "description": "Прогулка по городу",
+                    "duration_km": str(int(rng.integers(2, 15))),
+                    "duration_hours": str(int(rng.integers(1, 6))),
+                    "map_link": f"https://maps.example/{i}",
+                    "city": city,
+                    "created": now,
+                    "updated": now,
+                }
+            )
+            # места того же города: ID с тем же остатком по числу городов
+            city_offset = i % len(CITIES)
+            places = rng.choice(
+                max(1, (sizes.contents - city_offset) // len(CITIES)),
+                size=int(rng.integers(3, 9)),
+            )
+            for place in set((places * len(CITIES) + city_offset).tolist()):
+                if 1 <= place <= sizes.contents:
+                    route_place_rows.append({"route_id": i, "content_id": place})
+            for tag in rng.choice(tag_id, size=2, replace=False):
+                route_tag_rows.append({"route_id": i, "tags_id": int(tag) + 1})
+        insert_rows(conn, Route.__table__, route_rows)
+        insert_rows(conn, RoutePlaces.__table__, route_place_rows)
+        insert_rows(conn, RouteTags.__table__, route_tag_rows)
+
+        if engine.dialect.name == "postgresql":
+            # ID заданы явно: последовательности двигаем за максимум
+            for table in (
+                User,
+                Content,
+                Tags,
+                MacroCategory,
+                Like,
+                Rating,
+                Review,
+                UserCategoryPreference,
+                Route,
+            ):
+                name = table.__tablename__
+                conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                        f"(SELECT max(id) FROM {name}))"
+                    )
+                )
+        logger.info("Dataset ready in {:.1f}s", time.perf_counter() - started)
+
+    return table_sizes(engine)
+
+
+def table_sizes(engine) -> dict[str, int]:
+    with engine.connect() as conn:
+        return {
+            table.__tablename__: conn.execute(
+                select(func.count()).select_from(table.__table__)
+            ).scalar()
+            for table in (User, Content, ContentTags, Like, Rating, Review, Route)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    sizes = generate(engine, DatasetSizes().scaled(args.scale), seed=args.seed)
+    for table, count in sizes.items():
+        print(f"{table}: {count:,}")
+
+
+if __name__ == "__main__":
+    main()
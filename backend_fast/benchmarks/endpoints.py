@@ -0,0 +1,252 @@
+"""
+Бенчмарк читающих эндпоинтов на синтетических данных (benchmarks.dataset).
+
+Для каждого эндпоинта — p50/p95/среднее время ответа и медианное число
+SQL-запросов на ответ. Результат пишется в JSON, чтобы сравнивать прогоны
+(например, до и после изменения).
+
+Без --database-url данные генерируются во временную SQLite-базу
+в масштабе --scale; с ним берётся уже заполненная база (например, Postgres).
+
+С --concurrency N запросы к каждому эндпоинту идут по N одновременно
+в одном цикле событий (httpx.AsyncClient поверх приложения): так видно,
+сколько синхронной работы эндпоинты на асинхронном движке делают в цикле
+событий. В этом режиме вместо числа SQL-запросов пишется пропускная
+способность (rps).
+
+Запуск из каталога backend_fast:
+    TEST_MODE=true python -m benchmarks.endpoints --scale 0.05 --output bench.json
+    TEST_MODE=true python -m benchmarks.endpoints --concurrency 16
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.dataset import DatasetSizes, generate, table_sizes
+from fast import app
+from models import (
+    async_database_url,
+    engine_options,
+    get_async_read_db,
+    get_db,
+    get_read_db,
+)
+
+
+class StatementCounter:
+    """Счётчик SQL-запросов всех движков (бенчмарк шлёт запросы по одному)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def endpoint_requests(username: str, tag: str) -> dict[str, tuple[str, dict]]:
+    """Имя в отчёте → (путь, параметры)"""
+    return {
+        "feed": (
+            "/api/v1/contents_feed",
+            {"username": username, "limit": 20, "order": "ranked"},
+        ),
+        "contents": (
+            "/api/v1/contents",
+            {"username": username, "tag": tag, "limit": 20},
+        ),
+        "liked": ("/api/v1/contents/liked", {"username": username, "limit": 20}),
+        "search": ("/api/v1/search", {"q": "джаз концерт", "username": username}),
+        "suggestions": (
+            "/api/v1/search/suggestions",
+            {"q": "джа", "username": username},
+        ),
+        "tags": ("/api/v1/tags", {"macro_category": "events", "username": username}),
+        "rating_stats": ("/api/v1/ratings/stats/1", {}),
+        "routes": ("/api/v1/routes", {"city": "nn", "limit": 20}),
+    }
+
+
+def measure(client, counter, path: str, params: dict, repeat: int) -> dict:
+    client.get(path, params=params)  # прогрев кэшей процесса
+    timings = []
+    statements = []
+    status = None
+    for _ in range(repeat):
+        before = counter.count
+        started = time.perf_counter()
+        response = client.get(path, params=params)
+        timings.append((time.perf_counter() - started) * 1000)
+        statements.append(counter.count - before)
+        status = response.status_code
+    return {
+        "status": status,
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms": round(float(np.percentile(timings, 95)), 3),
+        "mean_ms": round(float(np.mean(timings)), 3),
+        "sql_statements": int(np.median(statements)),
+    }
+
+
+async def measure_concurrent(
+    client, path: str, params: dict, repeat: int, concurrency: int
+) -> dict:
+    await client.get(path, params=params)  # прогрев кэшей процесса
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+    statuses = set()
+
+    async def request():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            timings.append((time.perf_counter() - started) * 1000)
+            statuses.add(response.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(repeat)))
+    elapsed = time.perf_counter() - started
+    return {
+        "status": max(statuses),
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms": round(float(np.percentile(timings, 95)), 3),
+        "mean_ms": round(float(np.mean(timings)), 3),
+        "rps": round(repeat / elapsed, 1),
+    }
+
+
+async def run_concurrent(requests: dict, repeat: int, concurrency: int) -> dict:
+    results = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            for name, (path, params) in requests.items():
+                results[name] = await measure_concurrent(
+                    client, path, params, repeat, concurrency
+                )
+                print(
+                    f"{name:14} p50 {results[name]['p50_ms']:8.2f} ms  "
+                    f"p95 {results[name]['p95_ms']:8.2f} ms  "
+                    f"rps {results[name]['rps']}"
+                )
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(database_url: str, repeat: int, username: str, concurrency: int = 1) -> dict:
+    engine = create_engine(database_url, **engine_options(database_url))
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_engine = create_async_engine(
+        async_database_url(database_url),
+        **engine_options(database_url, is_async=True),
+    )
+    async_session_factory = sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+
+    requests = endpoint_requests(username, "Концерты")
+    if concurrency > 1:
+        try:
+            results = asyncio.run(run_concurrent(requests, repeat, concurrency))
+        finally:
+            app.dependency_overrides.clear()
+        return report_meta(engine, repeat, concurrency, results)
+
+    counter = StatementCounter()
+    event.listen(Engine, "after_cursor_execute", counter)
+    results = {}
+    try:
+        with TestClient(app) as client:
+            for name, (path, params) in requests.items():
+                results[name] = measure(client, counter, path, params, repeat)
+                print(
+                    f"{name:14} p50 {results[name]['p50_ms']:8.2f} ms  "
+                    f"p95 {results[name]['p95_ms']:8.2f} ms  "
+                    f"sql {results[name]['sql_statements']}"
+                )
+    finally:
+        event.remove(Engine, "after_cursor_execute", counter)
+        app.dependency_overrides.clear()
+
+    return report_meta(engine, repeat, concurrency, results)
+
+
+def report_meta(engine, repeat: int, concurrency: int, results: dict) -> dict:
+    return {
+        "meta": {
+            "time": datetime.datetime.utcnow().isoformat(),
+            "revision": git_revision(),
+            "dialect": engine.dialect.name,
+            "repeat": repeat,
+            "concurrency": concurrency,
+            "tables": table_sizes(engine),
+        },
+        "endpoints": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--scale", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--username", default="user1")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url
+        if database_url is None:
+            database_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            engine = create_engine(database_url)
+            generate(engine, DatasetSizes().scaled(args.scale))
+            engine.dispose()
+        report = run(database_url, args.repeat, args.username, args.concurrency)
+
+    report["meta"]["scale"] = None if args.database_url else args.scale
+    with open(args.output, "w") as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Микробенчмарк сериализации списков контента: ORM + ContentSchema
+против строк SQL + orjson (FAST_JSON_RESPONSES).
+
+Запуск из каталога backend_fast:
+    TEST_MODE=true python -m benchmarks.serialization --items 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from fast import app
+from models import Base, Content, ContentTags, MacroCategory, Tags, User, get_db
+from settings import settings
+
+
+def fill_database(session_factory, items: int):
+    with session_factory() as db:
+        db.add(User(username="BenchUser"))
+        db.add(MacroCategory(id=1, name="events", description="events"))
+        db.add_all(
+            Tags(id=i, name=f"Tag{i}", description="Tag", macro_category_id=1)
+            for i in range(1, 11)
+        )
+        db.add_all(
+            Content(
+                id=i,
+                name=f"Content {i}",
+                description="Описание " * 20,
+                contact=[{"phone": "+70000000000"}],
+                unique_id=f"bench_{i}",
+                image=f"image{i}.png",
+                location="Нижний Новгород",
+                macro_category="events",
+            )
+            for i in range(1, items + 1)
+        )
+        # У каждого контента тег Tag1 (по нему и строится лента) и ещё два
+        db.add_all(
+            ContentTags(content_id=i, tags_id=tag_id)
+            for i in range(1, items + 1)
+            for tag_id in (1, 2 + i % 9, 2 + (i + 4) % 9)
+        )
+        db.commit()
+
+
+def measure(client, fast: bool, repeat: int) -> float:
+    settings.FAST_JSON_RESPONSES = fast
+    params = {"username": "BenchUser", "tag": "Tag1"}
+    client.get("/api/v1/contents", params=params)  # прогрев кэшей
+    started = time.perf_counter()
+    for _ in range(repeat):
+        response = client.get("/api/v1/contents", params=params)
+        assert response.status_code == 200
+    elapsed = (time.perf_counter() - started) / repeat
+    return len(response.json()) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+        )
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        Base.metadata.create_all(bind=engine)
+        fill_database(session_factory, args.items)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        with TestClient(app) as client:
+            regular = measure(client, False, args.repeat)
+            fast = measure(client, True, args.repeat)
+        app.dependency_overrides.clear()
+
+    print(f"ContentSchema + json: {regular:,.0f} rows/s")
+    print(f"SQL rows + orjson:    {fast:,.0f} rows/s ({fast / regular:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
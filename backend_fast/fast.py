@@ -16,10 +16,23 @@ from api.ratings import router_ratings
 from api.search import router_search
 from api.macro_categories import router_macro_categories
 from api.routes import router as router_routes
+from api.recommendations import router_recommendations
+from api.cache_stats import router_cache_stats
+from api.metrics import router_metrics
+from api.slow_queries import router_slow_queries
+from utils.pagination import NEXT_CURSOR_HEADER
 
-from loguru import logger
+from utils.logs import RequestLogMiddleware, setup_logging
+from utils.metrics import MetricsMiddleware
+from utils.content_tags import content_tag_map
+from utils.search_index import search_index
+from utils.suggestions import suggestion_index
+from utils.slow_queries import attach_slow_query_recorder
+from models import SessionLocal, engine
+from settings import settings
 
-logger.add("logs/fast.log", rotation="500 MB", level="INFO", compression="zip")
+setup_logging()
+attach_slow_query_recorder(explain_engine=engine)
 
 app = FastAPI()
 app.add_middleware(
@@ -28,7 +41,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(RequestLogMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.on_event("startup")
+def start_memory_indexes():
+    if settings.SEARCH_INDEX_ENABLED:
+        search_index.start(SessionLocal)
+    if settings.SUGGESTIONS_INDEX_ENABLED:
+        suggestion_index.start(SessionLocal)
+    if settings.CONTENT_TAGS_INDEX_ENABLED:
+        content_tag_map.start(SessionLocal)
 
 
 app.include_router(router_contents)
@@ -44,3 +70,7 @@ app.include_router(router_ratings)
 app.include_router(router_search)
 app.include_router(router_macro_categories)
 app.include_router(router_routes)
+app.include_router(router_recommendations)
+app.include_router(router_cache_stats)
+app.include_router(router_metrics)
+app.include_router(router_slow_queries)
@@ -0,0 +1,53 @@
+"""
+Офлайн-задача: пересчитывает похожий контент по лайкам.
+
+Запуск из каталога backend_fast:
+    python -m jobs.build_item_neighbours --top-n 50
+"""
+
+import argparse
+import time
+
+from models import SessionLocal
+from utils.item_neighbours import (
+    compute_item_neighbours,
+    load_likes,
+    save_item_neighbours,
+)
+from utils.logs import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-n", type=int, default=50)
+    parser.add_argument("--min-common", type=int, default=2)
+    parser.add_argument("--max-user-likes", type=int, default=500)
+    parser.add_argument("--block-size", type=int, default=2_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        user_ids, content_ids, like_ids = load_likes(db)
+        logger.info(
+            "Loaded {} likes in {:.1f}s", len(like_ids), time.perf_counter() - started
+        )
+        neighbours = compute_item_neighbours(
+            user_ids,
+            content_ids,
+            like_ids,
+            top_n=args.top_n,
+            min_common=args.min_common,
+            max_user_likes=args.max_user_likes,
+            block_size=args.block_size,
+        )
+        saved = save_item_neighbours(db, neighbours)
+
+    logger.info(
+        "Saved neighbours for {} contents in {:.1f}s",
+        saved,
+        time.perf_counter() - started,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Ночная задача: сверяет счётчики тегов по городам со связями контента
+и маршрутов с тегами и исправляет расхождения.
+
+Запуск из каталога backend_fast:
+    python -m jobs.reconcile_tag_counts
+"""
+
+import argparse
+import time
+
+from models import SessionLocal
+from utils.logs import logger
+from utils.tag_counts import reconcile_tag_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        corrected = reconcile_tag_counts(db)
+
+    logger.info(
+        "Corrected {} tag counts in {:.1f}s", corrected, time.perf_counter() - started
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from sqlalchemy import (
     create_engine,
     Column,
     Integer,
+    BigInteger,
     String,
     DateTime,
     Date,
@@ -15,9 +16,14 @@ from sqlalchemy import (
     UniqueConstraint,
     Index,
 )
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import relationship, sessionmaker, declarative_base
 import enum
-print(os.environ)
+from fastapi import Request
+
+from settings import settings
+from utils.replicas import ReadRouter
 
 
 # Определение перечислений
@@ -35,19 +41,83 @@ class PublisherType(str, enum.Enum):
 TEST_MODE = os.getenv("TEST_MODE", "False").lower() == "true"
 if TEST_MODE:
     SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
 else:
     SQLALCHEMY_DATABASE_URL = "postgresql://afisha:password@db/afisha"
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=True)
-
 
 
+def async_database_url(url: str):
+    """Тот же сервер через асинхронный драйвер (asyncpg, aiosqlite для тестов)"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url.set(drivername="postgresql+asyncpg")
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    Настройки пула из settings, одинаковые для primary и реплик,
+    синхронного и асинхронного движков (соединения у каждого движка свои)
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    if is_async:
+        # statement_cache_size — кэш подготовленных выражений asyncpg
+        # на соединение; за pgbouncer в режиме transaction его выключают (0)
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        }
+    return options
+
+
+ASYNC_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
+# SQL пишется в лог только для запросов с заголовком отладки (utils.logs)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL)
+)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL, is_async=True)
+)
 
 
 # Создаем фабрику сессий (SessionLocal)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Асинхронные сессии для эндпоинтов, работающих через async_engine
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Реплики для читающих эндпоинтов (get_read_db, get_async_read_db)
+read_router = ReadRouter(
+    SessionLocal,
+    [
+        sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=create_engine(url, **engine_options(url)),
+        )
+        for url in settings.DB_REPLICA_URLS
+    ],
+)
+async_read_router = ReadRouter(
+    AsyncSessionLocal,
+    [
+        sessionmaker(
+            bind=create_async_engine(
+                async_database_url(url), **engine_options(url, is_async=True)
+            ),
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        for url in settings.DB_REPLICA_URLS
+    ],
+)
 
 # Базовый класс моделей
 Base = declarative_base()
@@ -94,6 +164,8 @@ class Content(GenericModel):
     event_type = Column(String(10), nullable=False, default="offline")
     publisher_type = Column(String(20), nullable=False, default="user")
     publisher_id = Column(Integer, nullable=False, default=1_000_000)
+    # Макрокатегория первого тега, поддерживается при изменении тегов
+    macro_category = Column(String(250), nullable=True, index=True)
 
     tags = relationship("Tags", secondary="event_content_tags")
 
@@ -321,6 +393,56 @@ class UserCategoryPreference(Base):
         return f"{self.user.username} - {self.tag.name}"
 
 
+# Версии данных для инвалидации кэшей (event_cacheversion)
+class CacheVersion(Base):
+    __tablename__ = "event_cacheversion"
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String(100), unique=True, nullable=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated = Column(
+        DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
+    )
+
+    def __str__(self):
+        return f"{self.scope} - {self.version}"
+
+
+# Похожий контент по лайкам (event_contentneighbours), строится офлайн
+class ContentNeighbours(Base):
+    __tablename__ = "event_contentneighbours"
+
+    content_id = Column(
+        Integer, ForeignKey("event_content.id", ondelete="CASCADE"), primary_key=True
+    )
+    # Список пар [content_id, косинусная близость] по убыванию близости
+    neighbours = Column(JSON, nullable=False, default=list)
+    updated = Column(DateTime, default=datetime.datetime.utcnow)
+
+    def __str__(self):
+        return f"{self.content_id} - {len(self.neighbours)}"
+
+
+# Число контента и маршрутов с тегом в городе (event_tagcitycount)
+class TagCityCount(Base):
+    __tablename__ = "event_tagcitycount"
+    __table_args__ = (UniqueConstraint("tag_id", "city", name="unique_tag_city"),)
+
+    id = Column(Integer, primary_key=True)
+    tag_id = Column(
+        Integer, ForeignKey("event_tags.id", ondelete="CASCADE"), nullable=False
+    )
+    city = Column(String(50), nullable=False)
+    content_count = Column(Integer, nullable=False, default=0)
+    route_count = Column(Integer, nullable=False, default=0)
+    updated = Column(
+        DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
+    )
+
+    def __str__(self):
+        return f"{self.tag_id} - {self.city}: {self.content_count}"
+
+
 # Добавляем отношения для отзывов
 User.reviews = relationship("Review", back_populates="user")
 User.ratings = relationship("Rating", back_populates="user")
@@ -330,8 +452,6 @@ Content.ratings = relationship("Rating", back_populates="content")
 Content.removed_favorites = relationship("RemovedFavorite", back_populates="content")
 
 
-
-
 def get_db():
     db = SessionLocal()
     try:
@@ -340,6 +460,25 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db(request: Request):
+    """Сессия для читающего эндпоинта: реплика или primary (ReadRouter)"""
+    db = read_router.sessionmaker_for(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    async with async_read_router.sessionmaker_for(request)() as db:
+        yield db
+
+
 # Модель маршрутов
 class Route(GenericModel):
     __tablename__ = "event_route"
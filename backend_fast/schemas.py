@@ -14,6 +14,11 @@ class PublisherType(str, Enum):
     ORGANISATION = "organisation"
 
 
+class FeedOrder(str, Enum):
+    RANDOM = "random"
+    RANKED = "ranked"
+
+
 # Схема для Tag
 class TagSchema(BaseModel):
     id: int
@@ -188,7 +193,7 @@ class OrganisationWithUserResponse(BaseModel):
 # Схема для списка организаций
 class OrganisationListResponse(BaseModel):
     organisations: List[OrganisationWithUserResponse]
-    total_count: int
+    total_count: Optional[int] = None
 
 
 # Схема для тега в ответе контента организации
@@ -225,7 +230,8 @@ class OrganisationContentResponse(BaseModel):
 class OrganisationContentListResponse(BaseModel):
     organisation: OrganisationResponse
     contents: List[ContentSchema]
-    total_count: int
+    total_count: Optional[int] = None
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -252,7 +258,7 @@ class ReviewResponseSchema(BaseModel):
 
 class ReviewListResponseSchema(BaseModel):
     reviews: List[ReviewResponseSchema]
-    total_count: int
+    total_count: Optional[int] = None
 
 
 # Схемы для оценок
@@ -291,10 +297,11 @@ class ContentRatingStatsSchema(BaseModel):
 # Схема для ответа поиска
 class SearchResponseSchema(BaseModel):
     contents: List[ContentSchema]
-    total_count: int
+    total_count: Optional[int] = None
     skip: int
     limit: int
     has_more: bool
+    next_cursor: Optional[str] = None
     search_params: Dict
 
 
@@ -335,7 +342,7 @@ class MacroCategorySchema(BaseModel):
 
 class MacroCategoriesResponseSchema(BaseModel):
     macro_categories: List[MacroCategorySchema]
-    total_count: int
+    total_count: Optional[int] = None
 
 
 # Схема для тега с расширенной информацией
@@ -439,7 +446,7 @@ class RouteListSchema(BaseModel):
 
 class RouteListResponseSchema(BaseModel):
     routes: List[RouteListSchema]
-    total_count: int
+    total_count: Optional[int] = None
 
 
 class RouteCreateSchema(BaseModel):
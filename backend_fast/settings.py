@@ -0,0 +1,95 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    # Кэш кандидатов ленты: максимум записей (город + даты + теги) в LRU
+    FEED_CACHE_MAX_ENTRIES: int = 256
+    # Сколько порядков перемешанной ленты (по сиду сессии) хранит
+    # каждая запись кэша кандидатов
+    FEED_SHUFFLE_ORDERS_PER_ENTRY: int = 32
+    # Кэш исключений пользователей (лайки, дизлайки, удалённое из избранного)
+    EXCLUSIONS_CACHE_MAX_USERS: int = 10_000
+    EXCLUSIONS_CACHE_TTL_SECONDS: float = 300.0
+    # Кэш username → (id, город) для поиска пользователя в каждом запросе
+    IDENTITY_CACHE_MAX_USERS: int = 50_000
+    IDENTITY_CACHE_TTL_SECONDS: float = 600.0
+    # Сколько секунд считать актуальной популярность контента для ранжирования
+    RANKING_STATS_TTL_SECONDS: float = 600.0
+    # Отдавать списки контента через быструю сериализацию (utils.fast_json)
+    FAST_JSON_RESPONSES: bool = False
+    # Как часто (в секундах) сверять версии кэшей с таблицей event_cacheversion
+    CACHE_VERSION_CHECK_SECONDS: float = 5.0
+    # total_count списков (utils.counting): кэш точных значений по фильтрам
+    # и порог, ниже которого оценка планировщика заменяется точным числом
+    COUNT_CACHE_MAX_ENTRIES: int = 4096
+    COUNT_CACHE_TTL_SECONDS: float = 30.0
+    COUNT_ESTIMATE_EXACT_BELOW: int = 1000
+
+    # Пул соединений с Postgres (на каждый движок: синхронный и асинхронный)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Кэш подготовленных выражений asyncpg; 0 — для pgbouncer в transaction-режиме
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Реплики Postgres для читающих эндпоинтов (JSON-список URL в окружении)
+    DB_REPLICA_URLS: list[str] = []
+    # Сколько секунд после записи чтения пользователя идут в primary
+    REPLICA_STICKY_SECONDS: float = 5.0
+
+    # Логирование (utils.logs): JSON-файл, пишется фоновым потоком
+    LOG_FILE: str = "logs/fast.log"
+    LOG_ROTATION_BYTES: int = 500 * 1024 * 1024
+    LOG_LEVEL: str = "INFO"
+    LOG_STDERR_LEVEL: str = "WARNING"
+    # Доля запросов, чьи INFO-записи пишутся: по умолчанию и по путям
+    LOG_INFO_SAMPLE_RATE: float = 1.0
+    LOG_INFO_SAMPLE_RATES: dict[str, float] = {}
+    # Значение заголовка X-Debug-Log, включающего SQL и подробные данные
+    # для одного запроса; пустое — заголовок игнорируется
+    LOG_DEBUG_TOKEN: str = ""
+
+    # /search через столбец search_vector и GIN-индекс на Postgres
+    # (миграция Django 0034); False — LIKE, как на SQLite
+    FULL_TEXT_SEARCH: bool = True
+    # /search по индексу в памяти процесса (utils.search_index), который
+    # строится при старте; пока индекс не готов или отстал — поиск в базе
+    SEARCH_INDEX_ENABLED: bool = False
+    SEARCH_INDEX_BUILD_BATCH: int = 2000
+    # Кэш страниц /search (utils.search_cache): ID и total_count
+    SEARCH_CACHE_MAX_ENTRIES: int = 2048
+    SEARCH_CACHE_TTL_SECONDS: float = 30.0
+    # /search/suggestions из индекса в памяти (utils.suggestions); лайки
+    # и прошедшие даты учитываются перестройкой раз в REFRESH секунд
+    SUGGESTIONS_INDEX_ENABLED: bool = False
+    SUGGESTIONS_REFRESH_SECONDS: float = 600.0
+    # Числа тегов города для /tags (utils.tag_counts) и теги контента
+    # в памяти (utils.content_tags): исключения пользователя вычитаются
+    # без запроса к связям контента с тегами
+    TAG_COUNTS_CACHE_MAX_ENTRIES: int = 256
+    TAG_COUNTS_CACHE_TTL_SECONDS: float = 300.0
+    CONTENT_TAGS_INDEX_ENABLED: bool = False
+    # Cache-Control ответов справочников (utils.catalog): теги,
+    # макрокатегории и города меняются только в Django-админке
+    CATALOG_MAX_AGE_SECONDS: int = 300
+    # Cache-Control анонимных ответов чтения (utils.http_cache): сколько
+    # секунд nginx и клиент отдают ответ без перепроверки ETag
+    CONTENT_MAX_AGE_SECONDS: int = 60
+    ROUTE_MAX_AGE_SECONDS: int = 300
+    REVIEWS_MAX_AGE_SECONDS: int = 30
+    RATING_STATS_MAX_AGE_SECONDS: int = 30
+
+    # Запросы дольше порога (мс) пишутся в лог и в кольцевой буфер
+    # utils.slow_queries; на Postgres к ним добавляется EXPLAIN
+    SLOW_QUERY_THRESHOLD_MS: float = 500.0
+    SLOW_QUERY_BUFFER_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN: bool = True
+    # Значение заголовка X-Admin-Token для служебных эндпоинтов;
+    # пустое — служебные эндпоинты недоступны
+    ADMIN_TOKEN: str = ""
+
+    model_config = SettingsConfigDict()
+
+
+settings = Settings()
@@ -3,14 +3,41 @@ import os
 import pytest
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from fastapi.testclient import TestClient
 from fast import app
-from models import Base, Content, Rating, Review, Tags, get_db, User
+from models import (
+    Base,
+    Content,
+    Rating,
+    Review,
+    Tags,
+    User,
+    get_async_db,
+    get_async_read_db,
+    get_db,
+    get_read_db,
+)
 from tests.config import test_settings
+from utils.cache_versions import version_watcher
+from utils.catalog import catalog
+from utils.content_tags import content_tag_map
+from utils.counting import count_cache
+from utils.exclusions import exclusion_cache
+from utils.feed_cache import feed_candidate_cache
+from utils.identity import identity_cache
+from utils.ranking import content_stats_cache
+from utils.replicas import read_your_writes
+from utils.metrics import metrics_registry
+from utils.search_cache import search_result_cache
+from utils.search_index import search_index
+from utils.slow_queries import slow_query_recorder
+from utils.suggestions import suggestion_index
+from utils.tag_counts import city_tag_count_cache
 
 # Тестовая база SQLite
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -18,6 +45,11 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Та же база для эндпоинтов на асинхронном движке
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+AsyncTestingSessionLocal = sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -37,10 +69,22 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Подмена зависимости get_async_db на тестовую асинхронную сессию"""
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture()
 def client():
-    """TestClient с переопределённой зависимостью get_db"""
+    """
+    TestClient с переопределёнными зависимостями сессий: все чтения
+    и записи идут в тестовую базу (реплики проверяются в test_replicas)
+    """
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -78,6 +122,21 @@ def create_test_content2():
         db.commit()
 
 
+@pytest.fixture()
+def create_test_feed_contents():
+    """Создаёт 5 мероприятий в городе nn для ленты"""
+    with TestingSessionLocal() as db:
+        for i in range(1, 6):
+            content = Content(
+                name=f"TestFeedContent{i}",
+                description="TestDescription",
+                contact=[{}],
+                unique_id=f"test_feed_content_{i}",
+            )
+            db.add(content)
+        db.commit()
+
+
 @pytest.fixture()
 def create_test_rating_for_one_content_rait3():
     """Создаёт запись в Rating(user_id=1, content_id=1, rating=3)"""
@@ -188,3 +247,19 @@ def clear_db():
         db.commit()
     finally:
         db.close()
+    # Кэши процесса не должны переживать очистку базы
+    feed_candidate_cache.clear()
+    exclusion_cache.clear()
+    content_stats_cache.clear()
+    identity_cache.clear()
+    read_your_writes.clear()
+    metrics_registry.reset()
+    slow_query_recorder.clear()
+    search_index.clear()
+    suggestion_index.clear()
+    count_cache.clear()
+    search_result_cache.clear()
+    city_tag_count_cache.clear()
+    content_tag_map.clear()
+    catalog.clear()
+    version_watcher.forget()
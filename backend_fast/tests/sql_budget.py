@@ -0,0 +1,96 @@
+"""
+Бюджеты SQL-запросов на эндпоинт.
+
+sql_budget("GET /api/v1/routes") считает выражения, выполненные всеми
+движками (синхронным и асинхронным) внутри блока, и валит тест, если их
+больше бюджета из SQL_BUDGETS. Бюджет — число запросов «холодного» запроса
+сразу после clear_db (кэши процесса пусты) и не должен зависеть от размера
+ответа: рост с числом строк — это N+1. Эндпоинты со справочниками
+(utils.catalog) в холодном запросе читают его версию и сам справочник
+(+3), дальше — ни одного запроса до смены версии.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_BUDGETS = {
+    # contents
+    "GET /api/v1/contents_feed": 8,
+    "GET /api/v1/contents": 10,
+    "GET /api/v1/contents/liked": 3,
+    "GET /api/v1/contents/{content_id}": 1,
+    "GET /api/v1/users/{username}/contents": 3,
+    # users
+    "GET /api/v1/users": 2,
+    "POST /api/v1/register": 4,
+    "PATCH /api/v1/users": 4,
+    # cities
+    "GET /api/v1/cities": 0,
+    # preferences
+    "GET /api/v1/preferences/categories": 3,
+    "POST /api/v1/preferences/categories": 7,
+    # likes
+    "POST /api/v1/like": 6,
+    # organisations
+    "GET /api/v1/organisations": 1,
+    "GET /api/v1/organisations/{organisation_id}/contents": 4,
+    "GET /api/v1/users/{username}/organisations": 4,
+    # feedback
+    "POST /api/v1/feedback": 3,
+    # tags
+    "GET /api/v1/tags": 7,
+    "GET /api/v1/tags/by-macro-category/{macro_category_name}": 3,
+    # reviews
+    "GET /api/v1/reviews": 2,
+    "GET /api/v1/users/{username}/reviews": 3,
+    "POST /api/v1/reviews": 5,
+    # ratings
+    "GET /api/v1/ratings/stats/{content_id}": 4,
+    "GET /api/v1/users/{username}/ratings": 4,
+    "POST /api/v1/ratings": 6,
+    # search
+    # search: +1 — версия контента для кэша страниц (холодный запрос)
+    "GET /api/v1/search": 6,
+    "GET /api/v1/search/suggestions": 1,
+    "GET /api/v1/search/popular-tags": 1,
+    # macro_categories
+    "GET /api/v1/macro-categories": 3,
+    "GET /api/v1/macro-categories/{category_id}": 3,
+    # routes: страница (с total_count в окне) и по запросу на коллекцию
+    "GET /api/v1/routes": 4,
+    "GET /api/v1/routes/{route_id}": 4,
+    # recommendations
+    "GET /api/v1/recommendations": 5,
+    # служебные эндпоинты в базу не ходят
+    "GET /api/v1/cache/stats": 0,
+    "GET /metrics": 0,
+    "GET /api/v1/admin/slow-queries": 0,
+}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def sql_budget(endpoint: str):
+    budget = SQL_BUDGETS[endpoint]
+    counter = StatementCounter()
+    event.listen(Engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, "before_cursor_execute", counter)
+    if len(counter.statements) > budget:
+        statements = "\n\n".join(counter.statements)
+        pytest.fail(
+            f"{endpoint}: {len(counter.statements)} SQL statements, "
+            f"budget {budget}:\n\n{statements}"
+        )
@@ -0,0 +1,65 @@
+import asyncio
+import inspect
+import threading
+
+import pytest
+
+from api.contents import get_content_for_feed
+from fast import app
+from models import get_db, get_async_read_db
+from tests.conftest import AsyncTestingSessionLocal
+from utils.async_db import off_loop
+
+
+def sync_db_is_not_used():
+    raise AssertionError("Синхронная сессия не должна открываться")
+    yield
+
+
+class TestAsyncSessionEndpoint:
+    def test_endpoint_is_coroutine_with_async_db(self):
+        assert inspect.iscoroutinefunction(get_content_for_feed)
+        parameter = inspect.signature(get_content_for_feed).parameters["db"]
+        assert parameter.default.dependency is get_async_read_db
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/api/v1/contents_feed?username=TestUser",
+            "/api/v1/contents/liked?username=TestUser",
+            "/api/v1/search?q=Test",
+            "/api/v1/search/popular-tags",
+        ],
+    )
+    def test_hot_routes_use_only_async_engine(
+        self, client, create_test_user1, create_test_feed_contents, url
+    ):
+        app.dependency_overrides[get_db] = sync_db_is_not_used
+
+        response = client.get(url)
+
+        assert response.status_code == 200
+
+    def test_unknown_user_is_404(self, client):
+        response = client.get("/api/v1/contents_feed?username=ghost")
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "User not found"}
+
+
+class TestOffLoop:
+    def test_runs_in_worker_thread_inside_run_sync(self):
+        async def run():
+            async with AsyncTestingSessionLocal() as db:
+                loop_thread = threading.get_ident()
+                worker_thread = await db.run_sync(
+                    lambda session: off_loop(threading.get_ident)
+                )
+            return loop_thread, worker_thread
+
+        loop_thread, worker_thread = asyncio.run(run())
+
+        assert worker_thread != loop_thread
+
+    def test_runs_in_place_in_sync_code(self):
+        assert off_loop(threading.get_ident) == threading.get_ident()
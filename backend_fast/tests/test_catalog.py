@@ -0,0 +1,149 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from models import CacheVersion, Content, MacroCategory, Tags, User
+from tests.conftest import TestingSessionLocal
+from tests.sql_budget import StatementCounter
+from utils.cache_versions import bump_cache_version, version_watcher
+from utils.catalog import CATALOG_SCOPE, catalog
+
+
+@pytest.fixture()
+def catalog_rows(client):
+    with TestingSessionLocal() as db:
+        db.add_all(
+            [
+                User(id=1, username="TestUser", city="nn"),
+                MacroCategory(id=1, name="events", description="События"),
+                MacroCategory(id=2, name="places", description="Места"),
+                Tags(id=1, name="Рок", description="Tag", macro_category_id=1),
+                Tags(id=2, name="Джаз", description="Tag", macro_category_id=1),
+                Tags(id=3, name="Парки", description="Tag", macro_category_id=2),
+            ]
+        )
+        db.commit()
+
+
+@contextmanager
+def count_statements():
+    counter = StatementCounter()
+    event.listen(Engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, "before_cursor_execute", counter)
+
+
+@pytest.mark.usefixtures("catalog_rows")
+class TestCatalogSnapshot:
+    def test_lookups(self):
+        with TestingSessionLocal() as db:
+            snapshot = catalog.get(db)
+
+        assert snapshot.tags([3, 1]) == [snapshot.tag(3), snapshot.tag(1)]
+        assert snapshot.tags([1, 99]) is None
+        assert snapshot.tag_ids_by_name("Джаз") == [2]
+        assert snapshot.macro_category_by_name("places").id == 2
+        assert snapshot.macro_category_name([snapshot.tag(3), snapshot.tag(1)]) == (
+            "events"
+        )
+        assert [tag.name for tag in snapshot.tags_by_macro_category[1]] == [
+            "Джаз",
+            "Рок",
+        ]
+
+    def test_reloaded_when_version_changes(self):
+        with TestingSessionLocal() as db:
+            first = catalog.get(db)
+            db.add(Tags(id=4, name="Блюз", description="Tag", macro_category_id=1))
+            bump_cache_version(db, CATALOG_SCOPE)
+            db.commit()
+            assert catalog.get(db) is first
+
+            version_watcher.forget(CATALOG_SCOPE)
+            second = catalog.get(db)
+
+        assert second.version == first.version + 1
+        assert second.tag(4).name == "Блюз"
+
+    def test_reloaded_when_version_goes_back(self):
+        with TestingSessionLocal() as db:
+            bump_cache_version(db, CATALOG_SCOPE)
+            db.commit()
+            first = catalog.get(db)
+
+            # версию сбросили (восстановление из бэкапа), теги поменялись
+            db.query(CacheVersion).filter(CacheVersion.scope == CATALOG_SCOPE).update(
+                {CacheVersion.version: 0}
+            )
+            db.query(Tags).filter(Tags.id == 1).update({Tags.name: "Рок-н-ролл"})
+            db.commit()
+            version_watcher.forget(CATALOG_SCOPE)
+            second = catalog.get(db)
+
+        assert second.version == 0
+        assert second.tag(1).name == "Рок-н-ролл"
+        assert second.etag != first.etag
+
+
+@pytest.mark.usefixtures("catalog_rows")
+class TestCatalogEndpoints:
+    def test_warm_requests_skip_database(self, client):
+        client.get("/api/v1/macro-categories")
+        with count_statements() as statements:
+            response = client.get("/api/v1/tags/by-macro-category/events")
+
+        assert [tag["name"] for tag in response.json()["tags"]] == ["Джаз", "Рок"]
+        assert statements.statements == []
+
+    def test_etag_and_not_modified(self, client):
+        response = client.get("/api/v1/macro-categories")
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "public, max-age=300"
+        assert response.json()["total_count"] == 2
+
+        response = client.get(
+            "/api/v1/macro-categories", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    def test_cities_etag(self, client):
+        etag = client.get("/api/v1/cities").headers["ETag"]
+        response = client.get("/api/v1/cities", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+    def test_create_content_validates_tags_from_catalog(self, client):
+        data = {
+            "name": "Концерт",
+            "description": "Описание",
+            "city": "nn",
+            "contact": '[{"phone": "+70000000000"}]',
+            "publisher_type": "user",
+        }
+        response = client.post(
+            "/api/v1/contents?username=TestUser", data={**data, "tags": "1,99"}
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            "/api/v1/contents?username=TestUser", data={**data, "tags": "3,1"}
+        )
+        assert response.status_code == 201
+        assert {tag["id"] for tag in response.json()["tags"]} == {1, 3}
+        with TestingSessionLocal() as db:
+            content = db.query(Content).one()
+            assert content.macro_category == "events"
+            assert {tag.id for tag in content.tags} == {1, 3}
+
+    def test_preference_for_unknown_tag(self, client):
+        response = client.post(
+            "/api/v1/preferences/categories",
+            params={"username": "TestUser", "tag_id": 99},
+        )
+        assert response.status_code == 404
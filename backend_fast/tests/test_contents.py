@@ -1,5 +1,109 @@
+from models import MacroCategory, Tags
+from tests.conftest import TestingSessionLocal
+from utils.feed import shuffle_keys
+from utils.pagination import NEXT_CURSOR_HEADER
 
 
 class TestContents:
     def test_get_content_by_id(self, client, create_test_content1):
-        pass 
\ No newline at end of file
+        pass
+
+    def test_create_content_stores_macro_category(self, client, create_test_user1):
+        with TestingSessionLocal() as db:
+            db.add(MacroCategory(id=1, name="events", description="events"))
+            db.add(MacroCategory(id=2, name="places", description="places"))
+            db.add(Tags(id=1, name="Tag1", description="Tag1", macro_category_id=2))
+            db.add(Tags(id=2, name="Tag2", description="Tag2", macro_category_id=1))
+            db.commit()
+
+        response = client.post(
+            "/api/v1/contents?username=TestUser",
+            data={
+                "name": "TestContent",
+                "description": "TestDescription",
+                "tags": "2,1",
+                "publisher_type": "user",
+            },
+        )
+        assert response.status_code == 201
+        assert response.json()["macro_category"] == "places"
+
+        response = client.get(f"/api/v1/contents/{response.json()['id']}")
+
+        assert response.json()["macro_category"] == "places"
+
+
+class TestContentFeed:
+    def test_get_feed_without_pagination(
+        self, client, create_test_user1, create_test_feed_contents
+    ):
+        response = client.get("/api/v1/contents_feed?username=TestUser")
+        data = response.json()
+
+        assert response.status_code == 200
+        assert sorted(item["id"] for item in data) == [1, 2, 3, 4, 5]
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    def test_get_feed_pages(self, client, create_test_user1, create_test_feed_contents):
+        seen = []
+        response = client.get("/api/v1/contents_feed?username=TestUser&limit=2&seed=7")
+        while True:
+            assert response.status_code == 200
+            seen.extend(item["id"] for item in response.json())
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+            response = client.get(
+                f"/api/v1/contents_feed?username=TestUser&limit=2&cursor={cursor}"
+            )
+
+        assert sorted(seen) == [1, 2, 3, 4, 5]
+
+        response = client.get("/api/v1/contents_feed?username=TestUser&limit=5&seed=7")
+        assert [item["id"] for item in response.json()] == seen
+
+    def test_get_feed_page_skips_liked_content(
+        self, client, create_test_user1, create_test_feed_contents
+    ):
+        response = client.get("/api/v1/contents_feed?username=TestUser&limit=2&seed=7")
+        first_page = [item["id"] for item in response.json()]
+        cursor = response.headers[NEXT_CURSOR_HEADER]
+
+        client.post(
+            "/api/v1/like", json={"username": "TestUser", "content_id": first_page[0]}
+        )
+
+        response = client.get(
+            f"/api/v1/contents_feed?username=TestUser&limit=10&cursor={cursor}"
+        )
+        rest = [item["id"] for item in response.json()]
+
+        assert sorted(first_page + rest) == [1, 2, 3, 4, 5]
+
+    def test_get_feed_with_invalid_cursor(
+        self, client, create_test_user1, create_test_feed_contents
+    ):
+        response = client.get("/api/v1/contents_feed?username=TestUser&cursor=broken")
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+
+class TestShuffleKeys:
+    def test_consecutive_ids_are_spread(self):
+        ids = range(1, 5001)
+        for seed in (7, 12345, 999):
+            order = [i for _, i in sorted(zip(shuffle_keys(ids, seed), ids))]
+            gaps = [abs(b - a) for a, b in zip(order, order[1:])]
+
+            # у аффинного ключа было ровно 3 разных шага; у случайной
+            # перестановки средний |шаг| около n / 3
+            assert len(set(gaps)) > 1000
+            assert 1400 < sum(gaps) / len(gaps) < 1950
+
+    def test_seed_changes_order(self):
+        ids = list(range(1, 101))
+        first = sorted(ids, key=dict(zip(ids, shuffle_keys(ids, 1))).get)
+        second = sorted(ids, key=dict(zip(ids, shuffle_keys(ids, 2))).get)
+
+        assert first != second
@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+from enum import Enum
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg2
+from sqlalchemy.engine import Engine
+
+from models import Content, MacroCategory, Review
+from tests.conftest import TestingSessionLocal
+from tests.sql_budget import StatementCounter
+from utils.counting import (
+    CountMode,
+    Explain,
+    count_cache,
+    count_key,
+    count_total,
+    paginate_with_total,
+)
+
+
+class Color(str, Enum):
+    RED = "red"
+
+
+@pytest.fixture()
+def macro_categories(client):
+    with TestingSessionLocal() as db:
+        db.add_all(
+            MacroCategory(id=i, name=f"category{i}", description="Категория")
+            for i in range(1, 6)
+        )
+        db.commit()
+
+
+@contextmanager
+def count_statements():
+    counter = StatementCounter()
+    event.listen(Engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, "before_cursor_execute", counter)
+
+
+def category_query(db):
+    return db.query(MacroCategory).order_by(MacroCategory.id)
+
+
+class TestCountKey:
+    def test_normalizes_filters(self):
+        assert count_key("search", tags=[3, 1], city="nn", q=None) == count_key(
+            "search", city="nn", tags=[1, 3], date_from=None
+        )
+        assert count_key("x", color=Color.RED) == ("x", (("color", "red"),))
+
+
+@pytest.mark.usefixtures("macro_categories")
+class TestPaginateWithTotal:
+    def test_exact_total_in_page_query(self):
+        with TestingSessionLocal() as db, count_statements() as statements:
+            rows, total = paginate_with_total(
+                db, category_query(db), 1, 2, CountMode.EXACT
+            )
+
+        assert [row.id for row in rows] == [2, 3]
+        assert total == 5
+        assert len(statements.statements) == 1
+
+    def test_cached_total(self):
+        key = count_key("macro_categories")
+        with TestingSessionLocal() as db:
+            paginate_with_total(db, category_query(db), 0, 2, CountMode.EXACT, key)
+            with count_statements() as statements:
+                rows, total = paginate_with_total(
+                    db, category_query(db), 2, 2, CountMode.EXACT, key
+                )
+
+        assert [row.id for row in rows] == [3, 4]
+        assert total == 5
+        assert len(statements.statements) == 1
+        assert count_cache.stats()["hits"] == 1
+
+    def test_page_past_end_and_none(self):
+        with TestingSessionLocal() as db:
+            assert paginate_with_total(
+                db, category_query(db), 10, 2, CountMode.EXACT
+            ) == ([], 5)
+            rows, total = paginate_with_total(
+                db, category_query(db), 0, 2, CountMode.NONE
+            )
+        assert len(rows) == 2
+        assert total is None
+
+    def test_estimate_is_exact_on_sqlite(self):
+        with TestingSessionLocal() as db:
+            assert count_total(db, category_query(db), CountMode.ESTIMATE) == 5
+
+
+class TestExplain:
+    def compile(self, dialect):
+        with TestingSessionLocal() as db:
+            query = db.query(Content.id).filter(
+                Content.id.in_([1, 2]), Content.city == "nn"
+            )
+        return Explain(query.statement).compile(
+            dialect=dialect, compile_kwargs={"render_postcompile": True}
+        )
+
+    def test_in_list_expanded(self):
+        compiled = self.compile(psycopg2.dialect())
+
+        assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "POSTCOMPILE" not in str(compiled)
+        assert "IN (%(id_1_1)s, %(id_1_2)s)" in str(compiled)
+        assert compiled.params == {"id_1_1": 1, "id_1_2": 2, "city_1": "nn"}
+
+    def test_positional_params_for_asyncpg(self):
+        compiled = self.compile(asyncpg.dialect())
+
+        assert [compiled.params[name] for name in compiled.positiontup] == [
+            1,
+            2,
+            "nn",
+        ]
+
+
+class TestCountParameter:
+    def test_reviews_total_modes(self, client, create_test_user1, create_test_content1):
+        with TestingSessionLocal() as db:
+            db.add(Review(user_id=1, content_id=1, text="Отзыв"))
+            db.commit()
+
+        params = {"content_id": 1}
+        assert client.get("/api/v1/reviews", params=params).json()["total_count"] == 1
+        response = client.get("/api/v1/reviews", params={**params, "count": "none"})
+        assert response.json()["total_count"] is None
+
+    def test_write_invalidates_cached_total(
+        self, client, create_test_user1, create_test_content1
+    ):
+        url = "/api/v1/users/TestUser/reviews"
+        assert client.get(url).json()["total_count"] == 0
+        client.post(
+            "/api/v1/reviews",
+            json={"username": "TestUser", "content_id": 1, "text": "Отзыв"},
+        )
+        assert client.get(url).json()["total_count"] == 1
+
+    def test_invalid_mode(self, client):
+        response = client.get("/api/v1/macro-categories", params={"count": "maybe"})
+        assert response.status_code == 422
@@ -0,0 +1,63 @@
+from models import Like, RemovedFavorite
+from tests.conftest import TestingSessionLocal
+from utils.cache_versions import bump_cache_version, version_watcher
+from utils.exclusions import EXCLUSIONS_SCOPE, ExclusionCache, UserExclusions
+
+
+class TestUserExclusions:
+    def test_add_keeps_ids_sorted_and_unique(self):
+        exclusions = UserExclusions([5, 1, 3])
+        exclusions.add(2)
+        exclusions.add(3)
+
+        assert list(exclusions.ids) == [1, 2, 3, 5]
+        assert 2 in exclusions
+        assert 4 not in exclusions
+
+    def test_filter(self):
+        exclusions = UserExclusions([2, 4])
+
+        assert exclusions.filter([5, 4, 3, 2, 1]) == [5, 3, 1]
+
+
+class TestExclusionCache:
+    def test_load_likes_and_removed_favorites(
+        self, create_test_user1, create_test_feed_contents
+    ):
+        cache = ExclusionCache(max_users=10, ttl=60)
+        with TestingSessionLocal() as db:
+            db.add(Like(user_id=1, content_id=1, value=True))
+            db.add(Like(user_id=1, content_id=2, value=False))
+            db.add(RemovedFavorite(user_id=1, content_id=4))
+            db.commit()
+
+            exclusions = cache.get(db, 1)
+
+        assert list(exclusions.ids) == [1, 2, 4]
+
+    def test_version_bump_clears_cache(
+        self, create_test_user1, create_test_feed_contents
+    ):
+        cache = ExclusionCache(max_users=10, ttl=60)
+        with TestingSessionLocal() as db:
+            cache.get(db, 1)
+            db.add(RemovedFavorite(user_id=1, content_id=3))
+            bump_cache_version(db, EXCLUSIONS_SCOPE)
+            db.commit()
+            version_watcher.forget()
+
+            exclusions = cache.get(db, 1)
+
+        assert list(exclusions.ids) == [3]
+
+    def test_like_updates_cached_exclusions(
+        self, client, create_test_user1, create_test_feed_contents
+    ):
+        response = client.get("/api/v1/contents_feed?username=TestUser")
+        assert len(response.json()) == 5
+
+        client.post("/api/v1/like", json={"username": "TestUser", "content_id": 2})
+        client.post("/api/v1/dislike", json={"username": "TestUser", "content_id": 4})
+
+        response = client.get("/api/v1/contents_feed?username=TestUser")
+        assert sorted(item["id"] for item in response.json()) == [1, 3, 5]
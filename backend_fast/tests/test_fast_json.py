@@ -0,0 +1,89 @@
+from datetime import date
+
+import pytest
+
+from models import Content, ContentTags, Like, Organisation, Tags, User
+from settings import settings
+from tests.conftest import TestingSessionLocal
+from utils.pagination import NEXT_CURSOR_HEADER
+
+
+@pytest.fixture()
+def fast_json_data(create_test_user1):
+    with TestingSessionLocal() as db:
+        user = db.query(User).filter(User.username == "TestUser").one()
+        organisation = Organisation(
+            name="TestOrg",
+            phone="+70000000000",
+            email="org@example.com",
+            password="password",
+            user_id=user.id,
+            image="org.png",
+        )
+        db.add(organisation)
+        db.add(Tags(id=1, name="Tag1", description="Tag1"))
+        db.add(Tags(id=2, name="Tag2", description="Tag2"))
+        db.flush()
+        for i in range(1, 6):
+            db.add(
+                Content(
+                    id=i,
+                    name=f"Jazz {i}",
+                    description="TestDescription",
+                    contact=[{"phone": str(i)}],
+                    unique_id=f"fast_json_{i}",
+                    image=f"image{i}.png" if i % 2 else None,
+                    date_start=date(2025, 1, i) if i < 5 else None,
+                    macro_category="events",
+                    publisher_type="organisation" if i % 2 else "user",
+                    publisher_id=organisation.id if i % 2 else user.id,
+                )
+            )
+            db.add(ContentTags(content_id=i, tags_id=1))
+            if i > 2:
+                db.add(ContentTags(content_id=i, tags_id=2))
+        db.add(Like(user_id=user.id, content_id=2, value=True))
+        db.add(Like(user_id=user.id, content_id=4, value=True))
+        db.commit()
+        return organisation.id
+
+
+def get_both(client, monkeypatch, url, params):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    regular = client.get(url, params=params)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    fast = client.get(url, params=params)
+    assert regular.status_code == fast.status_code == 200
+    return regular, fast
+
+
+class TestFastJson:
+    @pytest.mark.parametrize(
+        "url,params",
+        [
+            ("/api/v1/contents", {"username": "TestUser", "tag": "Tag1", "limit": 2}),
+            ("/api/v1/contents/liked", {"username": "TestUser", "limit": 1}),
+            ("/api/v1/users/TestUser/contents", {"limit": 1}),
+            ("/api/v1/contents_feed", {"username": "TestUser", "order": "ranked"}),
+            ("/api/v1/search", {"q": "jazz", "limit": 2}),
+            ("/api/v1/search", {"limit": 2, "with_total": False}),
+        ],
+    )
+    def test_same_payload(self, client, monkeypatch, fast_json_data, url, params):
+        regular, fast = get_both(client, monkeypatch, url, params)
+
+        assert fast.json() == regular.json()
+        assert fast.headers.get(NEXT_CURSOR_HEADER) == regular.headers.get(
+            NEXT_CURSOR_HEADER
+        )
+
+    def test_organisation_contents(self, client, monkeypatch, fast_json_data):
+        regular, fast = get_both(
+            client,
+            monkeypatch,
+            f"/api/v1/organisations/{fast_json_data}/contents",
+            {"limit": 2},
+        )
+
+        assert fast.json() == regular.json()
+        assert fast.json()["next_cursor"]
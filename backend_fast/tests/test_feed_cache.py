@@ -0,0 +1,112 @@
+from models import Content, ContentTags, Tags
+from settings import settings
+from tests.conftest import TestingSessionLocal
+from utils.cache_versions import bump_content_version, version_watcher
+from utils.feed import shuffle_key, shuffled_order
+from utils.feed_cache import CandidateEntry, FeedCandidate, FeedCandidateCache
+
+
+class TestFeedCandidateCache:
+    def test_get_uses_cached_entry(self, create_test_feed_contents):
+        cache = FeedCandidateCache(max_entries=4)
+        with TestingSessionLocal() as db:
+            first = cache.get(db, "nn")
+            second = cache.get(db, "nn")
+
+        assert first is second
+        assert first.ids == [1, 2, 3, 4, 5]
+        assert cache.stats()["hits"] == 1
+
+    def test_version_bump_reloads_entry(self, create_test_feed_contents):
+        cache = FeedCandidateCache(max_entries=4)
+        with TestingSessionLocal() as db:
+            cache.get(db, "nn")
+            db.add(Content(name="New", description="New", unique_id="new", city="nn"))
+            bump_content_version(db, "nn")
+            db.commit()
+            version_watcher.forget()
+
+            entry = cache.get(db, "nn")
+
+        assert entry.ids == [1, 2, 3, 4, 5, 6]
+
+    def test_lru_eviction(self, create_test_feed_contents):
+        cache = FeedCandidateCache(max_entries=2)
+        with TestingSessionLocal() as db:
+            cache.get(db, "nn")
+            cache.get(db, "spb")
+            cache.get(db, "nn")
+            cache.get(db, "msk")
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+
+    def test_tag_filter(self, create_test_feed_contents):
+        cache = FeedCandidateCache(max_entries=4)
+        with TestingSessionLocal() as db:
+            db.add(Tags(id=1, name="TestTagName1", description="TestTagDescription"))
+            db.add(ContentTags(content_id=2, tags_id=1))
+            db.commit()
+
+            entry = cache.get(db, "nn", tag_ids=[1])
+
+        assert entry.ids == [2]
+        assert entry.candidates[0].tag_ids == (1,)
+
+
+def make_entry(count):
+    return CandidateEntry(
+        ("nn",),
+        1,
+        [FeedCandidate(i, None, None, (), None) for i in range(1, count + 1)],
+    )
+
+
+class TestShuffledOrder:
+    def test_order_cached_per_seed(self, monkeypatch):
+        entry = make_entry(10)
+        order = shuffled_order(entry, 7)
+
+        assert shuffled_order(entry, 7) is order
+        assert sorted(order.ids) == list(range(1, 11))
+        assert list(order.keys) == sorted(shuffle_key(i, 7) for i in range(1, 11))
+
+        monkeypatch.setattr(settings, "FEED_SHUFFLE_ORDERS_PER_ENTRY", 2)
+        shuffled_order(entry, 8)
+        shuffled_order(entry, 9)
+        assert list(entry.derived["shuffle"]) == [8, 9]
+
+    def test_start_after_cursor(self):
+        order = shuffled_order(make_entry(10), 7)
+
+        assert order.start_after(None) == 0
+        assert order.start_after((order.keys[3], order.ids[3])) == 4
+        assert order.start_after((order.keys[-1], order.ids[-1])) == 10
+
+
+class TestContentsByTag:
+    def test_create_content_invalidates_cache(self, client, create_test_user1):
+        with TestingSessionLocal() as db:
+            db.add(Tags(id=1, name="TestTagName1", description="TestTagDescription"))
+            db.commit()
+
+        response = client.get("/api/v1/contents?username=TestUser&tag=TestTagName1")
+        assert response.json() == []
+
+        response = client.post(
+            "/api/v1/contents?username=TestUser",
+            data={
+                "name": "TestContent",
+                "description": "TestDescription",
+                "tags": "1",
+                "publisher_type": "user",
+            },
+        )
+        assert response.status_code == 201
+
+        response = client.get("/api/v1/contents?username=TestUser&tag=TestTagName1")
+        data = response.json()
+
+        assert response.status_code == 200
+        assert [item["name"] for item in data] == ["TestContent"]
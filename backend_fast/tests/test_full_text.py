@@ -0,0 +1,50 @@
+from sqlalchemy.dialects import postgresql
+
+from api.search import build_text_search
+from models import Content
+from settings import settings
+from tests.conftest import TestingSessionLocal
+from utils.full_text import (
+    full_text_enabled,
+    full_text_filter,
+    full_text_rank,
+    prefix_tsquery,
+    search_words,
+)
+
+
+def postgres_sql(clause) -> str:
+    return str(
+        clause.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+class TestFullTextSearch:
+    def test_words_drop_tsquery_syntax(self):
+        assert search_words("Джаз & (рок) | !блюз:*") == ["джаз", "рок", "блюз"]
+        assert search_words("  &| ") == []
+
+    def test_postgres_query_uses_vector_prefixes_and_rank(self):
+        tsquery = prefix_tsquery(["джаз", "концерт"])
+
+        assert postgres_sql(full_text_filter(tsquery)) == (
+            "event_content.search_vector @@ "
+            "to_tsquery('russian'::regconfig, 'джаз:* & концерт:*')"
+        )
+        rank = postgres_sql(full_text_rank(tsquery))
+        assert rank.startswith(
+            "ts_rank_cd('{0, 0.3, 0.5, 1.0}'::real[], event_content.search_vector"
+        )
+
+    def test_sqlite_falls_back_to_like(self, monkeypatch):
+        monkeypatch.setattr(settings, "FULL_TEXT_SEARCH", True)
+        with TestingSessionLocal() as db:
+            assert not full_text_enabled(db)
+            text_filter, relevance = build_text_search(db, "джаз")
+
+        with TestingSessionLocal() as db:
+            sql = str(db.query(Content.id).filter(text_filter))
+        assert "lower(event_content.name) LIKE" in sql
+        assert relevance is not None
@@ -0,0 +1,120 @@
+import pytest
+
+from models import Content
+from tests.conftest import TestingSessionLocal
+
+
+def assert_revalidated(client, url):
+    """Повторный запрос с ETag первого ответа получает 304 без тела"""
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    return etag
+
+
+def assert_changed(client, url, etag):
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    return response
+
+
+@pytest.mark.usefixtures("create_test_user1", "create_test_content1")
+class TestConditionalGet:
+    def test_content(self, client):
+        with TestingSessionLocal() as db:
+            content = db.get(Content, 1)
+            content.contact = [{"phone": "+70000000000"}]
+            content.event_type = "offline"
+            content.publisher_type = "user"
+            content.publisher_id = 1
+            db.commit()
+
+        etag = assert_revalidated(client, "/api/v1/contents/1")
+        assert client.get("/api/v1/contents/1").headers["Cache-Control"] == (
+            "public, max-age=60"
+        )
+
+        with TestingSessionLocal() as db:
+            db.get(Content, 1).name = "Новое имя"
+            db.commit()
+
+        response = assert_changed(client, "/api/v1/contents/1", etag)
+        assert response.json()["name"] == "Новое имя"
+
+        # как refresh_macro_category в Django: updated не меняется
+        etag = response.headers["ETag"]
+        with TestingSessionLocal() as db:
+            db.query(Content).filter(Content.id == 1).update(
+                {Content.macro_category: "events", Content.updated: Content.updated}
+            )
+            db.commit()
+
+        response = assert_changed(client, "/api/v1/contents/1", etag)
+        assert response.json()["macro_category"] == "events"
+
+    def test_reviews(self, client):
+        url = "/api/v1/reviews?content_id=1"
+        etag = assert_revalidated(client, url)
+        assert client.get(url).headers["Cache-Control"] == "public, max-age=30"
+
+        client.post(
+            "/api/v1/reviews",
+            json={"username": "TestUser", "content_id": 1, "text": "Отзыв"},
+        )
+
+        response = assert_changed(client, url, etag)
+        assert response.json()["total_count"] == 1
+
+    def test_rating_stats(self, client):
+        url = "/api/v1/ratings/stats/1"
+        etag = assert_revalidated(client, url)
+
+        client.post(
+            "/api/v1/ratings",
+            json={"username": "TestUser", "content_id": 1, "rating": 4},
+        )
+        etag = assert_changed(client, url, etag).headers["ETag"]
+        assert_revalidated(client, url)
+
+        client.post(
+            "/api/v1/ratings",
+            json={"username": "TestUser", "content_id": 1, "rating": 5},
+        )
+        response = assert_changed(client, url, etag)
+        assert response.json()["ratings_distribution"] == {"5": 1}
+
+    def test_route(self, client):
+        response = client.post(
+            "/api/v1/routes",
+            json={
+                "name": "Маршрут",
+                "description": "Маршрут",
+                "duration_km": "5",
+                "duration_hours": "2",
+                "map_link": "https://maps.example",
+                "places": [1],
+                "tags": [],
+            },
+        )
+        url = f"/api/v1/routes/{response.json()['id']}"
+        etag = assert_revalidated(client, url)
+        assert client.get(url).headers["Cache-Control"] == "public, max-age=300"
+
+        with TestingSessionLocal() as db:
+            db.get(Content, 1).name = "Новое имя"
+            db.commit()
+
+        response = assert_changed(client, url, etag)
+        assert response.json()["places"][0]["name"] == "Новое имя"
+
+    def test_not_found_has_no_etag(self, client):
+        response = client.get("/api/v1/contents/99")
+
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
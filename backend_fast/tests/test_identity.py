@@ -0,0 +1,73 @@
+from models import User
+from tests.conftest import TestingSessionLocal
+from utils.cache_versions import bump_cache_version, version_watcher
+from utils.identity import USERS_SCOPE, IdentityCache, identity_cache
+
+
+class TestIdentityCache:
+    def test_hit_after_first_lookup(self, create_test_user1):
+        cache = IdentityCache(max_users=10, ttl=60)
+        with TestingSessionLocal() as db:
+            first = cache.get(db, "TestUser")
+            second = cache.get(db, "TestUser")
+
+        assert first == second
+        assert first.username == "TestUser"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_missing_user_is_not_cached(self, client):
+        cache = IdentityCache(max_users=10, ttl=60)
+        with TestingSessionLocal() as db:
+            assert cache.get(db, "Nobody") is None
+            db.add(User(username="Nobody"))
+            db.commit()
+
+            assert cache.get(db, "Nobody") is not None
+
+    def test_lru_eviction(self, create_test_user1, create_test_user2):
+        cache = IdentityCache(max_users=1, ttl=60)
+        with TestingSessionLocal() as db:
+            cache.get(db, "TestUser")
+            cache.get(db, "TestUser2")
+
+        assert cache.stats()["users"] == 1
+
+    def test_version_bump_clears_cache(self, create_test_user1):
+        cache = IdentityCache(max_users=10, ttl=60)
+        with TestingSessionLocal() as db:
+            cache.get(db, "TestUser")
+            db.query(User).filter(User.username == "TestUser").update(
+                {User.city: "spb"}
+            )
+            bump_cache_version(db, USERS_SCOPE)
+            db.commit()
+            version_watcher.forget()
+
+            assert cache.get(db, "TestUser").city == "spb"
+
+
+class TestIdentityEndpoints:
+    def test_change_city_invalidates_cache(self, client):
+        client.post("/api/v1/register", json={"username": "mover", "city": "nn"})
+        assert client.get("/api/v1/users?username=mover").json()["city"] == "nn"
+
+        client.patch("/api/v1/users", json={"username": "mover", "city": "spb"})
+
+        assert client.get("/api/v1/users?username=mover").json()["city"] == "spb"
+
+    def test_unknown_user_is_404(self, client):
+        response = client.get("/api/v1/preferences/categories?username=ghost")
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "User not found"}
+
+    def test_cache_stats(self, client, create_test_user1):
+        client.get("/api/v1/users?username=TestUser")
+        client.get("/api/v1/users?username=TestUser")
+
+        stats = client.get("/api/v1/cache/stats").json()
+
+        assert stats["identity"]["hits"] == identity_cache.hits == 1
+        assert stats["identity"]["misses"] == 1
+        assert "feed_candidates" in stats
@@ -0,0 +1,77 @@
+import gzip
+import json
+
+import pytest
+from loguru import logger as loguru_logger
+
+from settings import settings
+from utils.logs import QueuedJsonSink
+
+
+@pytest.fixture()
+def records():
+    """Все записи, дошедшие до loguru, включая DEBUG"""
+    captured = []
+    handler_id = loguru_logger.add(
+        lambda message: captured.append(message.record), level="DEBUG"
+    )
+    yield captured
+    loguru_logger.remove(handler_id)
+
+
+def messages(records, level):
+    return [record["message"] for record in records if record["level"].name == level]
+
+
+class TestRequestLogging:
+    def test_info_is_sampled_per_route(self, client, records, monkeypatch):
+        monkeypatch.setitem(settings.LOG_INFO_SAMPLE_RATES, "/api/v1/cities", 0.0)
+        monkeypatch.setitem(settings.LOG_INFO_SAMPLE_RATES, "/api/v1/users", 0.0)
+
+        client.get("/api/v1/cities")
+        client.get("/api/v1/users?username=ghost")
+
+        assert messages(records, "INFO") == []
+        assert messages(records, "WARNING") == ["User ghost not found"]
+        assert records[0]["extra"]["route"] == "/api/v1/users"
+
+    def test_debug_header_enables_sql_and_payloads(self, client, records, monkeypatch):
+        monkeypatch.setattr(settings, "LOG_DEBUG_TOKEN", "secret")
+
+        client.get("/api/v1/routes")
+        client.get("/api/v1/cities", headers={"X-Debug-Log": "wrong"})
+        assert messages(records, "DEBUG") == []
+
+        client.get("/api/v1/routes", headers={"X-Debug-Log": "secret"})
+        client.get("/api/v1/cities", headers={"X-Debug-Log": "secret"})
+
+        debug = messages(records, "DEBUG")
+        assert any(message.startswith("SQL SELECT") for message in debug)
+        assert "List of cities: ['spb', 'msk', 'ekb', 'nsk', 'nn']" in debug
+
+    def test_request_id_header_is_kept(self, client, records):
+        client.get("/api/v1/cities", headers={"X-Request-ID": "abc"})
+
+        assert {record["extra"]["request_id"] for record in records} == {"abc"}
+
+
+class TestQueuedJsonSink:
+    def test_writes_json_lines_and_rotates(self, tmp_path):
+        path = tmp_path / "fast.log"
+        sink = QueuedJsonSink(str(path), rotation_bytes=200)
+        handler_id = loguru_logger.add(sink, format="{message}")
+        try:
+            loguru_logger.bind(user="TestUser").info("first")
+            loguru_logger.info("second {}", "x" * 200)
+            loguru_logger.info("third")
+            sink.wait_written()
+        finally:
+            loguru_logger.remove(handler_id)
+
+        rotated = list(tmp_path.glob("fast.log.*.gz"))
+        assert len(rotated) == 1
+        with gzip.open(rotated[0]) as f:
+            first = json.loads(f.readline())
+        assert first["message"] == "first"
+        assert first["extra"] == {"user": "TestUser"}
+        assert json.loads(path.read_text())["message"] == "third"
@@ -0,0 +1,101 @@
+import threading
+
+from utils.metrics import (
+    MetricsRegistry,
+    RequestMetrics,
+    metrics_registry,
+    render_prometheus,
+    track_minio,
+)
+
+
+def sample(text, line_start):
+    """Значение первой строки экспозиции с таким началом"""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_start} not found")
+
+
+class TestMetricsEndpoint:
+    def test_records_route_template_status_and_sql(self, client, create_test_content1):
+        client.get("/api/v1/ratings/stats/1")
+        client.get("/api/v1/ratings/stats/1")
+        client.get("/api/v1/ratings/stats/999")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+
+        labels = 'method="GET",route="/api/v1/ratings/stats/{content_id}"'
+        assert sample(text, f'afisha_http_requests_total{{{labels},status="200"}}') == 2
+        assert sample(text, f'afisha_http_requests_total{{{labels},status="404"}}') == 1
+        assert (
+            sample(text, f"afisha_http_request_duration_seconds_count{{{labels}}}") == 3
+        )
+        assert sample(text, f"afisha_db_statements_per_request_sum{{{labels}}}") >= 3
+        assert sample(text, f"afisha_http_response_size_bytes_sum{{{labels}}}") > 0
+        # шаблон, а не конкретные пути
+        assert "/api/v1/ratings/stats/999" not in text
+
+    def test_async_engine_statements_are_counted(self, client):
+        client.get("/api/v1/search?q=jazz")
+
+        text = client.get("/metrics").text
+        labels = 'method="GET",route="/api/v1/search"'
+        assert sample(text, f"afisha_db_statements_per_request_sum{{{labels}}}") >= 1
+
+    def test_unknown_paths_share_one_series(self, client):
+        client.get("/no/such/path")
+        client.get("/another/one")
+
+        text = client.get("/metrics").text
+        labels = 'method="GET",route="unmatched",status="404"'
+        assert sample(text, f"afisha_http_requests_total{{{labels}}}") == 2
+
+
+class TestMetricsRegistry:
+    def test_shards_from_threads_are_summed(self):
+        registry = MetricsRegistry()
+        request = RequestMetrics()
+        request.statements = 4
+
+        def work():
+            for _ in range(1000):
+                registry.observe("GET", "/x", 200, 0.02, 100, request)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        text = render_prometheus(registry)
+        labels = 'method="GET",route="/x"'
+        assert (
+            sample(text, f"afisha_http_request_duration_seconds_count{{{labels}}}")
+            == 4000
+        )
+        assert (
+            sample(
+                text,
+                f'afisha_http_request_duration_seconds_bucket{{{labels},le="0.01"}}',
+            )
+            == 0
+        )
+        assert (
+            sample(
+                text,
+                f'afisha_http_request_duration_seconds_bucket{{{labels},le="0.025"}}',
+            )
+            == 4000
+        )
+        assert (
+            sample(text, f"afisha_db_statements_per_request_sum{{{labels}}}") == 16000
+        )
+
+    def test_minio_time_outside_request_is_ignored(self):
+        with track_minio():
+            pass
+        assert metrics_registry.collect() == {}
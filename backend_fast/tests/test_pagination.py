@@ -0,0 +1,144 @@
+from datetime import date, datetime, timedelta
+
+from models import Content, ContentTags, Like, Tags, User
+from tests.conftest import TestingSessionLocal
+from utils.pagination import NEXT_CURSOR_HEADER, SortKey, keyset_filter
+
+START_DATES = [date(2025, 1, 3), None, date(2025, 1, 1), date(2025, 1, 3), None]
+
+
+def create_contents(publisher_id=None, tag_id=None):
+    with TestingSessionLocal() as db:
+        for i, date_start in enumerate(START_DATES, start=1):
+            content = Content(
+                # У нечётных «jazz» в названии (10 баллов), у чётных — в описании (3)
+                name=f"Jazz concert {i}" if i % 2 else f"Concert {i}",
+                description="TestDescription" if i % 2 else "Jazz",
+                contact=[{}],
+                unique_id=f"test_pagination_{i}",
+                date_start=date_start,
+                created=datetime(2025, 1, 1) + timedelta(hours=i % 3),
+            )
+            if publisher_id:
+                content.publisher_type = "user"
+                content.publisher_id = publisher_id
+            db.add(content)
+            db.flush()
+            if tag_id:
+                db.add(ContentTags(content_id=content.id, tags_id=tag_id))
+        db.commit()
+
+
+def collect_header_pages(client, url, params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        response = client.get(
+            url, params={**params, "cursor": cursor} if cursor else params
+        )
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.json()]
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids, pages
+
+
+class TestKeysetFilter:
+    def test_filter_sql(self):
+        condition = keyset_filter(
+            [SortKey(Content.date_start, nulls_last=True), SortKey(Content.id)],
+            [date(2025, 1, 1), 5],
+        )
+        sql = str(condition.compile(compile_kwargs={"literal_binds": True}))
+
+        assert "event_content.date_start IS NULL" in sql
+        assert "event_content.id > 5" in sql
+
+
+class TestUserContentsPagination:
+    def test_cursor_pages(self, client, create_test_user1):
+        with TestingSessionLocal() as db:
+            user_id = db.query(User.id).filter(User.username == "TestUser").scalar()
+        create_contents(publisher_id=user_id)
+
+        url = "/api/v1/users/TestUser/contents"
+        full = [item["id"] for item in client.get(url).json()]
+        ids, pages = collect_header_pages(client, url, {"limit": 2})
+
+        assert full == [3, 4, 1, 5, 2]
+        assert ids == full
+        assert pages == 3
+
+    def test_invalid_cursor(self, client, create_test_user1):
+        response = client.get(
+            "/api/v1/users/TestUser/contents", params={"cursor": "garbage"}
+        )
+
+        assert response.status_code == 400
+
+
+class TestLikedPagination:
+    def test_cursor_pages(self, client, create_test_user1):
+        create_contents()
+        with TestingSessionLocal() as db:
+            user_id = db.query(User.id).filter(User.username == "TestUser").scalar()
+            for content_id in (2, 5, 1, 4):
+                db.add(
+                    Like(
+                        user_id=user_id,
+                        content_id=content_id,
+                        value=True,
+                        created=datetime(2025, 2, 1) + timedelta(days=content_id % 2),
+                    )
+                )
+            db.commit()
+
+        ids, pages = collect_header_pages(
+            client, "/api/v1/contents/liked", {"username": "TestUser", "limit": 3}
+        )
+
+        assert ids == [5, 1, 4, 2]
+        assert pages == 2
+
+
+class TestContentsByTagPagination:
+    def test_cursor_pages(self, client, create_test_user1):
+        with TestingSessionLocal() as db:
+            db.add(Tags(id=1, name="TestTag", description="TestTag"))
+            db.commit()
+        create_contents(tag_id=1)
+
+        params = {"username": "TestUser", "tag": "TestTag"}
+        full = [
+            item["id"] for item in client.get("/api/v1/contents", params=params).json()
+        ]
+        ids, pages = collect_header_pages(
+            client, "/api/v1/contents", {**params, "limit": 2}
+        )
+
+        assert full == [3, 1, 4, 2, 5]
+        assert ids == full
+        assert pages == 3
+
+
+class TestSearchPagination:
+    def test_cursor_pages_by_relevance(self, client):
+        create_contents()
+
+        full = client.get("/api/v1/search", params={"q": "jazz", "limit": 10}).json()
+        ids, cursor = [], None
+        while True:
+            params = {"q": "jazz", "limit": 2, "with_total": False}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/api/v1/search", params=params).json()
+            assert data["total_count"] is None
+            ids += [item["id"] for item in data["contents"]]
+            cursor = data["next_cursor"]
+            assert data["has_more"] == (cursor is not None)
+            if not cursor:
+                break
+
+        assert full["total_count"] == 5
+        assert ids == [item["id"] for item in full["contents"]]
+        assert ids == [3, 1, 5, 4, 2]
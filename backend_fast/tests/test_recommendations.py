@@ -0,0 +1,84 @@
+import numpy as np
+
+from models import ContentNeighbours, Like, User
+from tests.conftest import TestingSessionLocal
+from utils.item_neighbours import (
+    compute_item_neighbours,
+    load_likes,
+    merge_neighbours,
+    save_item_neighbours,
+)
+
+
+def as_arrays(likes):
+    user_ids, content_ids = zip(*likes)
+    return (
+        np.array(user_ids),
+        np.array(content_ids),
+        np.arange(1, len(likes) + 1),
+    )
+
+
+class TestItemNeighbours:
+    def test_cosine_neighbours(self):
+        # 1 и 2 лайкают одни и те же пользователи, 3 — только один из них
+        likes = [(1, 1), (1, 2), (2, 1), (2, 2), (3, 1), (3, 3)]
+        neighbours = dict(compute_item_neighbours(*as_arrays(likes), min_common=1))
+
+        assert [n for n, _ in neighbours[1]] == [2, 3]
+        assert neighbours[2] == [[1, round(2 / np.sqrt(6), 4)]]
+        assert neighbours[3] == [[1, round(1 / np.sqrt(3), 4)]]
+
+    def test_min_common_and_top_n(self):
+        likes = [(1, 1), (1, 2), (2, 1), (2, 2), (3, 1), (3, 3)]
+        neighbours = dict(
+            compute_item_neighbours(*as_arrays(likes), top_n=1, min_common=2)
+        )
+
+        assert neighbours == {1: [[2, 0.8165]], 2: [[1, 0.8165]]}
+
+    def test_max_user_likes_keeps_recent(self):
+        likes = [(1, 1), (1, 2), (1, 3)]
+        neighbours = dict(
+            compute_item_neighbours(*as_arrays(likes), min_common=1, max_user_likes=2)
+        )
+
+        assert set(neighbours) == {2, 3}
+
+    def test_merge_neighbours(self):
+        merged = merge_neighbours(
+            [[[5, 0.5], [6, 0.4]], [[6, 0.3], [7, 0.9]]], exclusions={7}, limit=5
+        )
+
+        assert merged == [6, 5]
+
+
+class TestRecommendations:
+    def test_recommendations(self, client, create_test_feed_contents):
+        with TestingSessionLocal() as db:
+            users = [User(username=f"TestUser{i}") for i in range(3)]
+            db.add_all(users)
+            db.flush()
+            for user in users[1:]:
+                db.add_all(
+                    Like(user_id=user.id, content_id=content_id, value=True)
+                    for content_id in (1, 2, 3)
+                )
+            db.add(Like(user_id=users[0].id, content_id=1, value=True))
+            db.commit()
+
+            saved = save_item_neighbours(db, compute_item_neighbours(*load_likes(db)))
+            assert saved == 3
+            assert db.query(ContentNeighbours).count() == 3
+
+        response = client.get(
+            "/api/v1/recommendations", params={"username": "TestUser0"}
+        )
+
+        assert response.status_code == 200
+        assert sorted(content["id"] for content in response.json()) == [2, 3]
+
+    def test_user_not_found(self, client):
+        response = client.get("/api/v1/recommendations", params={"username": "nobody"})
+
+        assert response.status_code == 404
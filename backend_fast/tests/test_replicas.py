@@ -0,0 +1,158 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from fast import app
+from models import Base, Content, User, get_async_read_db, get_read_db
+from tests.conftest import AsyncTestingSessionLocal, TestingSessionLocal, engine
+from utils.counting import CountMode
+from utils.feed_cache import feed_candidate_cache
+from utils.replicas import ReadRouter, ReadYourWrites, read_your_writes
+from utils.search_cache import SearchPage, search_cache_key, search_result_cache
+
+
+@pytest.fixture()
+def replica(client, tmp_path, monkeypatch):
+    """
+    Второй файл SQLite как реплика: читающие эндпоинты идут в него,
+    записи — в основную тестовую базу. replicate() переносит данные,
+    как это сделала бы репликация.
+    """
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    replica_engine = create_engine(url, connect_args={"check_same_thread": False})
+    async_replica_engine = create_async_engine(models.async_database_url(url))
+    Base.metadata.create_all(bind=replica_engine)
+
+    monkeypatch.setattr(
+        models,
+        "read_router",
+        ReadRouter(TestingSessionLocal, [sessionmaker(bind=replica_engine)]),
+    )
+    monkeypatch.setattr(
+        models,
+        "async_read_router",
+        ReadRouter(
+            AsyncTestingSessionLocal,
+            [sessionmaker(bind=async_replica_engine, class_=AsyncSession)],
+        ),
+    )
+    app.dependency_overrides.pop(get_read_db)
+    app.dependency_overrides.pop(get_async_read_db)
+
+    def replicate():
+        with engine.connect() as source, replica_engine.begin() as target:
+            for table in reversed(Base.metadata.sorted_tables):
+                target.execute(table.delete())
+            for table in Base.metadata.sorted_tables:
+                rows = [dict(row._mapping) for row in source.execute(table.select())]
+                if rows:
+                    target.execute(table.insert(), rows)
+
+    yield replicate
+    replica_engine.dispose()
+
+
+class TestReadRouter:
+    def test_round_robin_over_replicas(self):
+        router = ReadRouter("primary", ["replica1", "replica2"])
+        request = SimpleNamespace(path_params={}, query_params={})
+
+        picked = [router.sessionmaker_for(request) for _ in range(4)]
+
+        assert picked == ["replica1", "replica2", "replica1", "replica2"]
+
+    def test_without_replicas_reads_primary(self):
+        request = SimpleNamespace(path_params={}, query_params={"username": "a"})
+
+        assert ReadRouter("primary").sessionmaker_for(request) == "primary"
+
+    def test_sticky_window_expires(self):
+        sticky = ReadYourWrites(window=0)
+        sticky.mark("TestUser")
+
+        assert not sticky.is_sticky("TestUser")
+
+
+class TestReadYourWrites:
+    def test_reads_follow_writer_to_primary(
+        self, client, replica, create_test_user1, create_test_feed_contents
+    ):
+        replica()
+        client.post("/api/v1/like", json={"username": "TestUser", "content_id": 2})
+
+        # Автор лайка сразу видит его: чтение идёт в primary
+        liked = client.get("/api/v1/contents/liked?username=TestUser").json()
+        assert [content["id"] for content in liked] == [2]
+
+        # После окна прилипания — снова реплика, которая ещё отстаёт
+        read_your_writes.clear()
+        assert client.get("/api/v1/contents/liked?username=TestUser").json() == []
+
+        replica()
+        liked = client.get("/api/v1/contents/liked?username=TestUser").json()
+        assert [content["id"] for content in liked] == [2]
+
+    def test_sync_read_route_uses_replica(
+        self, client, replica, create_test_user1, create_test_content1
+    ):
+        replica()
+        client.post(
+            "/api/v1/reviews",
+            json={"username": "TestUser", "content_id": 1, "text": "Отлично"},
+        )
+
+        response = client.get("/api/v1/users/TestUser/reviews")
+        assert response.json()["total_count"] == 1
+
+        read_your_writes.clear()
+        response = client.get("/api/v1/users/TestUser/reviews")
+        assert response.json()["total_count"] == 0
+
+    def test_read_endpoint_resolves_user_on_read_session(
+        self, client, replica, create_test_user1
+    ):
+        replica()
+        with TestingSessionLocal() as db:
+            db.query(User).delete()
+            db.commit()
+
+        # пользователь есть только на реплике: второй сессии к primary нет
+        response = client.get("/api/v1/recommendations?username=TestUser")
+        assert response.status_code == 200
+
+
+class TestCachesPerDatabase:
+    """Запись, заполненная с отстающей реплики, не отдаётся чтению с primary"""
+
+    @pytest.fixture()
+    def lagging(self, replica, create_test_feed_contents):
+        replica()
+        with TestingSessionLocal() as db:
+            db.add(Content(name="Новое", description="Описание", city="nn"))
+            db.commit()
+
+    @pytest.mark.usefixtures("lagging")
+    def test_feed_candidates(self):
+        with models.read_router.replicas[0]() as replica_db:
+            stale = feed_candidate_cache.get(replica_db, "nn")
+        with TestingSessionLocal() as db:
+            fresh = feed_candidate_cache.get(db, "nn")
+
+        assert len(fresh.ids) == len(stale.ids) + 1
+
+    @pytest.mark.usefixtures("lagging")
+    def test_search_pages(self):
+        key = search_cache_key(
+            None, "nn", None, None, None, None, 0, 10, CountMode.EXACT
+        )
+        with models.read_router.replicas[0]() as replica_db:
+            page, version = search_result_cache.lookup(replica_db, key, "nn")
+            search_result_cache.store(
+                replica_db, key, version, SearchPage([1], 1, False, None)
+            )
+        with TestingSessionLocal() as db:
+            assert search_result_cache.lookup(db, key, "nn")[0] is None
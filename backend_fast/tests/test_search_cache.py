@@ -0,0 +1,102 @@
+import pytest
+
+from models import Content, Tags, User
+from tests.conftest import TestingSessionLocal
+from utils.cache_versions import bump_content_version, version_watcher
+from utils.counting import CountMode
+from utils.search_cache import search_cache_key, search_result_cache
+
+CONTACT = [{"phone": "+70000000000"}]
+
+
+@pytest.fixture()
+def jazz_contents(client):
+    with TestingSessionLocal() as db:
+        db.add(User(id=1, username="TestUser", city="nn"))
+        db.add(Tags(id=1, name="Tag1", description="Tag"))
+        db.add_all(
+            Content(
+                id=i,
+                name=f"джаз концерт {i}",
+                description="Описание",
+                contact=CONTACT,
+                city="nn" if i < 4 else "spb",
+            )
+            for i in range(1, 6)
+        )
+        db.commit()
+
+
+def search_ids(client, **params):
+    response = client.get("/api/v1/search", params=params).json()
+    return [content["id"] for content in response["contents"]], response
+
+
+class TestSearchResultCache:
+    def test_key_normalizes_words(self):
+        args = ("nn", None, None, None, [2, 1], 0, 20, CountMode.EXACT)
+        assert search_cache_key("Концерт  джаз", *args) == search_cache_key(
+            "джаз концерт", "nn", None, None, None, [1, 2, 1], 0, 20, CountMode.EXACT
+        )
+        assert search_cache_key("джаз", *args) != search_cache_key(
+            "джаз", "spb", *args[1:]
+        )
+
+    def test_repeated_search_is_served_from_cache(self, client, jazz_contents):
+        first, first_response = search_ids(client, q="джаз концерт", city="nn", limit=2)
+        second, second_response = search_ids(
+            client, q="концерт  ДЖАЗ", city="nn", limit=2
+        )
+
+        assert first == second == [1, 2]
+        assert second_response["total_count"] == 3
+        assert second_response["next_cursor"] == first_response["next_cursor"]
+        assert search_result_cache.stats()["hits"] == 1
+
+    def test_content_write_invalidates_city(self, client, jazz_contents):
+        search_ids(client, q="джаз", city="nn")
+        search_ids(client, q="джаз", city="spb")
+
+        response = client.post(
+            "/api/v1/contents?username=TestUser",
+            data={
+                "name": "джаз ночью",
+                "description": "Описание",
+                "city": "nn",
+                "tags": "1",
+                "contact": '[{"phone": "+70000000000"}]',
+                "publisher_type": "user",
+            },
+        )
+        assert response.status_code == 201
+
+        ids, _ = search_ids(client, q="джаз", city="nn")
+        assert len(ids) == 4
+        search_ids(client, q="джаз", city="spb")
+        assert search_result_cache.stats()["hits"] == 1
+
+    def test_other_process_write_invalidates_by_version(self, client, jazz_contents):
+        search_ids(client, q="джаз", city="nn")
+        with TestingSessionLocal() as db:
+            db.query(Content).filter(Content.id == 1).delete()
+            bump_content_version(db, "nn")
+            db.commit()
+        version_watcher.forget()
+
+        ids, _ = search_ids(client, q="джаз", city="nn")
+        assert ids == [2, 3]
+
+    def test_cursor_pages_are_not_cached(self, client, jazz_contents):
+        _, response = search_ids(client, q="джаз", city="nn", limit=1)
+        search_ids(client, q="джаз", city="nn", limit=1, cursor=response["next_cursor"])
+        search_ids(client, q="джаз", city="nn", limit=1, cursor=response["next_cursor"])
+
+        assert search_result_cache.stats()["entries"] == 1
+
+    def test_hit_ratio_metric(self, client, jazz_contents):
+        search_ids(client, q="джаз")
+        search_ids(client, q="джаз")
+
+        metrics = client.get("/metrics").text
+        assert 'afisha_cache_hits_total{cache="search_results"} 1' in metrics
+        assert 'afisha_cache_hit_ratio{cache="search_results"} 0.5' in metrics
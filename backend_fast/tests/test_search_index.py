@@ -0,0 +1,193 @@
+import datetime
+
+import pytest
+
+from models import Content, ContentTags, Tags, User
+from settings import settings
+from tests.conftest import TestingSessionLocal
+from utils.cache_versions import bump_content_version
+from utils.search_index import SearchIndex, search_index, tokenize
+
+TODAY = datetime.date.today()
+CONTACT = [{"phone": "+70000000000"}]
+
+
+def day(offset):
+    return TODAY + datetime.timedelta(days=offset)
+
+
+@pytest.fixture()
+def search_contents(client):
+    with TestingSessionLocal() as db:
+        db.add(User(id=1, username="TestUser", city="nn"))
+        db.add_all(Tags(id=i, name=f"Tag{i}", description="Tag") for i in range(1, 3))
+        db.add_all(
+            [
+                Content(
+                    id=1,
+                    name="джаз концерт",
+                    description="вечер",
+                    location="филармония",
+                    city="nn",
+                    event_type="offline",
+                    contact=CONTACT,
+                    date_start=day(3),
+                    date_end=day(3),
+                ),
+                Content(
+                    id=2,
+                    name="рок фестиваль",
+                    description="джазовые и рок группы",
+                    location="парк",
+                    city="nn",
+                    event_type="offline",
+                    contact=CONTACT,
+                    date_start=day(1),
+                    date_end=day(2),
+                ),
+                Content(
+                    id=3,
+                    name="лекция",
+                    description="история",
+                    location="джаз клуб",
+                    city="nn",
+                    event_type="online",
+                    contact=CONTACT,
+                ),
+                Content(
+                    id=4,
+                    name="джаз в парке",
+                    description="Ёлка",
+                    location="парк",
+                    city="spb",
+                    event_type="offline",
+                    contact=CONTACT,
+                    date_start=day(5),
+                ),
+            ]
+        )
+        db.flush()
+        db.add_all(
+            [
+                ContentTags(content_id=1, tags_id=1),
+                ContentTags(content_id=2, tags_id=2),
+                ContentTags(content_id=4, tags_id=1),
+            ]
+        )
+        bump_content_version(db, "nn")
+        db.commit()
+
+
+@pytest.fixture()
+def index(search_contents):
+    index = SearchIndex()
+    index.build(TestingSessionLocal)
+    return index
+
+
+def found_ids(index, q=None, **filters):
+    rows, _, _ = index.search(q, **filters)
+    return [content_id for content_id, _, _ in rows]
+
+
+class TestSearchIndex:
+    def test_tokenize(self):
+        assert tokenize("Джаз-концерт, Ёлка!") == ["джаз", "концерт", "елка"]
+
+    def test_scores_by_field(self, index):
+        rows, total, has_more = index.search("джаз")
+
+        # 10 — название, 3 — описание, 5 — место
+        assert [(content_id, score) for content_id, score, _ in rows] == [
+            (1, 10),
+            (4, 10),
+            (3, 5),
+            (2, 3),
+        ]
+        assert total == 4
+        assert not has_more
+
+    def test_words_are_prefixes_and_all_required(self, index):
+        assert found_ids(index, "джаз рок") == [2]
+        assert found_ids(index, "елк") == [4]
+        assert found_ids(index, "азз") == []
+
+    def test_filters(self, index):
+        assert found_ids(index, "джаз", city="nn") == [1, 3, 2]
+        assert found_ids(index, "джаз", event_type="online") == [3]
+        assert found_ids(index, "джаз", tags=[1]) == [1, 4]
+        assert found_ids(index, "джаз", date_from=day(2)) == [1, 4]
+        # без дат контент проходит фильтр date_to, как и в базе
+        assert found_ids(index, "джаз", date_to=day(2)) == [3, 2]
+        assert found_ids(index, city="msk") == []
+
+    def test_order_without_query_is_by_date(self, index):
+        assert found_ids(index) == [2, 1, 4, 3]
+
+    def test_pages(self, index):
+        rows, total, has_more = index.search("джаз", limit=2)
+        assert [row[0] for row in rows] == [1, 4]
+        assert total == 4
+        assert has_more
+
+        assert found_ids(index, "джаз", skip=2, limit=2) == [3, 2]
+        assert found_ids(index, "джаз", limit=2, after=[10, day(5), 4]) == [3, 2]
+
+    def test_incremental_add_and_remove(self, index):
+        version = index.version
+        index.remove_content(1, "nn")
+        index.add_content(
+            Content(
+                id=10,
+                name="джаз ночью",
+                description=None,
+                location=None,
+                city="nn",
+                event_type="offline",
+            ),
+            [2],
+        )
+
+        assert found_ids(index, "джаз", city="nn") == [10, 3, 2]
+        assert found_ids(index, tags=[2]) == [2, 10]
+        assert index.version == version + 2
+
+
+class TestSearchEndpointWithIndex:
+    @pytest.fixture(autouse=True)
+    def enable_index(self, monkeypatch, search_contents):
+        monkeypatch.setattr(settings, "SEARCH_INDEX_ENABLED", True)
+        search_index.build(TestingSessionLocal)
+
+    def test_matches_database_search(self, client, monkeypatch):
+        params = {"q": "джаз", "city": "nn", "limit": 2}
+        from_index = client.get("/api/v1/search", params=params).json()
+        monkeypatch.setattr(settings, "SEARCH_INDEX_ENABLED", False)
+        from_db = client.get("/api/v1/search", params=params).json()
+
+        assert [c["id"] for c in from_index["contents"]] == [1, 3]
+        assert from_index == from_db
+
+        next_page = client.get(
+            "/api/v1/search", params={**params, "cursor": from_index["next_cursor"]}
+        ).json()
+        assert [c["id"] for c in next_page["contents"]] == [2]
+
+    def test_stale_index_falls_back_to_database(self, client):
+        with TestingSessionLocal() as db:
+            db.add(
+                Content(
+                    id=20,
+                    name="джаз утром",
+                    description="утро",
+                    city="nn",
+                    contact=CONTACT,
+                )
+            )
+            bump_content_version(db, "nn")
+            db.commit()
+        search_index.version -= 1  # запись другого процесса
+
+        response = client.get("/api/v1/search", params={"q": "утром"})
+
+        assert [c["id"] for c in response.json()["contents"]] == [20]
@@ -0,0 +1,45 @@
+from settings import settings
+from utils.slow_queries import SlowQueryRecorder
+
+
+class TestSlowQueries:
+    def test_admin_token_required(self, client, monkeypatch):
+        response = client.get("/api/v1/admin/slow-queries")
+        assert response.status_code == 403
+
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        response = client.get(
+            "/api/v1/admin/slow-queries", headers={"X-Admin-Token": "wrong"}
+        )
+        assert response.status_code == 403
+
+    def test_records_statement_params_and_route(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+
+        client.get("/api/v1/ratings/stats/42")
+        monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 10_000.0)
+
+        response = client.get(
+            "/api/v1/admin/slow-queries", headers={"X-Admin-Token": "secret"}
+        )
+        assert response.status_code == 200
+        entries = response.json()
+        assert entries
+        entry = entries[-1]
+        assert entry["route"] == "/api/v1/ratings/stats/42"
+        assert "FROM event_content" in entry["statement"]
+        assert "42" in entry["parameters"]
+        # на SQLite план не строится
+        assert entry["plan"] is None
+
+    def test_buffer_is_bounded(self):
+        recorder = SlowQueryRecorder(3)
+        for i in range(5):
+            recorder.record(f"SELECT {i}", (), 1000.0, "sqlite")
+
+        assert [entry["statement"] for entry in recorder.entries()] == [
+            "SELECT 4",
+            "SELECT 3",
+            "SELECT 2",
+        ]
@@ -0,0 +1,370 @@
+import datetime
+
+import pytest
+
+from settings import settings
+from models import (
+    Content,
+    ContentTags,
+    Like,
+    MacroCategory,
+    Organisation,
+    Rating,
+    Review,
+    Route,
+    RoutePhoto,
+    RoutePlaces,
+    RouteTags,
+    Tags,
+    User,
+    UserCategoryPreference,
+)
+from tests.conftest import TestingSessionLocal
+from tests.sql_budget import sql_budget
+from utils.tag_counts import reconcile_tag_counts
+
+CONTENTS = 6
+ROUTES = 3
+
+
+@pytest.fixture()
+def catalog(client):
+    """
+    Несколько строк в каждой таблице: запрос на строку (N+1) сразу
+    выходит за бюджет
+    """
+    today = datetime.date.today()
+    with TestingSessionLocal() as db:
+        db.add_all(
+            [
+                User(id=1, username="TestUser", city="nn"),
+                User(id=2, username="TestUser2", city="nn"),
+                MacroCategory(id=1, name="events", description="events"),
+            ]
+        )
+        db.add_all(
+            Tags(id=i, name=f"Tag{i}", description="Tag", macro_category_id=1)
+            for i in range(1, 4)
+        )
+        db.add(
+            Organisation(
+                id=1,
+                name="Org",
+                phone="+70000000000",
+                email="org@example.com",
+                password="x",
+                user_id=1,
+            )
+        )
+        db.add_all(
+            Content(
+                id=i,
+                name=f"джаз концерт {i}",
+                description="Описание",
+                contact=[{"phone": "+70000000000"}],
+                unique_id=f"budget_{i}",
+                date_start=today + datetime.timedelta(days=i),
+                date_end=today + datetime.timedelta(days=i),
+                macro_category="events",
+                publisher_type="organisation" if i % 2 else "user",
+                publisher_id=1,
+            )
+            for i in range(1, CONTENTS + 1)
+        )
+        db.flush()
+        db.add_all(
+            ContentTags(content_id=i, tags_id=tag_id)
+            for i in range(1, CONTENTS + 1)
+            for tag_id in (1, 2 + i % 2)
+        )
+        db.add_all(
+            UserCategoryPreference(user_id=1, tag_id=tag_id) for tag_id in (1, 2, 3)
+        )
+        db.add_all(Like(user_id=2, content_id=i, value=True) for i in range(1, 4))
+        db.add_all(
+            Review(user_id=user_id, content_id=1, text="Отзыв") for user_id in (1, 2)
+        )
+        db.add_all(
+            Rating(user_id=user_id, content_id=1, rating=4) for user_id in (1, 2)
+        )
+        for route_id in range(1, ROUTES + 1):
+            db.add(
+                Route(
+                    id=route_id,
+                    name=f"Маршрут {route_id}",
+                    description="Маршрут",
+                    duration_km="5",
+                    duration_hours="2",
+                    map_link="https://maps.example",
+                    city="nn",
+                )
+            )
+            db.flush()
+            db.add_all(
+                RoutePlaces(route_id=route_id, content_id=i) for i in range(1, 4)
+            )
+            db.add_all(RouteTags(route_id=route_id, tags_id=i) for i in (1, 2))
+            db.add_all(
+                RoutePhoto(route_id=route_id, image=f"route{i}.png", order=i)
+                for i in range(2)
+            )
+        db.flush()
+        # счётчики тегов, как их заполняет миграция
+        reconcile_tag_counts(db)
+
+
+@pytest.mark.usefixtures("catalog")
+class TestContentsBudgets:
+    def test_feed(self, client):
+        with sql_budget("GET /api/v1/contents_feed"):
+            response = client.get(
+                "/api/v1/contents_feed", params={"username": "TestUser"}
+            )
+        assert response.status_code == 200
+        assert len(response.json()) == CONTENTS
+
+    def test_contents_by_tag(self, client):
+        with sql_budget("GET /api/v1/contents"):
+            response = client.get(
+                "/api/v1/contents", params={"username": "TestUser", "tag": "Tag1"}
+            )
+        assert len(response.json()) == CONTENTS
+
+    def test_liked(self, client):
+        with sql_budget("GET /api/v1/contents/liked"):
+            response = client.get(
+                "/api/v1/contents/liked", params={"username": "TestUser2"}
+            )
+        assert len(response.json()) == 3
+
+    def test_content_detail(self, client):
+        with sql_budget("GET /api/v1/contents/{content_id}"):
+            response = client.get("/api/v1/contents/1")
+        assert response.status_code == 200
+
+    def test_user_contents(self, client):
+        with sql_budget("GET /api/v1/users/{username}/contents"):
+            response = client.get("/api/v1/users/TestUser/contents")
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestUsersBudgets:
+    def test_get_user(self, client):
+        with sql_budget("GET /api/v1/users"):
+            response = client.get("/api/v1/users", params={"username": "TestUser"})
+        assert response.status_code == 200
+
+    def test_register(self, client):
+        with sql_budget("POST /api/v1/register"):
+            response = client.post(
+                "/api/v1/register", json={"username": "NewUser", "city": "msk"}
+            )
+        assert response.status_code == 201
+
+    def test_change_city(self, client):
+        with sql_budget("PATCH /api/v1/users"):
+            response = client.patch(
+                "/api/v1/users", json={"username": "TestUser", "city": "spb"}
+            )
+        assert response.status_code == 200
+
+
+class TestCitiesBudgets:
+    def test_cities(self, client):
+        with sql_budget("GET /api/v1/cities"):
+            response = client.get("/api/v1/cities")
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestPreferencesBudgets:
+    def test_get_preferences(self, client):
+        with sql_budget("GET /api/v1/preferences/categories"):
+            response = client.get(
+                "/api/v1/preferences/categories", params={"username": "TestUser"}
+            )
+        assert response.json()["categories"] == ["Tag1", "Tag2", "Tag3"]
+
+    def test_set_preference(self, client):
+        with sql_budget("POST /api/v1/preferences/categories"):
+            response = client.post(
+                "/api/v1/preferences/categories",
+                params={"username": "TestUser2", "tag_id": 1},
+            )
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestLikesBudgets:
+    def test_like(self, client):
+        with sql_budget("POST /api/v1/like"):
+            response = client.post(
+                "/api/v1/like", json={"username": "TestUser", "content_id": 4}
+            )
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestOrganisationsBudgets:
+    def test_organisations(self, client):
+        with sql_budget("GET /api/v1/organisations"):
+            response = client.get("/api/v1/organisations")
+        assert response.status_code == 200
+
+    def test_organisation_contents(self, client):
+        with sql_budget("GET /api/v1/organisations/{organisation_id}/contents"):
+            response = client.get("/api/v1/organisations/1/contents")
+        assert response.status_code == 200
+
+    def test_user_organisations(self, client):
+        with sql_budget("GET /api/v1/users/{username}/organisations"):
+            response = client.get("/api/v1/users/TestUser/organisations")
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestFeedbackBudgets:
+    def test_feedback(self, client):
+        with sql_budget("POST /api/v1/feedback"):
+            response = client.post(
+                "/api/v1/feedback", json={"username": "TestUser", "message": "Спасибо"}
+            )
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestTagsBudgets:
+    def test_tags(self, client):
+        with sql_budget("GET /api/v1/tags"):
+            response = client.get(
+                "/api/v1/tags",
+                params={"macro_category": "events", "username": "TestUser"},
+            )
+        assert len(response.json()["tags"]) == 3
+
+    def test_tags_by_macro_category(self, client):
+        with sql_budget("GET /api/v1/tags/by-macro-category/{macro_category_name}"):
+            response = client.get("/api/v1/tags/by-macro-category/events")
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestReviewsBudgets:
+    def test_reviews_for_content(self, client):
+        with sql_budget("GET /api/v1/reviews"):
+            response = client.get("/api/v1/reviews", params={"content_id": 1})
+        assert response.json()["total_count"] == 2
+
+    def test_user_reviews(self, client):
+        with sql_budget("GET /api/v1/users/{username}/reviews"):
+            response = client.get("/api/v1/users/TestUser/reviews")
+        assert response.status_code == 200
+
+    def test_create_review(self, client):
+        with sql_budget("POST /api/v1/reviews"):
+            response = client.post(
+                "/api/v1/reviews",
+                json={"username": "TestUser", "content_id": 2, "text": "Отзыв"},
+            )
+        assert response.status_code == 201
+
+
+@pytest.mark.usefixtures("catalog")
+class TestRatingsBudgets:
+    def test_rating_stats(self, client):
+        with sql_budget("GET /api/v1/ratings/stats/{content_id}"):
+            response = client.get("/api/v1/ratings/stats/1")
+        assert response.json()["total_ratings"] == 2
+
+    def test_user_ratings(self, client):
+        with sql_budget("GET /api/v1/users/{username}/ratings"):
+            response = client.get("/api/v1/users/TestUser/ratings")
+        assert response.status_code == 200
+
+    def test_rate(self, client):
+        with sql_budget("POST /api/v1/ratings"):
+            response = client.post(
+                "/api/v1/ratings",
+                json={"username": "TestUser", "content_id": 2, "rating": 5},
+            )
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestSearchBudgets:
+    def test_search(self, client):
+        with sql_budget("GET /api/v1/search"):
+            response = client.get(
+                "/api/v1/search", params={"q": "джаз", "username": "TestUser"}
+            )
+        assert response.json()["total_count"] == CONTENTS
+
+    def test_suggestions(self, client):
+        with sql_budget("GET /api/v1/search/suggestions"):
+            response = client.get("/api/v1/search/suggestions", params={"q": "джа"})
+        assert response.status_code == 200
+
+    def test_popular_tags(self, client):
+        with sql_budget("GET /api/v1/search/popular-tags"):
+            response = client.get("/api/v1/search/popular-tags")
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestMacroCategoriesBudgets:
+    def test_macro_categories(self, client):
+        with sql_budget("GET /api/v1/macro-categories"):
+            response = client.get("/api/v1/macro-categories")
+        assert response.status_code == 200
+
+    def test_macro_category(self, client):
+        with sql_budget("GET /api/v1/macro-categories/{category_id}"):
+            response = client.get("/api/v1/macro-categories/1")
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestRoutesBudgets:
+    def test_routes(self, client):
+        with sql_budget("GET /api/v1/routes"):
+            response = client.get("/api/v1/routes", params={"city": "nn"})
+        routes = response.json()["routes"]
+        assert len(routes) == ROUTES
+        assert all(len(route["places"]) == 3 for route in routes)
+        assert all(len(route["photos"]) == 2 for route in routes)
+
+    def test_route(self, client):
+        with sql_budget("GET /api/v1/routes/{route_id}"):
+            response = client.get("/api/v1/routes/1")
+        assert response.status_code == 200
+
+
+@pytest.mark.usefixtures("catalog")
+class TestRecommendationsBudgets:
+    def test_recommendations(self, client):
+        with sql_budget("GET /api/v1/recommendations"):
+            response = client.get(
+                "/api/v1/recommendations", params={"username": "TestUser2"}
+            )
+        assert response.status_code == 200
+
+
+class TestServiceBudgets:
+    def test_cache_stats(self, client):
+        with sql_budget("GET /api/v1/cache/stats"):
+            response = client.get("/api/v1/cache/stats")
+        assert response.status_code == 200
+
+    def test_metrics(self, client):
+        with sql_budget("GET /metrics"):
+            response = client.get("/metrics")
+        assert response.status_code == 200
+
+    def test_slow_queries(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        with sql_budget("GET /api/v1/admin/slow-queries"):
+            response = client.get(
+                "/api/v1/admin/slow-queries", headers={"X-Admin-Token": "secret"}
+            )
+        assert response.status_code == 200
@@ -0,0 +1,137 @@
+import datetime
+
+import pytest
+
+from models import Content, ContentTags, Like, Organisation, Tags, User
+from settings import settings
+from tests.conftest import TestingSessionLocal
+from utils.cache_versions import bump_content_version
+from utils.suggestions import SuggestionIndex, suggestion_index
+
+CONTACT = [{"phone": "+70000000000"}]
+TODAY = datetime.date.today()
+
+
+@pytest.fixture()
+def suggestion_contents(client):
+    with TestingSessionLocal() as db:
+        db.add_all(
+            [
+                User(id=1, username="TestUser", city="nn"),
+                User(id=2, username="TestUser2", city="nn"),
+                Tags(id=1, name="Джазовые вечера", description="Tag"),
+                Organisation(
+                    id=1,
+                    name="Джаз Холл",
+                    phone="+70000000000",
+                    email="org@example.com",
+                    password="x",
+                    user_id=1,
+                ),
+            ]
+        )
+        db.add_all(
+            [
+                Content(
+                    id=1,
+                    name="Джаз в парке",
+                    description="Описание",
+                    location="Парк Швейцария",
+                    city="nn",
+                    contact=CONTACT,
+                    date_start=TODAY - datetime.timedelta(days=10),
+                    publisher_type="organisation",
+                    publisher_id=1,
+                ),
+                Content(
+                    id=2,
+                    name="Концерт: джаз",
+                    description="Описание",
+                    location="Филармония",
+                    city="nn",
+                    contact=CONTACT,
+                    date_start=TODAY + datetime.timedelta(days=3),
+                    publisher_type="user",
+                    publisher_id=1,
+                ),
+                Content(
+                    id=3,
+                    name="Джаз на Неве",
+                    description="Описание",
+                    location="Набережная",
+                    city="spb",
+                    contact=CONTACT,
+                    publisher_type="user",
+                    publisher_id=1,
+                ),
+            ]
+        )
+        db.flush()
+        db.add(ContentTags(content_id=1, tags_id=1))
+        db.add_all(
+            Like(user_id=user_id, content_id=1, value=True) for user_id in (1, 2)
+        )
+        bump_content_version(db, "nn")
+        db.commit()
+
+
+@pytest.fixture()
+def index(suggestion_contents):
+    index = SuggestionIndex()
+    index.build(TestingSessionLocal)
+    return index
+
+
+class TestSuggestionIndex:
+    def test_sources_and_popularity(self, index):
+        # 1 + 2 лайка у «Джаз в парке» против 1 + 5 у будущего концерта;
+        # место, тег и организация получают очки своего контента
+        assert index.suggest("джаз", "nn", 10) == [
+            "Концерт: джаз",
+            "Джаз в парке",
+            "Джаз Холл",
+            "Джазовые вечера",
+        ]
+        assert index.suggest("Парк", "nn", 10) == ["Джаз в парке", "Парк Швейцария"]
+
+    def test_partitioned_by_city(self, index):
+        assert index.suggest("джаз", "spb", 10) == ["Джаз на Неве"]
+        assert index.suggest("нев", None, 10) == ["Джаз на Неве"]
+        assert index.suggest("нев", "nn", 10) == []
+        assert index.suggest("джаз", "msk", 10) == []
+
+    def test_last_word_and_limit(self, index):
+        assert index.suggest("концерт фил", "nn", 10) == ["Филармония"]
+        assert index.suggest("дж", "nn", 2) == ["Концерт: джаз", "Джаз в парке"]
+
+    def test_incremental_add_and_remove(self, index):
+        version = index.version
+        index.remove_content(2, "nn")
+        index.add_content(
+            Content(id=10, name="Джаз-бранч", location=None, city="nn"), []
+        )
+
+        assert index.suggest("дж", "nn", 10) == [
+            "Джаз в парке",
+            "Джаз Холл",
+            "Джазовые вечера",
+            "Джаз-бранч",
+        ]
+        assert index.suggest("фил", "nn", 10) == []
+        assert index.version == version + 2
+
+
+class TestSuggestionsEndpointWithIndex:
+    def test_served_from_index(self, client, monkeypatch, suggestion_contents):
+        monkeypatch.setattr(settings, "SUGGESTIONS_INDEX_ENABLED", True)
+        suggestion_index.build(TestingSessionLocal)
+
+        response = client.get(
+            "/api/v1/search/suggestions",
+            params={"q": "джаз", "username": "TestUser", "limit": 2},
+        )
+
+        assert response.json() == {
+            "suggestions": ["Концерт: джаз", "Джаз в парке"],
+            "query": "джаз",
+        }
@@ -0,0 +1,182 @@
+import pytest
+
+from models import (
+    Content,
+    ContentTags,
+    Like,
+    MacroCategory,
+    RemovedFavorite,
+    TagCityCount,
+    Tags,
+    User,
+)
+from settings import settings
+from tests.conftest import TestingSessionLocal
+from utils.content_tags import content_tag_map
+from utils.exclusions import exclusion_cache
+from utils.tag_counts import city_tag_count_cache, reconcile_tag_counts
+
+CONTACT = [{"phone": "+70000000000"}]
+
+
+@pytest.fixture()
+def tagged_contents(client):
+    with TestingSessionLocal() as db:
+        db.add_all(
+            [
+                User(id=1, username="TestUser", city="nn"),
+                MacroCategory(id=1, name="events", description="events"),
+                Tags(id=1, name="Джаз", description="Tag", macro_category_id=1),
+                Tags(id=2, name="Рок", description="Tag", macro_category_id=1),
+            ]
+        )
+        db.add_all(
+            Content(
+                id=i,
+                name=f"Концерт {i}",
+                description="Описание",
+                contact=CONTACT,
+                city="nn" if i < 4 else "spb",
+            )
+            for i in range(1, 6)
+        )
+        db.flush()
+        db.add_all(ContentTags(content_id=i, tags_id=1) for i in range(1, 6))
+        db.add(ContentTags(content_id=1, tags_id=2))
+        db.flush()
+        reconcile_tag_counts(db)
+
+
+def stored_counts():
+    with TestingSessionLocal() as db:
+        return {
+            (row.tag_id, row.city): (row.content_count, row.route_count)
+            for row in db.query(TagCityCount)
+        }
+
+
+def tag_counts(client):
+    response = client.get(
+        "/api/v1/tags", params={"macro_category": "events", "username": "TestUser"}
+    )
+    return {tag["id"]: tag["count"] for tag in response.json()["tags"]}
+
+
+def create_content(client, tags):
+    return client.post(
+        "/api/v1/contents?username=TestUser",
+        data={
+            "name": "Новый концерт",
+            "description": "Описание",
+            "city": "nn",
+            "tags": tags,
+            "contact": '[{"phone": "+70000000000"}]',
+            "publisher_type": "user",
+        },
+    )
+
+
+@pytest.mark.usefixtures("tagged_contents")
+class TestTagCounts:
+    def test_tags_read_city_counts_minus_exclusions(self, client):
+        assert tag_counts(client) == {1: 3, 2: 1}
+
+        with TestingSessionLocal() as db:
+            db.add(Like(user_id=1, content_id=1, value=True))
+            db.commit()
+
+        assert tag_counts(client) == {1: 2, 2: 0}
+
+    def test_popular_tags_sum_cities(self, client):
+        response = client.get("/api/v1/search/popular-tags")
+
+        assert [
+            (tag["id"], tag["content_count"]) for tag in response.json()["popular_tags"]
+        ] == [(1, 5), (2, 1)]
+
+    def test_create_and_delete_content(self, client):
+        response = create_content(client, "1,2")
+        assert response.status_code == 201
+        assert stored_counts()[(1, "nn")] == (4, 0)
+        assert stored_counts()[(2, "nn")] == (2, 0)
+
+        client.delete(
+            f"/api/v1/contents/{response.json()['id']}", params={"username": "TestUser"}
+        )
+        assert stored_counts()[(1, "nn")] == (3, 0)
+        assert stored_counts()[(2, "nn")] == (1, 0)
+
+    def test_route_edits(self, client):
+        response = client.post(
+            "/api/v1/routes",
+            json={
+                "name": "Маршрут",
+                "description": "Маршрут",
+                "duration_km": "5",
+                "duration_hours": "2",
+                "map_link": "https://maps.example",
+                "places": [],
+                "tags": [2],
+            },
+        )
+        route_id = response.json()["id"]
+        assert stored_counts()[(2, "nn")] == (1, 1)
+
+        client.put(f"/api/v1/routes/{route_id}", json={"tags": [1]})
+        assert stored_counts()[(2, "nn")] == (1, 0)
+        assert stored_counts()[(1, "nn")] == (3, 1)
+
+        client.delete(f"/api/v1/routes/{route_id}")
+        assert stored_counts()[(1, "nn")] == (3, 0)
+
+    def test_reconcile_fixes_drift(self):
+        with TestingSessionLocal() as db:
+            db.query(TagCityCount).filter(TagCityCount.tag_id == 2).update(
+                {TagCityCount.content_count: 7}
+            )
+            db.add(TagCityCount(tag_id=2, city="msk", content_count=1))
+            db.commit()
+
+            assert reconcile_tag_counts(db) == 2
+            assert reconcile_tag_counts(db) == 0
+
+        assert stored_counts() == {
+            (1, "nn"): (3, 0),
+            (1, "spb"): (2, 0),
+            (2, "nn"): (1, 0),
+        }
+
+
+@pytest.fixture()
+def content_tags_enabled(monkeypatch, tagged_contents):
+    monkeypatch.setattr(settings, "CONTENT_TAGS_INDEX_ENABLED", True)
+    content_tag_map.build(TestingSessionLocal)
+
+
+@pytest.mark.usefixtures("content_tags_enabled")
+class TestTagCountsFromMemory:
+    def test_count_tags_by_city(self):
+        assert content_tag_map.count_tags([1, 2, 4, 99], "nn") == {1: 2, 2: 1}
+
+    def test_exclusions_subtracted_in_memory(self, client):
+        with TestingSessionLocal() as db:
+            db.add(Like(user_id=1, content_id=1, value=True))
+            db.add(RemovedFavorite(user_id=1, content_id=1))
+            db.add(Like(user_id=1, content_id=4, value=True))
+            db.commit()
+
+        assert tag_counts(client) == {1: 2, 2: 0}
+        assert tag_counts(client) == {1: 2, 2: 0}
+        assert city_tag_count_cache.stats()["hits"] == 1
+
+    def test_content_write_updates_map_and_counts(self, client):
+        assert tag_counts(client) == {1: 3, 2: 1}
+        response = create_content(client, "2")
+        assert tag_counts(client) == {1: 3, 2: 2}
+
+        with TestingSessionLocal() as db:
+            db.add(Like(user_id=1, content_id=response.json()["id"], value=True))
+            db.commit()
+        exclusion_cache.invalidate(1)
+
+        assert tag_counts(client) == {1: 3, 2: 1}
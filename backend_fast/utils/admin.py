@@ -0,0 +1,13 @@
+import hmac
+
+from fastapi import Header, HTTPException
+
+from settings import settings
+
+
+def require_admin(x_admin_token: str = Header(None)):
+    """Зависимость служебных эндпоинтов: заголовок X-Admin-Token или 403"""
+    if not settings.ADMIN_TOKEN or not x_admin_token:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,63 @@
+import functools
+import inspect
+
+import anyio.to_thread
+import greenlet
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import await_only
+
+from models import get_async_read_db
+
+
+def async_session_endpoint(endpoint):
+    """
+    Переводит синхронный читающий эндпоинт на асинхронный движок.
+
+    Тело эндпоинта остаётся обычным кодом над Session: кэши, построители
+    запросов и быстрая сериализация общие с остальным API. Но выполняется
+    оно через AsyncSession.run_sync: запросы идут через asyncpg в цикле
+    событий, а не в потоке из пула AnyIO, и число одновременных запросов
+    ограничивает пул соединений, а не число потоков.
+
+    Весь код тела при этом идёт в потоке цикла событий и на время работы
+    останавливает остальные запросы воркера. Поэтому CPU-тяжёлые части
+    без обращений к сессии (ранжирование, поиск по индексу в памяти,
+    кодирование orjson) вызываются через off_loop. Валидация response_model
+    у таких эндпоинтов тоже идёт в цикле событий: большие списки отдаются
+    через fast_json_response.
+
+    Параметр db эндпоинта получает сессию из get_async_read_db: реплику,
+    если она настроена и пользователь недавно ничего не записывал.
+    Результат должен быть готов к сериализации без ленивых загрузок (связи —
+    через joinedload/selectinload), так как ответ собирается уже вне run_sync.
+    """
+    signature = inspect.signature(endpoint)
+    parameters = [
+        parameter.replace(annotation=AsyncSession, default=Depends(get_async_read_db))
+        if name == "db"
+        else parameter
+        for name, parameter in signature.parameters.items()
+    ]
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, db: AsyncSession, **kwargs):
+        return await db.run_sync(lambda session: endpoint(*args, db=session, **kwargs))
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return wrapper
+
+
+def off_loop(func, *args, **kwargs):
+    """
+    Вызывает func в потоке из пула AnyIO, если код выполняется внутри
+    async_session_endpoint (в гринлете run_sync), и сразу на месте — в
+    обычном синхронном эндпоинте, который и так работает в пуле потоков.
+    func не должна обращаться к сессии: её ввод-вывод возможен только
+    из гринлета цикла событий.
+    """
+    if not getattr(greenlet.getcurrent(), "__sqlalchemy_greenlet_provider__", False):
+        return func(*args, **kwargs)
+    return await_only(
+        anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs))
+    )
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from models import CacheVersion
+from settings import settings
+
+
+def content_scope(city) -> str:
+    """
+    Область версии для контента города (None — контент всех городов)
+    """
+    return f"content:{city}" if city else "content:all"
+
+
+def bump_cache_version(db, scope: str):
+    """
+    Увеличивает версию области в текущей транзакции.
+    Коммит остаётся за вызывающим кодом, чтобы версия менялась
+    вместе с самими данными.
+    """
+    updated = (
+        db.query(CacheVersion)
+        .filter(CacheVersion.scope == scope)
+        .update(
+            {CacheVersion.version: CacheVersion.version + 1},
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        db.add(CacheVersion(scope=scope, version=1))
+
+
+def bump_content_version(db, city):
+    """
+    Отмечает изменение контента города: для кэшей этого города
+    и для кэшей без фильтра по городу
+    """
+    bump_cache_version(db, content_scope(city))
+    bump_cache_version(db, content_scope(None))
+
+
+class VersionWatcher:
+    """
+    Читает версии областей из event_cacheversion не чаще, чем раз
+    в CACHE_VERSION_CHECK_SECONDS. Так изменения, сделанные другими
+    процессами (Django-админка, другие воркеры), доходят до кэшей
+    без запроса к базе на каждый вызов.
+    """
+
+    def __init__(self, check_interval: float | None = None):
+        self.check_interval = (
+            settings.CACHE_VERSION_CHECK_SECONDS
+            if check_interval is None
+            else check_interval
+        )
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, db, scope: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(scope)
+        if cached and now - cached[1] < self.check_interval:
+            return cached[0]
+
+        version = (
+            db.query(CacheVersion.version).filter(CacheVersion.scope == scope).scalar()
+        ) or 0
+        with self._lock:
+            self._versions[scope] = (version, now)
+        return version
+
+    def forget(self, scope: str | None = None):
+        """
+        Сбрасывает запомненные версии, чтобы следующая проверка пошла в базу
+        """
+        with self._lock:
+            if scope is None:
+                self._versions.clear()
+            else:
+                self._versions.pop(scope, None)
+
+
+version_watcher = VersionWatcher()
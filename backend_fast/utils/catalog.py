@@ -0,0 +1,217 @@
+"""
+Справочники в памяти процесса: теги, макрокатегории и города.
+
+Они меняются редко и только в Django-админке, которая поднимает версию
+CATALOG_SCOPE в event_cacheversion. Снимок справочников читается из базы
+целиком, когда эта версия расходится с версией снимка, и до следующей
+правки отвечает без запросов: списки для эндпоинтов справочников
+и проверка ID и имён в обработчиках записи за O(1). Версия снимка —
+версия из базы, она вместе с хэшем содержимого образует ETag ответов
+справочников.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from models import MacroCategory, Tags
+from settings import settings
+from utils.cache_versions import version_watcher
+from utils.http_cache import make_etag, public_cache_control
+from utils.logs import logger
+
+CATALOG_SCOPE = "catalog"
+
+CITY_CHOICES = [
+    ("spb", "Санкт-Петербург"),
+    ("msk", "Москва"),
+    ("ekb", "Екатеринбург"),
+    ("nsk", "Новосибирск"),
+    ("nn", "Нижний Новгород"),
+]
+CITY_CODES = frozenset(code for code, _ in CITY_CHOICES)
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogTag:
+    id: int
+    name: str
+    description: Optional[str]
+    macro_category_id: Optional[int]
+    created: datetime
+    updated: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogMacroCategory:
+    id: int
+    name: str
+    description: Optional[str]
+    image: Optional[str]
+
+
+class CatalogSnapshot:
+    """Неизменяемый снимок справочников одной версии"""
+
+    def __init__(self, version: int, tags, macro_categories, cities):
+        self.version = version
+        # версия и содержимое: после сброса версии в event_cacheversion
+        # старый ETag той же версии не совпадёт с новым снимком
+        self.etag = make_etag(
+            "catalog",
+            version,
+            sorted(tags, key=lambda tag: tag.id),
+            sorted(macro_categories, key=lambda category: category.id),
+            cities,
+        )
+        self.tags_by_id = {tag.id: tag for tag in tags}
+        self.macro_categories = sorted(macro_categories, key=lambda c: c.name)
+        self.macro_categories_by_id = {c.id: c for c in self.macro_categories}
+        # при одинаковых именах — первая по порядку, как .first() в запросе
+        self.macro_categories_by_name = {}
+        for category in reversed(self.macro_categories):
+            self.macro_categories_by_name[category.name] = category
+        self.tag_ids_by_names: dict[str, list[int]] = {}
+        for tag in tags:
+            self.tag_ids_by_names.setdefault(tag.name, []).append(tag.id)
+        self.tags_by_macro_category: dict[int, list[CatalogTag]] = {}
+        for tag in sorted(tags, key=lambda tag: tag.name):
+            self.tags_by_macro_category.setdefault(tag.macro_category_id, []).append(
+                tag
+            )
+        self.cities = [code for code, _ in cities]
+
+    def tag(self, tag_id: int) -> Optional[CatalogTag]:
+        return self.tags_by_id.get(tag_id)
+
+    def tags(self, tag_ids: Iterable[int]) -> Optional[list[CatalogTag]]:
+        """Теги по ID в том же порядке; None, если какого-то нет"""
+        tags = [self.tags_by_id.get(tag_id) for tag_id in tag_ids]
+        return None if None in tags else tags
+
+    def tag_ids_by_name(self, name: str) -> list[int]:
+        """ID тегов с таким именем (имена тегов не уникальны)"""
+        return self.tag_ids_by_names.get(name, [])
+
+    def macro_category_by_name(self, name: str) -> Optional[CatalogMacroCategory]:
+        return self.macro_categories_by_name.get(name)
+
+    def macro_category_name(self, tags: list[CatalogTag]) -> Optional[str]:
+        """
+        Макрокатегория контента — макрокатегория его первого тега по id
+        (то же правило, что и в Django-модели Content)
+        """
+        if not tags:
+            return None
+        first_tag = min(tags, key=lambda tag: tag.id)
+        category = self.macro_categories_by_id.get(first_tag.macro_category_id)
+        return category.name if category else None
+
+
+def catalog_cache_control() -> str:
+    return public_cache_control(settings.CATALOG_MAX_AGE_SECONDS)
+
+
+def session_tags(db, tags: list[CatalogTag]) -> list[Tags]:
+    """
+    ORM-объекты тегов снимка, прикреплённые к сессии без запроса
+    к базе: для связей создаваемого контента и маршрутов
+    """
+    result = []
+    for tag in tags:
+        orm_tag = db.identity_map.get(identity_key(Tags, tag.id))
+        if orm_tag is None:
+            orm_tag = Tags(
+                id=tag.id,
+                name=tag.name,
+                description=tag.description,
+                macro_category_id=tag.macro_category_id,
+                created=tag.created,
+                updated=tag.updated,
+            )
+            make_transient_to_detached(orm_tag)
+            db.add(orm_tag)
+        result.append(orm_tag)
+    return result
+
+
+def load_catalog(db, version: int) -> CatalogSnapshot:
+    tags = [
+        CatalogTag(*row)
+        for row in db.query(
+            Tags.id,
+            Tags.name,
+            Tags.description,
+            Tags.macro_category_id,
+            Tags.created,
+            Tags.updated,
+        )
+    ]
+    macro_categories = [
+        CatalogMacroCategory(*row)
+        for row in db.query(
+            MacroCategory.id,
+            MacroCategory.name,
+            MacroCategory.description,
+            MacroCategory.image,
+        )
+    ]
+    return CatalogSnapshot(version, tags, macro_categories, CITY_CHOICES)
+
+
+class Catalog:
+    """Текущий снимок справочников процесса"""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db) -> CatalogSnapshot:
+        version = version_watcher.get(db, CATALOG_SCOPE)
+        snapshot = self._snapshot
+        # любая другая версия — перезагрузка, как у VersionedIndex:
+        # версию в event_cacheversion могли сбросить или восстановить
+        # из бэкапа, и тогда она меньше версии снимка
+        if snapshot is not None and snapshot.version == version:
+            self.hits += 1
+            return snapshot
+
+        # один запрос к базе на смену версии, остальные ждут готовый снимок
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                self.misses += 1
+                snapshot = load_catalog(db, version)
+                self._snapshot = snapshot
+                logger.info(
+                    "Catalog version {} loaded: {} tags, {} macro categories",
+                    version,
+                    len(snapshot.tags_by_id),
+                    len(snapshot.macro_categories),
+                )
+            else:
+                self.hits += 1
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "tags": len(snapshot.tags_by_id) if snapshot else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+catalog = Catalog()
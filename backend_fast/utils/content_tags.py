@@ -0,0 +1,74 @@
+"""
+Теги контента в памяти процесса: ID контента → (город, ID тегов).
+
+/tags вычитает из счётчиков тегов города (utils.tag_counts) контент,
+который пользователь лайкнул или удалил; с картой это проход по его
+исключениям, а не группировка связей контента города с тегами.
+Строится и отслеживает версию как остальные индексы (utils.memory_index).
+"""
+
+from array import array
+from collections import Counter
+from typing import Iterable
+
+from models import Content, ContentTags
+from settings import settings
+from utils.memory_index import VersionedIndex
+
+
+class ContentTagMap(VersionedIndex):
+    name = "Content tag map"
+
+    def _reset(self):
+        self._contents: dict[int, tuple] = {}
+
+    def __len__(self):
+        return len(self._contents)
+
+    def _load(self, db):
+        rows = (
+            db.query(ContentTags.content_id, Content.city, ContentTags.tags_id)
+            .join(Content, Content.id == ContentTags.content_id)
+            .order_by(ContentTags.content_id)
+            .yield_per(settings.SEARCH_INDEX_BUILD_BATCH)
+        )
+        current_id, current_city, tag_ids = None, None, array("i")
+        for content_id, city, tag_id in rows:
+            if content_id != current_id:
+                if current_id is not None:
+                    self._contents[current_id] = (current_city, tag_ids)
+                current_id, current_city, tag_ids = content_id, city, array("i")
+            tag_ids.append(tag_id)
+        if current_id is not None:
+            self._contents[current_id] = (current_city, tag_ids)
+
+    def add_content(self, content_id: int, city, tag_ids: Iterable[int]):
+        """Контент создан в этом процессе (после коммита bump_content_version)"""
+        with self._lock:
+            if not self.ready:
+                return
+            tag_ids = array("i", sorted(set(tag_ids)))
+            if tag_ids:
+                self._contents[content_id] = (city, tag_ids)
+            self._note_write(city)
+
+    def remove_content(self, content_id: int, city):
+        """Контент удалён в этом процессе (после коммита bump_content_version)"""
+        with self._lock:
+            if not self.ready:
+                return
+            self._contents.pop(content_id, None)
+            self._note_write(city)
+
+    def count_tags(self, content_ids: Iterable[int], city) -> Counter:
+        """Сколько контента города из content_ids отмечено каждым тегом"""
+        counts = Counter()
+        with self._lock:
+            for content_id in content_ids:
+                entry = self._contents.get(content_id)
+                if entry is not None and entry[0] == city:
+                    counts.update(entry[1])
+        return counts
+
+
+content_tag_map = ContentTagMap()
@@ -0,0 +1,200 @@
+"""
+Стратегии total_count для списков (параметр count=exact|estimate|none).
+
+- exact: точное число. Страница offset/limit получает его оконной функцией
+  count(*) OVER () в том же запросе, что и строки, без отдельного COUNT
+  с подзапросом; посчитанное число запоминается по нормализованным
+  фильтрам на COUNT_CACHE_TTL_SECONDS.
+- estimate: для больших результатов — оценка планировщика Postgres
+  (EXPLAIN), без выполнения запроса; если оценка меньше
+  COUNT_ESTIMATE_EXACT_BELOW, считается точно. На SQLite — точно.
+- none: total_count не считается (None).
+
+Кэш сбрасывается записями этого процесса (invalidate по имени списка),
+изменения других процессов доходят по TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.sql.traversals import InternalTraversal
+
+from settings import settings
+from utils.logs import logger
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
+def count_key(name: str, **filters) -> tuple:
+    """
+    Ключ кэша: имя списка и фильтры без пустых значений, списки —
+    отсортированными кортежами, перечисления — значениями
+    """
+    normalized = []
+    for field, value in sorted(filters.items()):
+        if value is None or value == [] or value == "":
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(value))
+        elif isinstance(value, Enum):
+            value = value.value
+        normalized.append((field, value))
+    return (name, tuple(normalized))
+
+
+class CountCache:
+    """LRU-кэш посчитанных total_count с TTL"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[int]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and now - cached[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            return None
+
+    def store(self, key, total: int):
+        with self._lock:
+            self._entries[key] = (total, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, name: str):
+        """Сбрасывает все записи списка name (после записи в этом процессе)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == name]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+count_cache = CountCache(
+    settings.COUNT_CACHE_MAX_ENTRIES, settings.COUNT_CACHE_TTL_SECONDS
+)
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) над запросом. Компилируется вместе с ним,
+    поэтому параметры, IN-списки (postcompile) и позиционный стиль
+    драйвера (asyncpg) обрабатываются как у обычного запроса
+    """
+
+    inherit_cache = True
+    _traverse_internals = [("statement", InternalTraversal.dp_clauseelement)]
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimate_count(db, query) -> Optional[int]:
+    """Оценка числа строк планировщиком Postgres (None на других базах)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    plan = db.execute(Explain(query.statement)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _bound_key(db, key: Optional[tuple]) -> Optional[tuple]:
+    """
+    Ключ с базой сессии: число, посчитанное на отстающей реплике,
+    не должно попасть к пользователю, который читает свою запись с primary
+    """
+    if key is None:
+        return None
+    return (*key, str(db.get_bind().url))
+
+
+def count_total(db, query, mode: CountMode, key: Optional[tuple] = None):
+    """
+    total_count запроса по стратегии mode (для keyset-страниц, где окно
+    в том же запросе посчитало бы только строки после курсора)
+    """
+    if mode is CountMode.NONE:
+        return None
+    if mode is CountMode.ESTIMATE:
+        estimate = estimate_count(db, query)
+        if estimate is not None and estimate >= settings.COUNT_ESTIMATE_EXACT_BELOW:
+            logger.info("Using planner estimate for total count: {}", estimate)
+            return estimate
+
+    key = _bound_key(db, key)
+    total = count_cache.get(key) if key is not None else None
+    if total is None:
+        total = query.count()
+        if key is not None:
+            count_cache.store(key, total)
+    return total
+
+
+def paginate_with_total(
+    db, query, skip: int, limit: int, mode: CountMode, key: Optional[tuple] = None
+):
+    """
+    Страница offset/limit запроса с одной сущностью и total_count
+    по стратегии mode. Возвращает (строки, total_count).
+    """
+    total = None
+    if mode is CountMode.EXACT:
+        key = _bound_key(db, key)
+        total = count_cache.get(key) if key is not None else None
+        if total is None:
+            rows = (
+                query.add_columns(func.count().over().label("total_count"))
+                .offset(skip)
+                .limit(limit)
+                .all()
+            )
+            if rows:
+                total = rows[0].total_count
+            elif skip:
+                # страница за концом списка: окну нечего вернуть
+                total = query.count()
+            else:
+                total = 0
+            if key is not None:
+                count_cache.store(key, total)
+            return [row[0] for row in rows], total
+    elif mode is CountMode.ESTIMATE:
+        total = count_total(db, query, mode, key)
+
+    return query.offset(skip).limit(limit).all(), total
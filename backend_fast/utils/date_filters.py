@@ -0,0 +1,23 @@
+from datetime import date
+from typing import Optional
+
+from models import Content
+
+
+def create_date_filter(date_start: Optional[date], date_end: Optional[date]):
+    """
+    Фильтры контента по датам: с обеими датами — пересечение периодов,
+    только с date_start — события этого дня, только с date_end —
+    закончившиеся к этой дате
+    """
+    q_filter = []
+
+    if date_start and date_end:
+        q_filter.append(Content.date_start <= date_end)
+        q_filter.append(Content.date_end >= date_start)
+    elif date_start:
+        q_filter.append(Content.date_start == date_start)
+    elif date_end:
+        q_filter.append(Content.date_end <= date_end)
+
+    return q_filter
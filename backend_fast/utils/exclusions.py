@@ -0,0 +1,136 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from models import Like, RemovedFavorite
+from settings import settings
+from utils.cache_versions import version_watcher
+
+# Область версии, которую Django поднимает при правке лайков и удалённого из
+# избранного в админке: все закэшированные множества сбрасываются
+EXCLUSIONS_SCOPE = "exclusions"
+
+
+class UserExclusions:
+    """
+    Отсортированный массив ID контента, который пользователь уже лайкнул,
+    дизлайкнул или удалил из избранного. 4 байта на ID вместо объекта
+    в set, проверка вхождения — бинарным поиском.
+    """
+
+    __slots__ = ("ids", "loaded_at")
+
+    def __init__(self, ids):
+        self.ids = array("i", sorted(set(ids)))
+        self.loaded_at = time.monotonic()
+
+    def __contains__(self, content_id: int) -> bool:
+        i = bisect_left(self.ids, content_id)
+        return i < len(self.ids) and self.ids[i] == content_id
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, content_id: int):
+        i = bisect_left(self.ids, content_id)
+        if i == len(self.ids) or self.ids[i] != content_id:
+            self.ids.insert(i, content_id)
+
+    def filter(self, content_ids) -> list[int]:
+        """
+        Оставляет из content_ids только то, чего нет в исключениях
+        """
+        if not self.ids:
+            return list(content_ids)
+        return [content_id for content_id in content_ids if content_id not in self]
+
+
+class ExclusionCache:
+    """
+    LRU-кэш исключений пользователей внутри процесса.
+
+    Лайки и дизлайки через API дописываются в кэш сразу после коммита.
+    Правки из Django-админки поднимают версию EXCLUSIONS_SCOPE, а TTL
+    страхует от изменений, сделанных другими воркерами.
+    """
+
+    def __init__(self, max_users: int, ttl: float):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db, user_id: int) -> UserExclusions:
+        version = version_watcher.get(db, EXCLUSIONS_SCOPE)
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry.loaded_at < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = UserExclusions(self._load(db, user_id))
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return entry
+
+    def add(self, user_id: int, content_id: int):
+        """
+        Отмечает новый лайк/дизлайк/удаление, если пользователь уже в кэше
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.add(content_id)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._entries),
+                "max_users": self.max_users,
+                "excluded_ids": sum(len(entry) for entry in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    @staticmethod
+    def _load(db, user_id: int) -> list[int]:
+        rows = (
+            db.query(Like.content_id)
+            .filter(Like.user_id == user_id)
+            .union(
+                db.query(RemovedFavorite.content_id).filter(
+                    RemovedFavorite.user_id == user_id
+                )
+            )
+            .all()
+        )
+        return [content_id for (content_id,) in rows if content_id is not None]
+
+
+exclusion_cache = ExclusionCache(
+    settings.EXCLUSIONS_CACHE_MAX_USERS, settings.EXCLUSIONS_CACHE_TTL_SECONDS
+)
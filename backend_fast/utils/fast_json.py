@@ -0,0 +1,128 @@
+"""
+Быстрая сериализация списков контента.
+
+Вместо ORM-объектов и валидации ContentSchema через from_attributes
+строки берутся кортежами прямо из SQL, собираются в готовые словари той же
+формы, что отдаёт ContentSchema, и кодируются orjson сразу в байты.
+Включается настройкой FAST_JSON_RESPONSES.
+"""
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from models import Content, ContentTags, Tags
+from settings import settings
+from utils.async_db import off_loop
+
+MEDIA_URL = "https://afishabot.ru/afisha-files/"
+LOAD_CHUNK_SIZE = 500
+
+# Колонки контента, из которых собирается ответ (и ключи keyset-пагинации)
+CONTENT_COLUMNS = (
+    Content.id,
+    Content.name,
+    Content.description,
+    Content.image,
+    Content.contact,
+    Content.date_start,
+    Content.date_end,
+    Content.time,
+    Content.cost,
+    Content.location,
+    Content.macro_category,
+    Content.event_type,
+    Content.publisher_type,
+    Content.publisher_id,
+    Content.created,
+)
+
+
+def fast_json_enabled() -> bool:
+    return settings.FAST_JSON_RESPONSES
+
+
+def media_url(image):
+    return MEDIA_URL + image if image else None
+
+
+def load_tag_dicts(db, content_ids) -> dict[int, list[dict]]:
+    """
+    Теги контента одним запросом на пачку ID: {content_id: [TagSchema-словарь]}.
+    Картинки тега нет в SQLAlchemy-модели Tags, поэтому image, как и в
+    TagSchema, всегда None.
+    """
+    tags_by_content = {content_id: [] for content_id in content_ids}
+    content_ids = list(tags_by_content)
+    for i in range(0, len(content_ids), LOAD_CHUNK_SIZE):
+        rows = (
+            db.query(
+                ContentTags.content_id,
+                Tags.id,
+                Tags.name,
+                Tags.description,
+            )
+            .join(Tags, Tags.id == ContentTags.tags_id)
+            .filter(ContentTags.content_id.in_(content_ids[i : i + LOAD_CHUNK_SIZE]))
+            .order_by(ContentTags.content_id, Tags.id)
+        )
+        for content_id, tag_id, name, description in rows:
+            tags_by_content[content_id].append(
+                {
+                    "id": tag_id,
+                    "name": name,
+                    "description": description,
+                    "image": None,
+                    "count": None,
+                }
+            )
+    return tags_by_content
+
+
+def content_dict(row, tags: list[dict]) -> dict:
+    """Словарь в форме ContentSchema из строки CONTENT_COLUMNS"""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "description": row.description,
+        "image": media_url(row.image),
+        "contact": row.contact,
+        "date_start": row.date_start,
+        "date_end": row.date_end,
+        "tags": tags,
+        "time": row.time,
+        "cost": row.cost,
+        "location": row.location,
+        "macro_category": row.macro_category,
+        "event_type": row.event_type,
+        "publisher_type": row.publisher_type,
+        "publisher_id": row.publisher_id,
+    }
+
+
+def content_dicts(db, rows) -> list[dict]:
+    """Словари контента для строк CONTENT_COLUMNS (порядок сохраняется)"""
+    tags_by_content = load_tag_dicts(db, [row.id for row in rows])
+    return [content_dict(row, tags_by_content[row.id]) for row in rows]
+
+
+def content_dicts_by_ids(db, content_ids: list[int]) -> list[dict]:
+    """Словари контента по списку ID в порядке списка"""
+    rows_by_id = {}
+    for i in range(0, len(content_ids), LOAD_CHUNK_SIZE):
+        rows_by_id.update(
+            (row.id, row)
+            for row in db.query(*CONTENT_COLUMNS).filter(
+                Content.id.in_(content_ids[i : i + LOAD_CHUNK_SIZE])
+            )
+        )
+    return content_dicts(db, [rows_by_id[i] for i in content_ids if i in rows_by_id])
+
+
+def fast_json_response(payload, response: Response = None) -> ORJSONResponse:
+    """
+    Готовый ответ в обход response_model. Заголовки, выставленные
+    эндпоинтом через Response (например, X-Next-Cursor), переносятся.
+    """
+    headers = dict(response.headers) if response is not None else None
+    # кодирование больших списков — вне цикла событий (utils.async_db)
+    return off_loop(ORJSONResponse, payload, headers=headers)
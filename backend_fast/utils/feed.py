@@ -0,0 +1,97 @@
+import hashlib
+import random
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from settings import settings
+
+# Сиды сессий ленты — положительные 63-битные числа (влезают в bigint
+# и в JSON курсора)
+SEED_LIMIT = 2**63 - 1
+
+_orders_lock = threading.Lock()
+
+
+def new_feed_seed() -> int:
+    """
+    Сид для новой сессии ленты
+    """
+    return random.randrange(1, SEED_LIMIT)
+
+
+def shuffle_key(content_id: int, seed: int) -> int:
+    """
+    Ключ сортировки контента в перемешанной ленте сессии: хэш ID
+    с ключом-сидом. В отличие от аффинного отображения id * a + b,
+    соседние ID (контент, загруженный пачкой) не идут в ленте
+    с постоянным шагом
+    """
+    digest = hashlib.blake2b(
+        content_id.to_bytes(8, "little"),
+        key=seed.to_bytes(8, "little"),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def shuffle_keys(content_ids, seed: int) -> list[int]:
+    """
+    Ключи сортировки контента в перемешанной ленте сессии
+    """
+    return [shuffle_key(content_id, seed) for content_id in content_ids]
+
+
+class ShuffledOrder(NamedTuple):
+    """Кандидаты, отсортированные по (ключ сида, ID), в компактных массивах"""
+
+    keys: array
+    ids: array
+
+    def start_after(self, last: Optional[tuple[int, int]]) -> int:
+        """Позиция первой пары после last = (ключ, ID) из курсора"""
+        if last is None:
+            return 0
+        key, content_id = last
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key and self.ids[i] <= content_id:
+            i += 1
+        return i
+
+
+def cached_shuffled_order(entry, seed: int) -> Optional[ShuffledOrder]:
+    """Уже построенный порядок сида (None, если его ещё нет)"""
+    with _orders_lock:
+        orders = entry.derived.get("shuffle")
+        order = orders.get(seed) if orders is not None else None
+        if order is not None:
+            orders.move_to_end(seed)
+        return order
+
+
+def shuffled_order(entry, seed: int) -> ShuffledOrder:
+    """
+    Порядок кандидатов записи кэша (utils.feed_cache) для сида. Живёт
+    в entry.derived, то есть столько же, сколько сама запись: следующие
+    страницы сессии не пересчитывают хэши и не сортируют кандидатов
+    заново. На запись хранится FEED_SHUFFLE_ORDERS_PER_ENTRY последних сидов
+    """
+    order = cached_shuffled_order(entry, seed)
+    if order is not None:
+        return order
+
+    ids = entry.ids
+    pairs = sorted(zip(shuffle_keys(ids, seed), ids))
+    order = ShuffledOrder(
+        array("Q", (key for key, _ in pairs)),
+        array("q", (content_id for _, content_id in pairs)),
+    )
+    with _orders_lock:
+        orders = entry.derived.setdefault("shuffle", OrderedDict())
+        orders[seed] = order
+        orders.move_to_end(seed)
+        while len(orders) > settings.FEED_SHUFFLE_ORDERS_PER_ENTRY:
+            orders.popitem(last=False)
+    return order
@@ -0,0 +1,180 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import NamedTuple, Optional
+
+from models import Content, ContentTags
+from settings import settings
+from utils.cache_versions import content_scope, version_watcher
+from utils.date_filters import create_date_filter
+
+
+class FeedCandidate(NamedTuple):
+    """Краткие данные о контенте-кандидате для ленты"""
+
+    id: int
+    date_start: Optional[date]
+    date_end: Optional[date]
+    tag_ids: tuple
+    macro_category: Optional[str]
+
+
+class CandidateEntry:
+    """Закэшированный список кандидатов для (город, даты, теги)"""
+
+    __slots__ = ("key", "version", "candidates", "derived")
+
+    def __init__(self, key, version: int, candidates: list[FeedCandidate]):
+        self.key = key
+        self.version = version
+        self.candidates = candidates
+        # Производные структуры (например, массивы для ранжирования) живут
+        # столько же, сколько сама запись
+        self.derived = {}
+
+    @property
+    def ids(self) -> list[int]:
+        return [candidate.id for candidate in self.candidates]
+
+
+class FeedCandidateCache:
+    """
+    LRU-кэш кандидатов ленты внутри процесса.
+
+    Базовая запись (город, даты) загружается одним запросом вместе с тегами,
+    записи с фильтром по тегам строятся из неё в памяти. Запись считается
+    устаревшей, когда версия контента города в event_cacheversion изменилась.
+    В ключе — база сессии: кандидаты, загруженные с отстающей реплики уже
+    после смены версии, не попадают к пользователю, читающему с primary.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+        self,
+        db,
+        city: Optional[str],
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None,
+        tag_ids=None,
+    ) -> CandidateEntry:
+        """
+        Кандидаты города за период; если передан tag_ids — только контент,
+        у которого есть хотя бы один из этих тегов
+        """
+        version = version_watcher.get(db, content_scope(city))
+        tag_key = frozenset(tag_ids) if tag_ids else None
+        key = (city, date_start, date_end, tag_key, str(db.get_bind().url))
+
+        entry = self._lookup(key, version)
+        if entry is not None:
+            return entry
+
+        if tag_key is None:
+            candidates = self._load(db, city, date_start, date_end)
+        else:
+            base = self.get(db, city, date_start, date_end)
+            candidates = [
+                candidate
+                for candidate in base.candidates
+                if not tag_key.isdisjoint(candidate.tag_ids)
+            ]
+
+        entry = CandidateEntry(key, version, candidates)
+        self._store(entry)
+        return entry
+
+    def invalidate_city(self, city: Optional[str]):
+        """
+        Сбрасывает записи города (и записи без фильтра по городу).
+        Вызывается после коммита изменений контента.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if city is None or key[0] in (city, None):
+                    del self._entries[key]
+        version_watcher.forget(content_scope(city))
+        version_watcher.forget(content_scope(None))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _lookup(self, key, version: int) -> Optional[CandidateEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def _store(self, entry: CandidateEntry):
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _load(db, city, date_start, date_end) -> list[FeedCandidate]:
+        q_filter = create_date_filter(date_start, date_end)
+        if city:
+            q_filter.append(Content.city == city)
+
+        rows = (
+            db.query(
+                Content.id,
+                Content.date_start,
+                Content.date_end,
+                ContentTags.tags_id,
+                Content.macro_category,
+            )
+            .outerjoin(ContentTags, ContentTags.content_id == Content.id)
+            .filter(*q_filter)
+            .order_by(
+                Content.date_start.asc().nullslast(), Content.id, ContentTags.tags_id
+            )
+            .all()
+        )
+
+        # Строки идут по контенту подряд: собираем теги каждого контента
+        candidates = []
+        current = None
+        tag_ids = []
+        for content_id, start, end, tag_id, macro_category in rows:
+            if current is None or current[0] != content_id:
+                if current is not None:
+                    candidates.append(
+                        FeedCandidate(*current[:3], tuple(tag_ids), current[3])
+                    )
+                current = (content_id, start, end, macro_category)
+                tag_ids = []
+            if tag_id is not None:
+                tag_ids.append(tag_id)
+        if current is not None:
+            candidates.append(FeedCandidate(*current[:3], tuple(tag_ids), current[3]))
+
+        return candidates
+
+
+feed_candidate_cache = FeedCandidateCache(settings.FEED_CACHE_MAX_ENTRIES)
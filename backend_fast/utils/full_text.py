@@ -0,0 +1,52 @@
+"""
+Полнотекстовый поиск контента на Postgres.
+
+Столбец event_content.search_vector (миграция Django 0034) — генерируемый
+взвешенный tsvector русской конфигурации: название — A, место — B,
+описание — C; его обслуживает GIN-индекс. Запрос — слова через «И»,
+каждое как префикс («джа» находит «джаз»), со стеммингом. Порядок —
+ts_rank_cd с весами в той же пропорции, что у LIKE-релевантности
+(10 / 5 / 3). На SQLite поиск остаётся на LIKE (api.search).
+"""
+
+import re
+
+from sqlalchemy import Float, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from settings import settings
+
+# Столбца нет в модели Content: его заполняет Postgres, а SQLite в тестах
+# такого типа не знает
+search_vector = literal_column("event_content.search_vector", type_=TSVECTOR)
+
+SEARCH_CONFIG = literal_column("'russian'::regconfig")
+# Веса {D, C, B, A}: описание 0.3, место 0.5, название 1.0
+RANK_WEIGHTS = literal_column("'{0, 0.3, 0.5, 1.0}'::real[]")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def full_text_enabled(db) -> bool:
+    return settings.FULL_TEXT_SEARCH and db.get_bind().dialect.name == "postgresql"
+
+
+def search_words(search_query: str) -> list[str]:
+    """
+    Слова запроса без символов синтаксиса tsquery (&, |, !, :, скобок),
+    чтобы пользовательский ввод не ломал запрос
+    """
+    return _WORD_RE.findall(search_query.lower())
+
+
+def prefix_tsquery(words: list[str]):
+    """to_tsquery('russian', 'слово1:* & слово2:*')"""
+    return func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{word}:*" for word in words))
+
+
+def full_text_filter(tsquery):
+    return search_vector.op("@@")(tsquery)
+
+
+def full_text_rank(tsquery):
+    return func.ts_rank_cd(RANK_WEIGHTS, search_vector, tsquery, type_=Float)
@@ -0,0 +1,93 @@
+"""
+Условные GET-запросы: ETag, If-None-Match и Cache-Control.
+
+Эндпоинт считает ETag до сериализации ответа; если клиент прислал
+совпадающий If-None-Match, отвечает 304 без тела. ETag строится из
+версий строк, из которых собирается тело (ID и updated), или из уже
+посчитанных значений небольшого ответа (make_etag), либо из версии
+снимка, как у справочников (utils.catalog).
+
+Cache-Control у каждого маршрута свой (public_cache_control и настройки
+*_MAX_AGE_SECONDS). Ответы без username одинаковы для всех, поэтому
+помечены public: nginx кэширует их через proxy_cache, а с
+proxy_cache_revalidate on по истечении max-age перепроверяет запись
+по ETag и получает 304 вместо тела.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+from settings import settings
+
+
+def make_etag(kind: str, *parts) -> str:
+    """
+    Сильный ETag из версий строк ответа или его значений: меняется
+    любая часть — меняется и ETag. parts — кортежи и числа с
+    детерминированным repr (ID, updated, счётчики)
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{kind}-{digest}"'
+
+
+def public_cache_control(max_age: int) -> str:
+    return f"public, max-age={max_age}"
+
+
+def content_cache_control() -> str:
+    return public_cache_control(settings.CONTENT_MAX_AGE_SECONDS)
+
+
+def route_cache_control() -> str:
+    return public_cache_control(settings.ROUTE_MAX_AGE_SECONDS)
+
+
+def reviews_cache_control() -> str:
+    return public_cache_control(settings.REVIEWS_MAX_AGE_SECONDS)
+
+
+def rating_stats_cache_control() -> str:
+    return public_cache_control(settings.RATING_STATS_MAX_AGE_SECONDS)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    If-None-Match совпадает с etag (сравнение слабое, как для GET
+    в RFC 9110: префикс W/ не учитывается)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    strong = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == strong
+        for candidate in header.split(",")
+    )
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, cache_control)
+    return response
+
+
+def conditional_response(
+    request: Request, response: Response, etag: str, cache_control: str
+) -> Optional[Response]:
+    """
+    Готовый 304, если If-None-Match совпадает с etag; иначе ставит
+    заголовки кэширования на ответ эндпоинта и возвращает None
+    """
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    set_cache_headers(response, etag, cache_control)
+    return None
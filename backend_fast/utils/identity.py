@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, Query
+from utils.logs import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import User, get_async_read_db, get_db, get_read_db
+from settings import settings
+from utils.cache_versions import bump_cache_version, version_watcher
+
+# Область версии, которую поднимают смена города через API и правка
+# пользователей в Django-админке: кэш личностей сбрасывается целиком
+USERS_SCOPE = "users"
+
+
+class UserIdentity(NamedTuple):
+    """То, что эндпоинтам нужно знать о пользователе из Telegram"""
+
+    id: int
+    username: str
+    city: Optional[str]
+
+
+class IdentityCache:
+    """
+    LRU-кэш username → (id, город) внутри процесса.
+
+    Почти каждый запрос начинается с поиска пользователя по username, а сам
+    пользователь меняется редко. Промахи не кэшируются: пользователь может
+    появиться через /register, /like или /feedback в любой момент.
+    Изменения из других процессов доходят через версию USERS_SCOPE и TTL.
+    """
+
+    def __init__(self, max_users: int, ttl: float):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db, username: str) -> Optional[UserIdentity]:
+        version = version_watcher.get(db, USERS_SCOPE)
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            cached = self._entries.get(username)
+            if cached is not None and now - cached[1] < self.ttl:
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        row = (
+            db.query(User.id, User.username, User.city)
+            .filter(User.username == username)
+            .order_by(User.id)
+            .first()
+        )
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+        self.store(identity)
+        return identity
+
+    def store(self, identity: UserIdentity):
+        """Кладёт в кэш пользователя, только что созданного в этом процессе"""
+        with self._lock:
+            self._entries[identity.username] = (identity, time.monotonic())
+            self._entries.move_to_end(identity.username)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: str):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._entries),
+                "max_users": self.max_users,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+identity_cache = IdentityCache(
+    settings.IDENTITY_CACHE_MAX_USERS, settings.IDENTITY_CACHE_TTL_SECONDS
+)
+
+
+def resolve_user(db, username: str) -> Optional[UserIdentity]:
+    """Пользователь по username через кэш (None, если такого нет)"""
+    return identity_cache.get(db, username)
+
+
+def get_or_create_user(db, username: str) -> UserIdentity:
+    """
+    Пользователь по username; если его ещё нет — создаётся с городом
+    по умолчанию (так лайк или обратную связь можно оставить до /register)
+    """
+    user = resolve_user(db, username)
+    if user is not None:
+        return user
+    new_user = User(username=username)
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    user = UserIdentity(new_user.id, new_user.username, new_user.city)
+    identity_cache.store(user)
+    return user
+
+
+def bump_users_version(db):
+    """
+    Пользователь изменился: остальные процессы сбросят кэш по версии
+    USERS_SCOPE. Коммит остаётся за вызывающим кодом, а свою запись
+    он убирает через identity_cache.invalidate уже после коммита.
+    """
+    bump_cache_version(db, USERS_SCOPE)
+
+
+def require_user(user: Optional[UserIdentity], username: str) -> UserIdentity:
+    if user is None:
+        logger.warning("User {} not found", username)
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+def get_current_user(
+    username: str = Query(...),
+    db: Session = Depends(get_db),
+) -> UserIdentity:
+    """Зависимость: пользователь из параметра username или 404"""
+    return require_user(resolve_user(db, username), username)
+
+
+def get_current_user_read(
+    username: str = Query(...),
+    db: Session = Depends(get_read_db),
+) -> UserIdentity:
+    """
+    То же для читающих эндпоинтов: пользователь ищется в той же сессии
+    get_read_db, что и данные эндпоинта, без второй сессии к primary
+    """
+    return require_user(resolve_user(db, username), username)
+
+
+async def get_current_user_async(
+    username: str = Query(...),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> UserIdentity:
+    """То же для эндпоинтов на асинхронном движке (utils.async_db)"""
+    return require_user(await db.run_sync(resolve_user, username), username)
@@ -0,0 +1,145 @@
+import heapq
+from array import array
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+from models import ContentNeighbours, Like
+
+LOAD_LIKES_CHUNK_SIZE = 100_000
+SAVE_CHUNK_SIZE = 1_000
+
+
+def load_likes(db):
+    """
+    Все лайки (value=True) в виде трёх массивов: пользователь, контент, ID лайка.
+    Строки читаются потоком, чтобы миллионы лайков не превращались
+    в миллионы ORM-объектов.
+    """
+    user_ids, content_ids, like_ids = array("q"), array("q"), array("q")
+    rows = (
+        db.query(Like.user_id, Like.content_id, Like.id)
+        .filter(
+            Like.value.is_(True),
+            Like.user_id.isnot(None),
+            Like.content_id.isnot(None),
+        )
+        .execution_options(stream_results=True)
+        .yield_per(LOAD_LIKES_CHUNK_SIZE)
+    )
+    for user_id, content_id, like_id in rows:
+        user_ids.append(user_id)
+        content_ids.append(content_id)
+        like_ids.append(like_id)
+    return (
+        np.frombuffer(user_ids, dtype=np.int64),
+        np.frombuffer(content_ids, dtype=np.int64),
+        np.frombuffer(like_ids, dtype=np.int64),
+    )
+
+
+def compute_item_neighbours(
+    user_ids,
+    content_ids,
+    like_ids,
+    top_n: int = 50,
+    min_common: int = 2,
+    max_user_likes: int = 500,
+    block_size: int = 2_000,
+):
+    """
+    Top-N соседей каждого контента по косинусной близости столбцов
+    бинарной матрицы пользователь x контент.
+
+    Произведение X.T @ X считается блоками строк, чтобы не держать
+    в памяти всю матрицу совпадений. У очень активных пользователей
+    берутся только max_user_likes последних лайков: они почти не добавляют
+    сигнала, а стоимость растёт квадратично от числа их лайков.
+
+    Отдаёт пары (content_id, [[neighbour_id, score], ...]).
+    """
+    if not len(user_ids):
+        return
+
+    order = np.lexsort((-like_ids, user_ids))
+    users, items = user_ids[order], content_ids[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(users) != 0])
+    rank = np.arange(len(users)) - np.repeat(starts, np.diff(np.r_[starts, len(users)]))
+    users, items = users[rank < max_user_likes], items[rank < max_user_likes]
+
+    _, user_codes = np.unique(users, return_inverse=True)
+    item_ids, item_codes = np.unique(items, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(items), dtype=np.float32), (user_codes, item_codes)),
+        shape=(user_codes.max() + 1, len(item_ids)),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+
+    inv_norm = 1 / np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+    transposed = matrix.T.tocsr()
+
+    for block_start in range(0, len(item_ids), block_size):
+        common = (transposed[block_start : block_start + block_size] @ matrix).tocsr()
+        for row in range(common.shape[0]):
+            item = block_start + row
+            lo, hi = common.indptr[row], common.indptr[row + 1]
+            cols, counts = common.indices[lo:hi], common.data[lo:hi]
+            mask = (cols != item) & (counts >= min_common)
+            cols = cols[mask]
+            if not len(cols):
+                continue
+            scores = counts[mask] * inv_norm[item] * inv_norm[cols]
+            if len(scores) > top_n:
+                best = np.argpartition(-scores, top_n - 1)[:top_n]
+                cols, scores = cols[best], scores[best]
+            best = np.lexsort((item_ids[cols], -scores))
+            yield (
+                int(item_ids[item]),
+                [
+                    [int(item_ids[col]), round(float(score), 4)]
+                    for col, score in zip(cols[best], scores[best])
+                ],
+            )
+
+
+def save_item_neighbours(db, neighbours) -> int:
+    """
+    Полностью заменяет таблицу соседей в одной транзакции:
+    до коммита читатели видят предыдущую версию
+    """
+    db.query(ContentNeighbours).delete(synchronize_session=False)
+    saved = 0
+    chunk = []
+    for content_id, content_neighbours in neighbours:
+        chunk.append({"content_id": content_id, "neighbours": content_neighbours})
+        if len(chunk) >= SAVE_CHUNK_SIZE:
+            db.execute(ContentNeighbours.__table__.insert(), chunk)
+            saved += len(chunk)
+            chunk = []
+    if chunk:
+        db.execute(ContentNeighbours.__table__.insert(), chunk)
+        saved += len(chunk)
+    db.commit()
+    return saved
+
+
+def merge_neighbours(neighbour_lists, exclusions, limit: int) -> list[int]:
+    """
+    Складывает близость соседей нескольких лайков и отдаёт limit лучших ID,
+    пропуская то, что пользователь уже видел
+    """
+    scores = defaultdict(float)
+    for neighbours in neighbour_lists:
+        for content_id, score in neighbours:
+            scores[content_id] += score
+    best = heapq.nlargest(
+        limit,
+        (
+            (score, content_id)
+            for content_id, score in scores.items()
+            if content_id not in exclusions
+        ),
+    )
+    return [content_id for _, content_id in best]
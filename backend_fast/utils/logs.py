@@ -0,0 +1,301 @@
+"""
+Логирование FastAPI-приложения.
+
+- Записи пишутся JSON-строками в файл фоновым потоком (QueuedJsonSink):
+  обработчик запроса только кладёт запись в очередь.
+- INFO и ниже сэмплируются по запросам: для пути из LOG_INFO_SAMPLE_RATES
+  (или с долей LOG_INFO_SAMPLE_RATE) решение принимается один раз на запрос,
+  и невыбранный запрос не создаёт INFO-записей вовсе. WARNING и выше
+  пишутся всегда.
+- Сообщения форматируются лениво: logger.info("... {}", value) собирает
+  строку, только если запись действительно пишется.
+- Заголовок X-Debug-Log со значением LOG_DEBUG_TOKEN включает для одного
+  запроса DEBUG-записи: SQL-запросы с параметрами и подробные данные ответа.
+
+В эндпоинтах используется logger из этого модуля вместо loguru.logger.
+"""
+
+import gzip
+import itertools
+import os
+import queue
+import random
+import shutil
+import sys
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from typing import NamedTuple, Optional
+
+import orjson
+from loguru import logger as loguru_logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from settings import settings
+
+DEBUG_HEADER = "x-debug-log"
+REQUEST_ID_HEADER = "x-request-id"
+
+
+class RequestLogContext(NamedTuple):
+    """Решения о логировании, принятые для текущего запроса"""
+
+    request_id: str
+    route: str
+    sampled: bool
+    debug: bool
+
+
+_request_log: ContextVar[Optional[RequestLogContext]] = ContextVar(
+    "request_log", default=None
+)
+_request_ids = itertools.count(1)
+
+
+def current_request_log() -> Optional[RequestLogContext]:
+    """Контекст текущего запроса (None вне запроса)"""
+    return _request_log.get()
+
+
+def info_enabled() -> bool:
+    context = _request_log.get()
+    return context is None or context.sampled
+
+
+def debug_enabled() -> bool:
+    context = _request_log.get()
+    if context is None:
+        return settings.LOG_LEVEL == "DEBUG"
+    return context.debug
+
+
+class RequestLogger:
+    """
+    Обёртка над loguru.logger, которая отбрасывает DEBUG/INFO до создания
+    записи, если текущий запрос их не пишет. Остальное (add, contextualize,
+    complete...) передаётся loguru как есть.
+    """
+
+    __slots__ = ("_options", "_logger")
+
+    def __init__(self, **options):
+        self._options = options
+        self._logger = None
+
+    def _emit(self):
+        # depth=1: место вызова — эндпоинт, а не этот модуль
+        if self._logger is None:
+            self._logger = loguru_logger.opt(depth=1, **self._options)
+        return self._logger
+
+    def opt(self, **options) -> "RequestLogger":
+        """Как loguru logger.opt(), например opt(lazy=True) для дорогих значений"""
+        return RequestLogger(**options)
+
+    def trace(self, message, *args, **kwargs):
+        if debug_enabled():
+            self._emit().trace(message, *args, **kwargs)
+
+    def debug(self, message, *args, **kwargs):
+        if debug_enabled():
+            self._emit().debug(message, *args, **kwargs)
+
+    def info(self, message, *args, **kwargs):
+        if info_enabled():
+            self._emit().info(message, *args, **kwargs)
+
+    def success(self, message, *args, **kwargs):
+        if info_enabled():
+            self._emit().success(message, *args, **kwargs)
+
+    def warning(self, message, *args, **kwargs):
+        self._emit().warning(message, *args, **kwargs)
+
+    def error(self, message, *args, **kwargs):
+        self._emit().error(message, *args, **kwargs)
+
+    def exception(self, message, *args, **kwargs):
+        loguru_logger.opt(depth=1, exception=True, **self._options).error(
+            message, *args, **kwargs
+        )
+
+    def critical(self, message, *args, **kwargs):
+        self._emit().critical(message, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(loguru_logger, name)
+
+
+logger = RequestLogger()
+
+
+def info_sample_rate(path: str) -> float:
+    return settings.LOG_INFO_SAMPLE_RATES.get(path, settings.LOG_INFO_SAMPLE_RATE)
+
+
+class RequestLogMiddleware:
+    """
+    ASGI-middleware: один раз на запрос решает, пишутся ли его INFO-записи
+    и включён ли режим отладки. Решение хранится в contextvar и видно
+    и в async-эндпоинтах, и в синхронных (AnyIO копирует контекст в поток).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        debug = False
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")
+            elif name == DEBUG_HEADER.encode() and settings.LOG_DEBUG_TOKEN:
+                debug = value.decode("latin-1") == settings.LOG_DEBUG_TOKEN
+
+        path = scope["path"]
+        rate = info_sample_rate(path)
+        context = RequestLogContext(
+            request_id=request_id or f"{os.getpid()}-{next(_request_ids)}",
+            route=path,
+            sampled=debug or rate >= 1 or random.random() < rate,
+            debug=debug,
+        )
+        token = _request_log.set(context)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_log.reset(token)
+
+
+def add_request_context(record):
+    """Патчер loguru: поля запроса в extra (только для записей, которые пишутся)"""
+    context = _request_log.get()
+    if context is not None:
+        record["extra"].update(request_id=context.request_id, route=context.route)
+        if context.debug:
+            record["extra"]["debug"] = True
+
+
+def log_sql_for_debug_requests(
+    conn, cursor, statement, parameters, context, executemany
+):
+    """Эхо SQL только для запросов с заголовком отладки"""
+    if debug_enabled():
+        loguru_logger.opt(lazy=True).debug(
+            "SQL {}; params={}", lambda: statement, lambda: parameters
+        )
+
+
+def record_to_json(record) -> bytes:
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+    }
+    if record["extra"]:
+        payload["extra"] = record["extra"]
+    if record["exception"] is not None:
+        payload["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    return orjson.dumps(payload, default=str) + b"\n"
+
+
+class QueuedJsonSink:
+    """
+    Sink для loguru: обработчик кладёт запись в очередь, а JSON собирает
+    и пишет в файл фоновый поток. Файл больше rotation_bytes переименовывается
+    и сжимается в gzip там же, в фоне.
+    """
+
+    def __init__(self, path: str, rotation_bytes: int):
+        self.path = path
+        self.rotation_bytes = rotation_bytes
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message):
+        self._queue.put(message.record)
+
+    def stop(self):
+        """Дописывает очередь и закрывает файл (loguru вызывает при remove)"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def wait_written(self):
+        """Ждёт, пока фоновый поток допишет всё, что уже в очереди"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout=5)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                if self._file:
+                    self._file.flush()
+                item.set()
+                continue
+            try:
+                self._write(record_to_json(item))
+            except Exception as e:  # логирование не должно ронять поток
+                print(f"Log writer error: {e}", file=sys.stderr)
+        if self._file:
+            self._file.close()
+
+    def _write(self, line: bytes):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "ab")
+        self._file.write(line)
+        if self._queue.empty():
+            self._file.flush()
+        if self._file.tell() >= self.rotation_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        rotated = f"{self.path}.{time.strftime('%Y-%m-%d_%H-%M-%S')}"
+        os.replace(self.path, rotated)
+        with open(rotated, "rb") as source, gzip.open(f"{rotated}.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(rotated)
+
+
+def setup_logging() -> QueuedJsonSink:
+    """
+    Настраивает loguru для fast.py: JSON-файл через фоновый поток, stderr —
+    только с LOG_STDERR_LEVEL, поля запроса в extra, эхо SQL для запросов
+    с заголовком отладки
+    """
+    loguru_logger.remove()
+    loguru_logger.configure(patcher=add_request_context)
+
+    sink = QueuedJsonSink(settings.LOG_FILE, settings.LOG_ROTATION_BYTES)
+    min_level_no = loguru_logger.level(settings.LOG_LEVEL).no
+    loguru_logger.add(
+        sink,
+        level="DEBUG",
+        format="{message}",
+        filter=lambda record: record["level"].no >= min_level_no
+        or record["extra"].get("debug", False),
+    )
+    loguru_logger.add(sys.stderr, level=settings.LOG_STDERR_LEVEL, enqueue=True)
+
+    if not event.contains(Engine, "before_cursor_execute", log_sql_for_debug_requests):
+        event.listen(Engine, "before_cursor_execute", log_sql_for_debug_requests)
+    return sink
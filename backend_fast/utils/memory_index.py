@@ -0,0 +1,123 @@
+"""
+Общая часть индексов контента в памяти процесса (utils.search_index,
+utils.suggestions).
+
+Индекс строится из базы целиком (в фоне при старте) и помнит версию
+content:all из event_cacheversion, с которой строился. Записи этого
+процесса обновляют индекс по месту и сдвигают запомненную версию так же,
+как bump_content_version сдвигает её в базе; если версия в базе ушла
+дальше (писал другой процесс), индекс перестраивается в фоне.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from utils.cache_versions import content_scope, version_watcher
+from utils.logs import logger
+
+# Атрибуты самого индекса, которые не подменяются при перестройке
+_CONTROL_ATTRIBUTES = frozenset(
+    ("_lock", "_building", "_session_factory", "version", "built_at")
+)
+
+
+class VersionedIndex:
+    name = "index"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._building = False
+        self._session_factory = None
+        self.version: Optional[int] = None
+        self.built_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self):
+        """Пустое состояние индекса"""
+        raise NotImplementedError
+
+    def _load(self, db):
+        """Заполняет пустое состояние из базы (без блокировки)"""
+        raise NotImplementedError
+
+    def max_age(self) -> Optional[float]:
+        """Через сколько секунд индекс перестраивается и без записей"""
+        return None
+
+    @property
+    def ready(self) -> bool:
+        return self.version is not None
+
+    def build(self, session_factory):
+        """Полное построение; готовое состояние подменяется целиком"""
+        started = time.perf_counter()
+        fresh = type(self)()
+        with session_factory() as db:
+            version_watcher.forget(content_scope(None))
+            version = version_watcher.get(db, content_scope(None))
+            fresh._load(db)
+
+        with self._lock:
+            for name, value in vars(fresh).items():
+                if name not in _CONTROL_ATTRIBUTES:
+                    setattr(self, name, value)
+            self.version = version
+            self.built_at = time.monotonic()
+        logger.info(
+            "{} built: {} documents in {:.2f}s",
+            self.name,
+            len(self),
+            time.perf_counter() - started,
+        )
+
+    def start(self, session_factory):
+        """Запоминает фабрику сессий и строит индекс в фоне"""
+        self._session_factory = session_factory
+        self.rebuild_in_background()
+
+    def rebuild_in_background(self):
+        with self._lock:
+            if self._building or self._session_factory is None:
+                return
+            self._building = True
+
+        def run():
+            try:
+                self.build(self._session_factory)
+            except Exception as e:  # запросы останутся на базе
+                logger.error("{} build failed: {}", self.name, e)
+            finally:
+                self._building = False
+
+        threading.Thread(target=run, name=self.name, daemon=True).start()
+
+    def _note_write(self, city):
+        """
+        Учитывает запись этого процесса (вызывается под блокировкой).
+        bump_content_version поднимает content:all и content:{city};
+        без города это одна и та же область, поднятая дважды.
+        """
+        self.version += 1 if city else 2
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.version = None
+            self.built_at = None
+
+    def usable(self, db) -> bool:
+        """
+        Индекс построен и не отстаёт от базы. Отставший индекс
+        перестраивается в фоне, пока запросы идут в базу; устаревший
+        по max_age — тоже, но продолжает отвечать.
+        """
+        if not self.ready:
+            return False
+        if version_watcher.get(db, content_scope(None)) != self.version:
+            self.rebuild_in_background()
+            return False
+        max_age = self.max_age()
+        if max_age is not None and time.monotonic() - self.built_at > max_age:
+            self.rebuild_in_background()
+        return True
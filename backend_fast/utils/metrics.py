@@ -0,0 +1,344 @@
+"""
+Метрики запросов по шаблонам маршрутов в формате Prometheus.
+
+Для каждой пары (метод, шаблон маршрута), например
+GET /api/v1/contents_feed, собираются:
+- гистограмма длительности запроса;
+- гистограмма размера ответа;
+- число SQL-запросов и суммарное время в БД на запрос (события движка);
+- время и число вызовов MinIO (через track_minio);
+- счётчик ответов по статусам.
+
+Запись без блокировок: у каждого потока свой шард со счётчиками, в который
+пишет только этот поток. Блокировка берётся один раз при регистрации шарда
+и при чтении списка шардов в /metrics, который сам складывает шарды.
+Метрики у каждого воркера свои, как и кэши.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC_PREFIX = "afisha"
+# Запросы мимо всех маршрутов (404) — одной серией, чтобы случайные пути
+# не раздували число серий
+UNMATCHED_ROUTE = "unmatched"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class RequestMetrics:
+    """Накопитель одного запроса: его пополняют обработчики событий движка"""
+
+    __slots__ = ("statements", "db_time", "minio_calls", "minio_time")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.minio_calls = 0
+        self.minio_time = 0.0
+
+
+_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "request_metrics", default=None
+)
+
+
+class Histogram:
+    """Гистограмма одного потока: счётчики по корзинам, сумма и количество"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # последняя ячейка — значения больше всех корзин (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RouteSeries:
+    """Все метрики одного маршрута в одном потоке"""
+
+    __slots__ = (
+        "duration",
+        "size",
+        "statements",
+        "db_time",
+        "minio_time",
+        "minio_calls",
+        "statuses",
+    )
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_time = Histogram(DURATION_BUCKETS)
+        self.minio_time = 0.0
+        self.minio_calls = 0
+        self.statuses: dict[int, int] = {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "series", None)
+        if shard is None:
+            shard = self._local.series = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        size: int,
+        request: RequestMetrics,
+    ):
+        shard = self._shard()
+        series = shard.get((method, route))
+        if series is None:
+            series = shard[(method, route)] = RouteSeries()
+        series.duration.observe(duration)
+        series.size.observe(size)
+        series.statements.observe(request.statements)
+        series.db_time.observe(request.db_time)
+        series.minio_time += request.minio_time
+        series.minio_calls += request.minio_calls
+        series.statuses[status] = series.statuses.get(status, 0) + 1
+
+    def collect(self) -> dict:
+        """
+        Сумма шардов по маршрутам. Шард может пополняться во время чтения:
+        значение одной серии тогда отстаёт на пару запросов, что для
+        метрик допустимо.
+        """
+        with self._lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            for key, series in list(shard.items()):
+                total = totals.get(key)
+                if total is None:
+                    total = totals[key] = RouteSeries()
+                for name in ("duration", "size", "statements", "db_time"):
+                    _merge(getattr(total, name), getattr(series, name))
+                total.minio_time += series.minio_time
+                total.minio_calls += series.minio_calls
+                for status, count in list(series.statuses.items()):
+                    total.statuses[status] = total.statuses.get(status, 0) + count
+        return totals
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+def _merge(total: Histogram, histogram: Histogram):
+    for i, count in enumerate(list(histogram.counts)):
+        total.counts[i] += count
+    total.sum += histogram.sum
+    total.count += histogram.count
+
+
+metrics_registry = MetricsRegistry()
+
+
+@contextmanager
+def track_minio():
+    """Засекает вызов MinIO и относит его время к текущему запросу"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        request = _request_metrics.get()
+        if request is not None:
+            request.minio_calls += 1
+            request.minio_time += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _request_metrics.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    request = _request_metrics.get()
+    started = getattr(context, "_metrics_started", None)
+    if request is not None and started is not None:
+        request.statements += 1
+        request.db_time += time.perf_counter() - started
+
+
+def attach_sql_metrics():
+    """Подписывает счётчик SQL-запросов на события всех движков"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: заводит накопитель запроса в contextvar (его видят
+    и синхронные эндпоинты в пуле потоков, и run_sync асинхронного движка),
+    считает размер тела ответа и после ответа пишет всё в серию маршрута.
+    Шаблон маршрута берётся из scope["route"], который выставляет роутер.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics_registry):
+        self.app = app
+        self.registry = registry
+        attach_sql_metrics()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics()
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        token = _request_metrics.set(request)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _request_metrics.reset(token)
+            self.registry.observe(
+                scope["method"],
+                route_template(scope),
+                status,
+                time.perf_counter() - started,
+                size,
+                request,
+            )
+
+
+def _labels(**labels) -> str:
+    escaped = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _histogram_lines(name: str, histogram: Histogram, method: str, route: str):
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        labels = _labels(method=method, route=route, le=_format(bound))
+        yield f"{name}_bucket{labels} {cumulative}"
+    labels = _labels(method=method, route=route, le="+Inf")
+    yield f"{name}_bucket{labels} {histogram.count}"
+    labels = _labels(method=method, route=route)
+    yield f"{name}_sum{labels} {_format(histogram.sum)}"
+    yield f"{name}_count{labels} {histogram.count}"
+
+
+def _format(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+HISTOGRAMS = (
+    ("duration", "http_request_duration_seconds", "Длительность запроса"),
+    ("size", "http_response_size_bytes", "Размер тела ответа"),
+    ("statements", "db_statements_per_request", "SQL-запросов на запрос"),
+    ("db_time", "db_time_per_request_seconds", "Время в БД на запрос"),
+)
+
+
+def render_prometheus(registry: MetricsRegistry = metrics_registry) -> str:
+    """Текстовый формат Prometheus 0.0.4"""
+    totals = sorted(registry.collect().items())
+    lines = []
+
+    name = f"{METRIC_PREFIX}_http_requests_total"
+    lines += [f"# HELP {name} Ответы по статусам", f"# TYPE {name} counter"]
+    for (method, route), series in totals:
+        for status, count in sorted(series.statuses.items()):
+            labels = _labels(method=method, route=route, status=status)
+            lines.append(f"{name}{labels} {count}")
+
+    for attribute, metric, help_text in HISTOGRAMS:
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (method, route), series in totals:
+            lines.extend(
+                _histogram_lines(name, getattr(series, attribute), method, route)
+            )
+
+    for attribute, metric, help_text in (
+        ("minio_time", "minio_seconds_total", "Время вызовов MinIO"),
+        ("minio_calls", "minio_calls_total", "Вызовы MinIO"),
+    ):
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (method, route), series in totals:
+            value = getattr(series, attribute)
+            lines.append(
+                f"{name}{_labels(method=method, route=route)} {_format(value)}"
+            )
+
+    return "\n".join(lines) + "\n"
+
+
+def render_cache_metrics(caches: dict[str, dict]) -> str:
+    """Попадания, промахи и доля попаданий кэшей процесса (stats() кэшей)"""
+    lines = []
+    for metric, help_text, kind, value in (
+        ("cache_hits_total", "Попадания в кэш", "counter", lambda s: s["hits"]),
+        ("cache_misses_total", "Промахи кэша", "counter", lambda s: s["misses"]),
+        (
+            "cache_hit_ratio",
+            "Доля попаданий с запуска процесса",
+            "gauge",
+            lambda s: s["hits"] / (s["hits"] + s["misses"])
+            if s["hits"] + s["misses"]
+            else 0.0,
+        ),
+    ):
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for cache, stats in sorted(caches.items()):
+            lines.append(f"{name}{_labels(cache=cache)} {_format(value(stats))}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, NamedTuple, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, false, or_
+
+# Заголовок, в котором отдаётся курсор следующей страницы для list-эндпоинтов
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(payload: dict) -> str:
+    """
+    Упаковывает состояние пагинации в непрозрачную строку для клиента
+    """
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Распаковывает курсор, полученный от клиента.
+    Некорректный курсор — ошибка клиента (400).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+
+class SortKey(NamedTuple):
+    """Колонка (или выражение) сортировки для keyset-пагинации"""
+
+    column: Any
+    descending: bool = False
+    nulls_last: bool = False
+
+    def order_by(self):
+        clause = self.column.desc() if self.descending else self.column.asc()
+        return clause.nullslast() if self.nulls_last else clause
+
+
+def keyset_order(keys: list[SortKey]) -> list:
+    return [key.order_by() for key in keys]
+
+
+def keyset_filter(keys: list[SortKey], values: list):
+    """
+    Условие «строка идёт после строки со значениями values» для порядка keys:
+    (a > va) OR (a = va AND ((b > vb) OR (b = vb AND ...))).
+    NULL при nulls_last считается больше любого значения.
+    """
+    condition = None
+    for key, value in reversed(list(zip(keys, values))):
+        if value is None:
+            after = false()
+            equal = key.column.is_(None)
+        else:
+            after = key.column < value if key.descending else key.column > value
+            if key.nulls_last:
+                after = or_(after, key.column.is_(None))
+            equal = key.column == value
+        condition = after if condition is None else or_(after, and_(equal, condition))
+    return condition
+
+
+def encode_keyset_cursor(values: list) -> str:
+    return encode_cursor({"after": values})
+
+
+def decode_keyset_cursor(cursor: str, keys: list[SortKey]) -> list:
+    """
+    Значения ключа сортировки из курсора, приведённые к типам колонок
+    """
+    values = decode_cursor(cursor).get("after")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        return [_parse_key_value(key, value) for key, value in zip(keys, values)]
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_key_value(key: SortKey, value):
+    if value is None:
+        return None
+    python_type = key.column.type.python_type
+    if python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def paginate_keyset(
+    query,
+    keys: list[SortKey],
+    limit: int,
+    cursor: Optional[str],
+    key_values: Callable[[Any], list],
+    skip: int = 0,
+):
+    """
+    Одна страница запроса, отсортированного по keys.
+
+    С курсором страница начинается сразу после его ключа (skip
+    не применяется), без курсора — со skip-й строки. Выбирается limit + 1
+    строка: лишняя только подсказывает, что следующая страница есть.
+    Возвращает строки и курсор следующей страницы (или None).
+    """
+    if cursor:
+        query = query.filter(keyset_filter(keys, decode_keyset_cursor(cursor, keys)))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.order_by(*keyset_order(keys)).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_keyset_cursor(key_values(rows[-1]))
@@ -0,0 +1,268 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import case, func
+
+from models import Content, Like, Rating
+from settings import settings
+
+# Нейтральные значения признаков для контента без дат, лайков и оценок
+UNDATED_RECENCY = 0.5
+NEUTRAL_SCORE = 0.5
+
+
+@dataclass(frozen=True)
+class RankingWeights:
+    tag_match: float = 1.0
+    recency: float = 0.6
+    like_ratio: float = 0.8
+    rating: float = 0.5
+    # Штраф за каждый следующий контент той же макрокатегории
+    diversity_penalty: float = 0.15
+    # Через сколько дней до начала вклад свежести падает вдвое
+    recency_half_life_days: float = 14.0
+    # Сглаживание: столько «виртуальных» нейтральных голосов у каждого контента
+    prior_votes: float = 2.0
+
+
+DEFAULT_WEIGHTS = RankingWeights()
+
+
+class CandidateArrays:
+    """
+    Кандидаты ленты в виде массивов NumPy. Строится один раз на запись
+    кэша кандидатов и дальше переиспользуется всеми запросами.
+    """
+
+    __slots__ = ("ids", "start_days", "end_days", "macro_codes", "tag_ids", "tag_owner")
+
+    def __init__(self, candidates):
+        n = len(candidates)
+        self.ids = np.fromiter((c.id for c in candidates), dtype=np.int64, count=n)
+        self.start_days = np.fromiter(
+            (c.date_start.toordinal() if c.date_start else np.nan for c in candidates),
+            dtype=np.float64,
+            count=n,
+        )
+        self.end_days = np.fromiter(
+            (c.date_end.toordinal() if c.date_end else np.nan for c in candidates),
+            dtype=np.float64,
+            count=n,
+        )
+        macro_names = {}
+        self.macro_codes = np.fromiter(
+            (
+                macro_names.setdefault(c.macro_category, len(macro_names))
+                for c in candidates
+            ),
+            dtype=np.int32,
+            count=n,
+        )
+        # Теги в CSR-подобном виде: плоский список и номер кандидата-владельца
+        self.tag_ids = np.fromiter(
+            (tag_id for c in candidates for tag_id in c.tag_ids), dtype=np.int64
+        )
+        self.tag_owner = np.repeat(
+            np.arange(n, dtype=np.int64),
+            np.fromiter((len(c.tag_ids) for c in candidates), dtype=np.int64, count=n),
+        )
+
+
+def candidate_arrays(entry) -> CandidateArrays:
+    """
+    Массивы для записи кэша кандидатов (строятся при первом обращении)
+    """
+    arrays = entry.derived.get("ranking")
+    if arrays is None:
+        arrays = entry.derived.setdefault("ranking", CandidateArrays(entry.candidates))
+    return arrays
+
+
+class ContentStats:
+    """
+    Лайки/дизлайки и сумма/число оценок контента города,
+    отсортированные по ID для выравнивания через searchsorted
+    """
+
+    __slots__ = ("ids", "likes", "votes", "rating_sum", "rating_count", "loaded_at")
+
+    def __init__(self, likes_rows, rating_rows):
+        stats = {}
+        for content_id, likes, votes in likes_rows:
+            stats[content_id] = [likes or 0, votes or 0, 0, 0]
+        for content_id, rating_sum, rating_count in rating_rows:
+            stats.setdefault(content_id, [0, 0, 0, 0])[2:] = [
+                rating_sum or 0,
+                rating_count or 0,
+            ]
+
+        ids = sorted(stats)
+        values = np.array([stats[i] for i in ids], dtype=np.float64).reshape(-1, 4)
+        self.ids = np.array(ids, dtype=np.int64)
+        self.likes, self.votes, self.rating_sum, self.rating_count = values.T
+        self.loaded_at = time.monotonic()
+
+    def align(self, ids: np.ndarray):
+        """
+        Статистика в порядке переданных ID (нули для контента без голосов)
+        """
+        n = len(ids)
+        if not len(self.ids):
+            zeros = np.zeros(n)
+            return zeros, zeros, zeros, zeros
+        pos = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        found = self.ids[pos] == ids
+        return tuple(
+            np.where(found, column[pos], 0.0)
+            for column in (self.likes, self.votes, self.rating_sum, self.rating_count)
+        )
+
+
+class ContentStatsCache:
+    """
+    Популярность контента по городам с TTL: агрегаты по лайкам и оценкам
+    дорогие, а для ранжирования достаточно слегка устаревших значений
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, db, city: Optional[str]) -> ContentStats:
+        with self._lock:
+            stats = self._entries.get(city)
+        if stats is not None and time.monotonic() - stats.loaded_at < self.ttl:
+            return stats
+
+        likes_query = (
+            db.query(
+                Like.content_id,
+                func.sum(case((Like.value.is_(True), 1), else_=0)),
+                func.count(Like.id),
+            )
+            .join(Content, Content.id == Like.content_id)
+            .group_by(Like.content_id)
+        )
+        ratings_query = (
+            db.query(Rating.content_id, func.sum(Rating.rating), func.count(Rating.id))
+            .join(Content, Content.id == Rating.content_id)
+            .group_by(Rating.content_id)
+        )
+        if city:
+            likes_query = likes_query.filter(Content.city == city)
+            ratings_query = ratings_query.filter(Content.city == city)
+
+        stats = ContentStats(likes_query.all(), ratings_query.all())
+        with self._lock:
+            self._entries[city] = stats
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def score_candidates(
+    arrays: CandidateArrays,
+    stats: ContentStats,
+    preferred_tag_ids,
+    excluded_ids=None,
+    today: Optional[date] = None,
+    weights: RankingWeights = DEFAULT_WEIGHTS,
+) -> np.ndarray:
+    """
+    Итоговый скор каждого кандидата за один векторный проход.
+    Исключённый контент получает -inf.
+    """
+    n = len(arrays.ids)
+    today_day = (today or date.today()).toordinal()
+
+    # Совпадение с предпочтениями: доля тегов кандидата из предпочтений
+    tag_match = np.zeros(n)
+    if len(preferred_tag_ids) and len(arrays.tag_ids):
+        matched = np.isin(arrays.tag_ids, np.asarray(preferred_tag_ids, dtype=np.int64))
+        matches = np.bincount(arrays.tag_owner[matched], minlength=n)
+        totals = np.bincount(arrays.tag_owner, minlength=n)
+        tag_match = matches / np.maximum(totals, 1)
+
+    # Свежесть: идущие сейчас события — максимум, будущие затухают
+    # по дням до начала, прошедшие — минимум. Последний день события —
+    # date_end, а без неё — день начала
+    last_day = np.where(np.isnan(arrays.end_days), arrays.start_days, arrays.end_days)
+    ended = last_day < today_day
+    ongoing = ~(arrays.start_days > today_day) & (last_day >= today_day)
+    days_left = arrays.start_days - today_day
+    recency = np.exp2(-np.clip(days_left, 0, None) / weights.recency_half_life_days)
+    recency = np.where(np.isnan(recency), UNDATED_RECENCY, recency)
+    recency = np.where(ongoing, 1.0, recency)
+    recency = np.where(ended, 0.0, recency)
+
+    likes, votes, rating_sum, rating_count = stats.align(arrays.ids)
+    prior = weights.prior_votes
+    like_ratio = (likes + prior * NEUTRAL_SCORE) / (votes + prior)
+    rating = (rating_sum / 5 + prior * NEUTRAL_SCORE) / (rating_count + prior)
+
+    score = (
+        weights.tag_match * tag_match
+        + weights.recency * recency
+        + weights.like_ratio * like_ratio
+        + weights.rating * rating
+    )
+
+    # Исключённый контент — до штрафа за разнообразие, чтобы он не занимал
+    # места в своей макрокатегории: -inf сортируется в конец группы
+    if excluded_ids is not None and len(excluded_ids):
+        excluded = np.isin(arrays.ids, np.asarray(excluded_ids, dtype=np.int64))
+        score[excluded] = -np.inf
+
+    # Разнообразие: n-й по скору контент макрокатегории теряет n * штраф
+    order = np.lexsort((-score, arrays.macro_codes))
+    sorted_codes = arrays.macro_codes[order]
+    group_start = np.zeros(n, dtype=np.int64)
+    if n:
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        group_start[boundaries] = boundaries
+        group_start = np.maximum.accumulate(group_start)
+    rank_in_group = np.empty(n, dtype=np.float64)
+    rank_in_group[order] = np.arange(n) - group_start
+    return score - weights.diversity_penalty * rank_in_group
+
+
+def rank_candidates(
+    entry,
+    stats: ContentStats,
+    preferred_tag_ids,
+    excluded_ids,
+    limit: Optional[int],
+) -> list[int]:
+    """
+    ID лучших limit кандидатов записи кэша кандидатов. Без обращений
+    к базе: на асинхронном движке выполняется вне цикла событий (off_loop)
+    """
+    arrays = candidate_arrays(entry)
+    scores = score_candidates(arrays, stats, preferred_tag_ids, excluded_ids)
+    return top_k(arrays.ids, scores, limit)
+
+
+def top_k(ids: np.ndarray, scores: np.ndarray, k: Optional[int]) -> list[int]:
+    """
+    ID лучших k кандидатов по убыванию скора, без исключённых
+    """
+    available = int(np.count_nonzero(np.isfinite(scores)))
+    k = available if k is None else min(k, available)
+    if k <= 0:
+        return []
+    if k < len(scores):
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return ids[best].tolist()
+
+
+content_stats_cache = ContentStatsCache(settings.RANKING_STATS_TTL_SECONDS)
@@ -0,0 +1,72 @@
+import itertools
+import threading
+import time
+
+from settings import settings
+
+
+class ReadYourWrites:
+    """
+    Пользователи, которые недавно что-то записали. Пока не прошло
+    REPLICA_STICKY_SECONDS, их чтения идут в primary: реплика могла ещё
+    не получить только что поставленный лайк, оценку или контент.
+    Отметки живут в памяти процесса.
+    """
+
+    def __init__(self, window: float, max_users: int = 100_000):
+        self.window = window
+        self.max_users = max_users
+        self._until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, username: str):
+        """Вызывается после коммита записи пользователя"""
+        if not self.window or not username:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._until[username] = now + self.window
+            if len(self._until) > self.max_users:
+                self._until = {
+                    name: until for name, until in self._until.items() if until > now
+                }
+
+    def is_sticky(self, username: str) -> bool:
+        with self._lock:
+            until = self._until.get(username)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._until[username]
+                return False
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._until.clear()
+
+
+read_your_writes = ReadYourWrites(settings.REPLICA_STICKY_SECONDS)
+
+
+class ReadRouter:
+    """
+    Выбирает фабрику сессий для читающего запроса: реплики по кругу,
+    primary — если реплик нет или пользователь из username (в пути или
+    в параметрах запроса) недавно писал
+    """
+
+    def __init__(self, primary, replicas=()):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self._next = itertools.count()
+
+    def sessionmaker_for(self, request):
+        if not self.replicas:
+            return self.primary
+        username = request.path_params.get("username") or request.query_params.get(
+            "username"
+        )
+        if username and read_your_writes.is_sticky(username):
+            return self.primary
+        return self.replicas[next(self._next) % len(self.replicas)]
@@ -0,0 +1,121 @@
+"""
+Кэш страниц /search внутри процесса.
+
+Ключ — нормализованный запрос (слова в нижнем регистре, по алфавиту:
+порядок слов не меняет ни фильтр, ни релевантность) и фильтры, skip,
+limit и способ подсчёта total_count. Значение — ID контента страницы,
+total_count и курсор следующей страницы; строки контента каждый раз
+читаются по ID, так что ответ не старее самого контента.
+
+Запись живёт SEARCH_CACHE_TTL_SECONDS и устаревает раньше, если версия
+контента её города изменилась (запись контента в этом или другом
+процессе); создание и удаление контента в этом процессе сбрасывает
+записи города сразу. Страницы по курсору не кэшируются. Записи разных
+баз (primary и реплик) хранятся отдельно: страница, найденная на
+отстающей реплике, не попадает к пользователю, читающему с primary.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from settings import settings
+from utils.cache_versions import content_scope, version_watcher
+
+
+class SearchPage(NamedTuple):
+    content_ids: list[int]
+    total_count: Optional[int]
+    has_more: bool
+    next_cursor: Optional[str]
+
+
+def search_cache_key(
+    q, city, event_type, date_from, date_to, tags, skip, limit, count
+) -> tuple:
+    words = tuple(sorted(word.lower() for word in (q or "").split()))
+    return (
+        words,
+        city,
+        event_type.value if event_type else None,
+        date_from,
+        date_to,
+        tuple(sorted(set(tags))) if tags else None,
+        skip,
+        limit,
+        count.value,
+    )
+
+
+class SearchResultCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _bound_key(db, key: tuple) -> tuple:
+        return (*key, str(db.get_bind().url))
+
+    def lookup(self, db, key: tuple, city: Optional[str]):
+        """
+        (страница или None, версия контента города). Версию нужно
+        передать в store: она прочитана до выполнения поиска, и страница,
+        найденная во время чужой записи, не переживёт эту запись.
+        """
+        version = version_watcher.get(db, content_scope(city))
+        key = self._bound_key(db, key)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if (
+                cached is not None
+                and cached[1] == version
+                and now - cached[2] < self.ttl
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[0], version
+            self.misses += 1
+        return None, version
+
+    def store(self, db, key: tuple, version: int, page: SearchPage):
+        key = self._bound_key(db, key)
+        with self._lock:
+            self._entries[key] = (page, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_city(self, city: Optional[str]):
+        """
+        Сбрасывает записи города и записи без фильтра по городу
+        (город — второй элемент ключа)
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if city is None or key[1] in (city, None):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+search_result_cache = SearchResultCache(
+    settings.SEARCH_CACHE_MAX_ENTRIES, settings.SEARCH_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,326 @@
+"""
+Поиск контента в памяти процесса (SEARCH_INDEX_ENABLED).
+
+Обратный индекс нормализованных токенов названия, места и описания:
+для каждого поля токен → отсортированный массив номеров документов
+(array('i'), 4 байта на вхождение). Слово запроса совпадает с токенами,
+которые с него начинаются (как поиск по префиксу в полнотекстовом
+поиске), словарь токенов отсортирован для поиска диапазона префикса.
+
+Фильтры (город, тип, даты, теги) — булевы маски numpy по колонкам
+документов, пересечение масок даёт кандидатов. Очки — те же, что у LIKE:
+10 за слово в названии, 5 в месте, 3 в описании. Порядок совпадает
+с /search в базе: очки, дата начала (пустые в конце), id.
+
+Индекс строится при старте в фоновом потоке потоковым запросом
+(yield_per) и обновляется по месту при создании и удалении контента
+в этом процессе; изменения других процессов — перестройкой по версии
+контента (utils.memory_index), до её конца /search идёт в базу.
+"""
+
+import re
+from array import array
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from models import Content, ContentTags
+from settings import settings
+from utils.memory_index import VersionedIndex
+
+FIELDS = ("name", "location", "description")
+FIELD_WEIGHTS = {"name": 10, "location": 5, "description": 3}
+
+_TOKEN_RE = re.compile(r"\w+")
+# Ключ сортировки упакован в int64: очки (16 бит), дата (20 бит), id (27 бит)
+MAX_SCORE = (1 << 16) - 1
+NO_DATE = (1 << 20) - 1
+INITIAL_CAPACITY = 1024
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower().replace("ё", "е"))
+
+
+def sort_keys(scores, date_starts, content_ids):
+    date_keys = np.where(date_starts == 0, NO_DATE, date_starts).astype(np.int64)
+    return (
+        ((MAX_SCORE - np.minimum(scores, MAX_SCORE)).astype(np.int64) << 47)
+        | (date_keys << 27)
+        | content_ids.astype(np.int64)
+    )
+
+
+class SearchIndex(VersionedIndex):
+    name = "Search index"
+
+    def _reset(self):
+        self._size = 0
+        self._ids = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._cities = np.zeros(INITIAL_CAPACITY, dtype=np.int16)
+        self._event_types = np.zeros(INITIAL_CAPACITY, dtype=np.int8)
+        # Даты — порядковые номера дней, 0 — даты нет
+        self._date_starts = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._date_ends = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._alive = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._slots: dict[int, int] = {}
+        self._city_codes: dict[Optional[str], int] = {}
+        self._event_type_codes: dict[Optional[str], int] = {}
+        self._postings = {field: {} for field in FIELDS}
+        self._vocabulary: list[str] = []
+        self._tag_postings: dict[int, array] = {}
+
+    def __len__(self):
+        return len(self._slots)
+
+    # --- построение и обновление ---
+
+    def _code(self, codes: dict, value) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes) + 1
+        return code
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+        for name in (
+            "_ids",
+            "_cities",
+            "_event_types",
+            "_date_starts",
+            "_date_ends",
+            "_alive",
+        ):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            # поиск, уже взявший старые колонки, дочитает их без помех
+            setattr(self, name, new)
+
+    def _add(self, row, tag_ids):
+        if row.id in self._slots:
+            return
+        if self._size == len(self._ids):
+            self._grow()
+        slot = self._size
+        self._ids[slot] = row.id
+        self._cities[slot] = self._code(self._city_codes, row.city)
+        self._event_types[slot] = self._code(self._event_type_codes, row.event_type)
+        self._date_starts[slot] = row.date_start.toordinal() if row.date_start else 0
+        self._date_ends[slot] = row.date_end.toordinal() if row.date_end else 0
+        self._alive[slot] = True
+        for field in FIELDS:
+            postings = self._postings[field]
+            for token in dict.fromkeys(tokenize(getattr(row, field))):
+                posting = postings.get(token)
+                if posting is None:
+                    posting = postings[token] = array("i")
+                    index = bisect_left(self._vocabulary, token)
+                    if (
+                        index == len(self._vocabulary)
+                        or self._vocabulary[index] != token
+                    ):
+                        insort(self._vocabulary, token)
+                posting.append(slot)
+        for tag_id in tag_ids:
+            self._tag_postings.setdefault(tag_id, array("i")).append(slot)
+        self._slots[row.id] = slot
+        # номер слота публикуется последним: поиск не видит недостроенный документ
+        self._size = slot + 1
+
+    def _load(self, db):
+        """Потоковые запросы контента и его тегов"""
+        tags_by_content: dict[int, list[int]] = {}
+        for content_id, tag_id in (
+            db.query(ContentTags.content_id, ContentTags.tags_id)
+            .order_by(ContentTags.content_id)
+            .yield_per(settings.SEARCH_INDEX_BUILD_BATCH)
+        ):
+            tags_by_content.setdefault(content_id, []).append(tag_id)
+
+        rows = (
+            db.query(
+                Content.id,
+                Content.name,
+                Content.location,
+                Content.description,
+                Content.city,
+                Content.event_type,
+                Content.date_start,
+                Content.date_end,
+            )
+            .order_by(Content.id)
+            .yield_per(settings.SEARCH_INDEX_BUILD_BATCH)
+        )
+        for row in rows:
+            self._add(row, tags_by_content.get(row.id, ()))
+
+    def add_content(self, content, tag_ids):
+        """Контент создан в этом процессе (после коммита bump_content_version)"""
+        with self._lock:
+            if not self.ready:
+                return
+            self._add(content, tag_ids)
+            self._note_write(content.city)
+
+    def remove_content(self, content_id: int, city):
+        """Контент удалён в этом процессе (после коммита bump_content_version)"""
+        with self._lock:
+            if not self.ready:
+                return
+            slot = self._slots.pop(content_id, None)
+            if slot is not None:
+                self._alive[slot] = False
+            self._note_write(city)
+
+    # --- поиск ---
+
+    def _snapshot(self, words: list[str], tags):
+        """
+        Под блокировкой: размер, колонки и копии нужных постингов.
+        Дальше поиск идёт без блокировки.
+        """
+        with self._lock:
+            size = self._size
+            columns = (
+                self._ids[:size],
+                self._cities[:size],
+                self._event_types[:size],
+                self._date_starts[:size],
+                self._date_ends[:size],
+                self._alive[:size],
+            )
+            word_postings = []
+            for word in words:
+                start = bisect_left(self._vocabulary, word)
+                end = start
+                while end < len(self._vocabulary) and self._vocabulary[end].startswith(
+                    word
+                ):
+                    end += 1
+                tokens = self._vocabulary[start:end]
+                word_postings.append(
+                    {
+                        field: [
+                            np.array(self._postings[field][token], dtype=np.int32)
+                            for token in tokens
+                            if token in self._postings[field]
+                        ]
+                        for field in FIELDS
+                    }
+                )
+            tag_postings = [
+                np.array(self._tag_postings[tag_id], dtype=np.int32)
+                for tag_id in (tags or ())
+                if tag_id in self._tag_postings
+            ]
+            city_codes = dict(self._city_codes)
+            event_type_codes = dict(self._event_type_codes)
+        return size, columns, word_postings, tag_postings, city_codes, event_type_codes
+
+    def search(
+        self,
+        q: Optional[str],
+        city: Optional[str] = None,
+        event_type: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        tags: Optional[list[int]] = None,
+        skip: int = 0,
+        limit: int = 20,
+        after: Optional[list] = None,
+    ):
+        """
+        Страница результатов: (строки [(id, очки, date_start)], total, есть ли ещё).
+        after — значения ключа сортировки из курсора ([очки?, дата, id]).
+        """
+        words = tokenize(q)
+        (
+            size,
+            (ids, cities, event_types, date_starts, date_ends, alive),
+            word_postings,
+            tag_postings,
+            city_codes,
+            event_type_codes,
+        ) = self._snapshot(words, tags)
+
+        mask = alive.copy()
+        if city:
+            mask &= cities == city_codes.get(city, -1)
+        if event_type:
+            mask &= event_types == event_type_codes.get(event_type, -1)
+        if date_from:
+            day = date_from.toordinal()
+            mask &= (date_starts >= day) | ((date_starts == 0) & (date_ends >= day))
+        if date_to:
+            day = date_to.toordinal()
+            mask &= (
+                ((date_starts != 0) & (date_starts <= day))
+                | ((date_ends != 0) & (date_ends <= day))
+                | ((date_starts == 0) & (date_ends == 0))
+            )
+        if tags:
+            tagged = np.zeros(size, dtype=bool)
+            for posting in tag_postings:
+                tagged[posting] = True
+            mask &= tagged
+
+        scores = np.zeros(size, dtype=np.int32)
+        for postings in word_postings:
+            found = np.zeros(size, dtype=bool)
+            for field, arrays in postings.items():
+                if not arrays:
+                    continue
+                in_field = np.zeros(size, dtype=bool)
+                in_field[np.concatenate(arrays)] = True
+                scores += in_field * FIELD_WEIGHTS[field]
+                found |= in_field
+            mask &= found
+
+        matched = np.flatnonzero(mask)
+        keys = sort_keys(scores[matched], date_starts[matched], ids[matched])
+        total = len(matched)
+        if after is not None:
+            keep = keys > self._cursor_key(words, after)
+            matched, keys = matched[keep], keys[keep]
+            skip = 0
+
+        wanted = skip + limit + 1
+        if len(keys) > wanted:
+            top = np.argpartition(keys, wanted - 1)[:wanted]
+            matched, keys = matched[top], keys[top]
+        order = np.argsort(keys, kind="stable")[skip:wanted]
+        page = matched[order]
+        has_more = len(page) > limit
+        page = page[:limit]
+        rows = [
+            (
+                int(ids[slot]),
+                int(scores[slot]),
+                date.fromordinal(int(date_starts[slot])) if date_starts[slot] else None,
+            )
+            for slot in page
+        ]
+        return rows, total, has_more
+
+    @staticmethod
+    def _cursor_key(words, after: list) -> int:
+        if words:
+            score, date_start, content_id = after
+        else:
+            score = 0
+            date_start, content_id = after
+        return int(
+            sort_keys(
+                np.array([score or 0]),
+                np.array([date_start.toordinal() if date_start else 0]),
+                np.array([content_id]),
+            )[0]
+        )
+
+
+search_index = SearchIndex()
@@ -0,0 +1,136 @@
+"""
+Запись медленных SQL-запросов.
+
+Каждое выражение дольше SLOW_QUERY_THRESHOLD_MS пишется в лог (WARNING)
+с параметрами и маршрутом запроса, который его выполнил, и попадает
+в кольцевой буфер на SLOW_QUERY_BUFFER_SIZE записей. На Postgres фоновый
+поток получает для него план через EXPLAIN (ANALYZE off) на отдельном
+соединении: транзакция запроса не затрагивается и ответ не ждёт плана.
+Буфер смотрят через GET /api/v1/admin/slow-queries.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from settings import settings
+from utils.logs import current_request_log, logger
+
+# Параметры в записи обрезаются: в IN-списках бывают тысячи ID
+MAX_PARAMETERS_LENGTH = 2000
+
+
+class SlowQueryRecorder:
+    def __init__(self, size: int):
+        self._entries: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._explain_queue: Optional[queue.SimpleQueue] = None
+        self._explain_engine = None
+
+    def record(
+        self, statement: str, parameters, duration_ms: float, dialect: str
+    ) -> dict:
+        context = current_request_log()
+        entry = {
+            "id": next(self._ids),
+            "time": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "statement": statement,
+            "parameters": repr(parameters)[:MAX_PARAMETERS_LENGTH],
+            "route": context.route if context else None,
+            "request_id": context.request_id if context else None,
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(
+            "Slow query {:.1f} ms on {}: {}; params={}",
+            duration_ms,
+            entry["route"],
+            statement,
+            entry["parameters"],
+        )
+        if (
+            dialect == "postgresql"
+            and settings.SLOW_QUERY_EXPLAIN
+            and self._explain_engine is not None
+        ):
+            self._explain_queue.put((entry, statement, parameters))
+        return entry
+
+    def entries(self) -> list[dict]:
+        """Записи буфера, новые первыми"""
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._entries)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def start_explaining(self, engine):
+        """
+        Запускает поток EXPLAIN. engine — синхронный движок той же базы:
+        асинхронный движок нельзя использовать из обычного потока.
+        """
+        if self._explain_queue is not None:
+            return
+        self._explain_engine = engine
+        self._explain_queue = queue.SimpleQueue()
+        threading.Thread(
+            target=self._explain_loop, name="slow-query-explain", daemon=True
+        ).start()
+
+    def _explain_loop(self):
+        while True:
+            entry, statement, parameters = self._explain_queue.get()
+            try:
+                with self._explain_engine.connect() as conn:
+                    rows = conn.exec_driver_sql(
+                        "EXPLAIN (ANALYZE off) " + statement, parameters
+                    )
+                    plan = "\n".join(row[0] for row in rows)
+            except Exception as e:  # план — подсказка, запрос уже выполнен
+                plan = f"EXPLAIN failed: {e}"
+            with self._lock:
+                entry["plan"] = plan
+
+
+slow_query_recorder = SlowQueryRecorder(settings.SLOW_QUERY_BUFFER_SIZE)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+    # сами EXPLAIN и пакетные executemany не разбираются
+    if executemany or statement.lstrip().upper().startswith("EXPLAIN"):
+        return
+    slow_query_recorder.record(statement, parameters, duration_ms, conn.dialect.name)
+
+
+def attach_slow_query_recorder(explain_engine=None):
+    """
+    Подписывает запись медленных запросов на события всех движков.
+    explain_engine — синхронный движок для EXPLAIN (только Postgres).
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    if explain_engine is not None and explain_engine.dialect.name == "postgresql":
+        slow_query_recorder.start_explaining(explain_engine)
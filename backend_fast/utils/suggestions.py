@@ -0,0 +1,252 @@
+"""
+Автодополнение поиска из памяти процесса (SUGGESTIONS_INDEX_ENABLED).
+
+Подсказки — названия контента, места, названия тегов и организаций.
+Для каждого города (и для всех городов вместе, ключ None) хранится
+отсортированный словарь токенов и для каждого токена — его фразы
+по убыванию популярности. Подсказки для префикса — слияние списков
+токенов из диапазона bisect, то есть фразы, в которых какое-то слово
+начинается с префикса.
+
+Популярность фразы — сумма очков контента, в котором она встречается:
+1 + число лайков + UPCOMING_BONUS, если мероприятие ещё не прошло.
+Для коротких префиксов (до SHORT_PREFIX символов) диапазон длинный,
+поэтому лучшие фразы запоминаются до следующего изменения города.
+
+Создание и удаление контента обновляют индекс по месту; лайки и «ещё
+не прошло» пересчитываются полной перестройкой раз в
+SUGGESTIONS_REFRESH_SECONDS (utils.memory_index).
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func
+
+from models import Content, ContentTags, Like, Organisation, PublisherType, Tags
+from settings import settings
+from utils.memory_index import VersionedIndex
+from utils.search_index import tokenize
+
+UPCOMING_BONUS = 5
+SHORT_PREFIX = 3
+# Сколько лучших фраз запоминается для короткого префикса (limit ≤ 20)
+CACHED_SUGGESTIONS = 20
+
+
+def normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+class CityPhrases:
+    """
+    Фразы одного города: ключ → [текст, очки, число документов],
+    словарь токенов и для каждого токена фразы по убыванию очков
+    """
+
+    def __init__(self):
+        self.phrases: dict[str, list] = {}
+        self.vocabulary: list[str] = []
+        self.postings: dict[str, list[tuple[int, str]]] = {}
+        self.top: dict[str, list[str]] = {}
+
+    def add(self, key: str, text: str, score: int, deferred: bool = False):
+        """deferred — при полном построении: токены раскладываются в finish()"""
+        phrase = self.phrases.get(key)
+        if phrase is None:
+            phrase = self.phrases[key] = [text, 0, 0]
+        elif not deferred:
+            self._unlink(key, phrase[1])
+        phrase[1] += score
+        phrase[2] += 1
+        if not deferred:
+            self._link(key, phrase[1])
+
+    def remove(self, key: str, score: int):
+        phrase = self.phrases.get(key)
+        if phrase is None:
+            return
+        self._unlink(key, phrase[1])
+        phrase[1] -= score
+        phrase[2] -= 1
+        if phrase[2]:
+            self._link(key, phrase[1])
+        else:
+            del self.phrases[key]
+
+    def finish(self):
+        """Раскладывает все фразы по токенам одной сортировкой"""
+        postings: dict[str, list[tuple[int, str]]] = {}
+        for key, (_, score, _) in self.phrases.items():
+            for token in set(key.split()):
+                postings.setdefault(token, []).append((-score, key))
+        for entries in postings.values():
+            entries.sort()
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+        self.top.clear()
+
+    def _link(self, key: str, score: int):
+        for token in set(key.split()):
+            entries = self.postings.get(token)
+            if entries is None:
+                entries = self.postings[token] = []
+                insort(self.vocabulary, token)
+            insort(entries, (-score, key))
+        self.top.clear()
+
+    def _unlink(self, key: str, score: int):
+        for token in set(key.split()):
+            entries = self.postings[token]
+            del entries[bisect_left(entries, (-score, key))]
+            if not entries:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+        self.top.clear()
+
+    def best(self, prefix: str, limit: int) -> list[str]:
+        """
+        Слияние списков токенов с этим префиксом (каждый уже отсортирован
+        по очкам, при равных — по алфавиту) до limit разных фраз
+        """
+        start = index = bisect_left(self.vocabulary, prefix)
+        while index < len(self.vocabulary) and self.vocabulary[index].startswith(
+            prefix
+        ):
+            index += 1
+        merged = heapq.merge(
+            *(self.postings[token] for token in self.vocabulary[start:index])
+        )
+        keys = []
+        for _, key in merged:
+            if key not in keys:
+                keys.append(key)
+                if len(keys) == limit:
+                    break
+        return keys
+
+    def suggest(self, prefix: str, limit: int) -> list[str]:
+        # у коротких префиксов много токенов: лучшие фразы запоминаются
+        if len(prefix) > SHORT_PREFIX or limit > CACHED_SUGGESTIONS:
+            keys = self.best(prefix, limit)
+        else:
+            keys = self.top.get(prefix)
+            if keys is None:
+                keys = self.top[prefix] = self.best(prefix, CACHED_SUGGESTIONS)
+        return [self.phrases[key][0] for key in keys[:limit]]
+
+
+class SuggestionIndex(VersionedIndex):
+    name = "Suggestion index"
+
+    def _reset(self):
+        self._cities: dict[Optional[str], CityPhrases] = {}
+        self._deferred = False
+        # контент → [(город, ключ фразы, очки)], чтобы вычесть при удалении
+        self._contributions: dict[int, list[tuple]] = {}
+
+    def __len__(self):
+        return len(self._contributions)
+
+    def max_age(self) -> Optional[float]:
+        return settings.SUGGESTIONS_REFRESH_SECONDS
+
+    def _add(self, content, tag_names, organisation_name, likes: int, today: date):
+        if content.id in self._contributions:
+            return
+        last_day = content.date_end or content.date_start
+        score = 1 + likes + (UPCOMING_BONUS if last_day and last_day >= today else 0)
+        texts = [content.name, content.location, *tag_names, organisation_name]
+        contributions = []
+        for text in dict.fromkeys(text for text in texts if text):
+            key = normalize(text)
+            if not key:
+                continue
+            for city in dict.fromkeys((content.city, None)):
+                self._cities.setdefault(city, CityPhrases()).add(
+                    key, text, score, deferred=self._deferred
+                )
+                contributions.append((city, key, score))
+        self._contributions[content.id] = contributions
+
+    def _load(self, db):
+        self._deferred = True
+        batch = settings.SEARCH_INDEX_BUILD_BATCH
+        likes = dict(
+            db.query(Like.content_id, func.count(Like.id))
+            .filter(Like.value.is_(True))
+            .group_by(Like.content_id)
+        )
+        tags_by_content: dict[int, list[str]] = {}
+        for content_id, tag_name in (
+            db.query(ContentTags.content_id, Tags.name)
+            .join(Tags, Tags.id == ContentTags.tags_id)
+            .yield_per(batch)
+        ):
+            tags_by_content.setdefault(content_id, []).append(tag_name)
+        organisations = dict(db.query(Organisation.id, Organisation.name))
+
+        today = date.today()
+        rows = (
+            db.query(
+                Content.id,
+                Content.name,
+                Content.location,
+                Content.city,
+                Content.date_start,
+                Content.date_end,
+                Content.publisher_type,
+                Content.publisher_id,
+            )
+            .order_by(Content.id)
+            .yield_per(batch)
+        )
+        for row in rows:
+            organisation_name = (
+                organisations.get(row.publisher_id)
+                if row.publisher_type == PublisherType.ORGANISATION.value
+                else None
+            )
+            self._add(
+                row,
+                tags_by_content.get(row.id, ()),
+                organisation_name,
+                likes.get(row.id, 0),
+                today,
+            )
+        for phrases in self._cities.values():
+            phrases.finish()
+        self._deferred = False
+
+    def add_content(self, content, tag_names, organisation_name=None):
+        """Контент создан в этом процессе (после коммита bump_content_version)"""
+        with self._lock:
+            if not self.ready:
+                return
+            self._add(content, tag_names, organisation_name, 0, date.today())
+            self._note_write(content.city)
+
+    def remove_content(self, content_id: int, city):
+        """Контент удалён в этом процессе (после коммита bump_content_version)"""
+        with self._lock:
+            if not self.ready:
+                return
+            for phrase_city, key, score in self._contributions.pop(content_id, ()):
+                self._cities[phrase_city].remove(key, score)
+            self._note_write(city)
+
+    def suggest(self, q: str, city: Optional[str], limit: int) -> list[str]:
+        """Подсказки для последнего слова запроса, популярные первыми"""
+        words = tokenize(q)
+        if not words:
+            return []
+        with self._lock:
+            phrases = self._cities.get(city or None)
+            if phrases is None:
+                return []
+            return phrases.suggest(words[-1], limit)
+
+
+suggestion_index = SuggestionIndex()
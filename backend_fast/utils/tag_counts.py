@@ -0,0 +1,280 @@
+"""
+Счётчики тегов по городам (event_tagcitycount).
+
+Сколько контента и маршрутов с тегом в каждом городе. /tags и
+/search/popular-tags читают готовые числа вместо COUNT по связям
+контента с тегами. Счётчики правятся в той же транзакции, что и
+запись: создание и удаление контента и маршрутов в API, правки
+в Django-админке — сигналами. Ночная сверка (jobs.reconcile_tag_counts)
+пересчитывает таблицу по связям и исправляет расхождения.
+
+Числа тегов макрокатегории в городе кэшируются в процессе
+(city_tag_count_cache) до изменения версии контента города.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import Content, ContentTags, Route, RouteTags, TagCityCount, Tags
+from settings import settings
+from utils.cache_versions import content_scope, version_watcher
+from utils.logs import logger
+
+CONTENT_COUNT = "content_count"
+ROUTE_COUNT = "route_count"
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class TaggedIn(NamedTuple):
+    """Город объекта и его теги"""
+
+    city: Optional[str]
+    tag_ids: frozenset
+
+
+class TagCount(NamedTuple):
+    id: int
+    name: str
+    description: Optional[str]
+    content_count: int
+
+
+def tagged_in(city, tag_ids: Iterable[int]) -> TaggedIn:
+    return TaggedIn(city, frozenset(tag_ids))
+
+
+def _increment(db, city: str, tag_ids, column: str):
+    """
+    +1 к счётчикам тегов города; строки, которых ещё нет, создаются
+    тем же запросом (INSERT ... ON CONFLICT), без гонки двух вставок
+    """
+    insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    table = TagCityCount.__table__
+    statement = insert(table).values(
+        [{"tag_id": tag_id, "city": city, column: 1} for tag_id in sorted(tag_ids)]
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.tag_id, table.c.city],
+            set_={column: table.c[column] + 1, "updated": func.now()},
+        )
+    )
+
+
+def _decrement(db, city: str, tag_ids, column: str):
+    db.query(TagCityCount).filter(
+        TagCityCount.city == city, TagCityCount.tag_id.in_(tag_ids)
+    ).update(
+        {
+            getattr(TagCityCount, column): getattr(TagCityCount, column) - 1,
+            TagCityCount.updated: func.now(),
+        },
+        synchronize_session=False,
+    )
+
+
+def apply_tag_change(
+    db,
+    before: Optional[TaggedIn],
+    after: Optional[TaggedIn],
+    column: str = CONTENT_COUNT,
+):
+    """
+    Переносит объект в счётчиках: before — город и теги до записи
+    (None при создании), after — после (None при удалении).
+    Коммит остаётся за вызывающим кодом.
+    """
+    removed = defaultdict(set)
+    added = defaultdict(set)
+    if before is not None and before.city:
+        removed[before.city] |= before.tag_ids
+    if after is not None and after.city:
+        added[after.city] |= after.tag_ids
+    for city in set(removed) & set(added):
+        unchanged = removed[city] & added[city]
+        removed[city] -= unchanged
+        added[city] -= unchanged
+
+    for city, tag_ids in removed.items():
+        if tag_ids:
+            _decrement(db, city, tag_ids, column)
+    for city, tag_ids in added.items():
+        if tag_ids:
+            _increment(db, city, tag_ids, column)
+
+
+def city_tag_counts(db, city: str, macro_category_id: int, excluded=None):
+    """
+    Теги макрокатегории, у которых есть контент в городе, с числом контента.
+    excluded — подзапрос (tag_id, count): сколько контента тега вычесть.
+    """
+    content_count = TagCityCount.content_count
+    if excluded is not None:
+        content_count = content_count - func.coalesce(excluded.c.count, 0)
+    query = (
+        db.query(Tags.id, Tags.name, Tags.description, content_count)
+        .join(TagCityCount, TagCityCount.tag_id == Tags.id)
+        .filter(
+            Tags.macro_category_id == macro_category_id,
+            TagCityCount.city == city,
+            TagCityCount.content_count > 0,
+        )
+    )
+    if excluded is not None:
+        query = query.outerjoin(excluded, excluded.c.tag_id == Tags.id)
+    rows = query.all()
+    return [TagCount(*row) for row in rows]
+
+
+class CityTagCountCache:
+    """
+    LRU-кэш city_tag_counts по (город, макрокатегория). Запись живёт
+    TAG_COUNTS_CACHE_TTL_SECONDS и устаревает раньше, если версия контента
+    города изменилась; запись контента в этом процессе сбрасывает город сразу.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db, city: str, macro_category_id: int) -> list[TagCount]:
+        # число, прочитанное с реплики, не подменяет число с primary
+        key = (city, macro_category_id, str(db.get_bind().url))
+        version = version_watcher.get(db, content_scope(city))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if (
+                cached is not None
+                and cached[1] == version
+                and now - cached[2] < self.ttl
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        counts = city_tag_counts(db, city, macro_category_id)
+        with self._lock:
+            self._entries[key] = (counts, version, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return counts
+
+    def invalidate_city(self, city: Optional[str]):
+        with self._lock:
+            for key in list(self._entries):
+                if city is None or key[0] == city:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+city_tag_count_cache = CityTagCountCache(
+    settings.TAG_COUNTS_CACHE_MAX_ENTRIES, settings.TAG_COUNTS_CACHE_TTL_SECONDS
+)
+
+
+def popular_tags(db, limit: int):
+    """Теги с наибольшим числом контента во всех городах"""
+    total = func.sum(TagCityCount.content_count)
+    return (
+        db.query(Tags, total.label("content_count"))
+        .join(TagCityCount, TagCityCount.tag_id == Tags.id)
+        .group_by(Tags.id)
+        .having(total > 0)
+        .order_by(total.desc(), Tags.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def actual_tag_counts(db) -> dict:
+    """(тег, город) → [контент, маршруты], посчитанные по связям"""
+    counts = defaultdict(lambda: [0, 0])
+    content_rows = (
+        db.query(ContentTags.tags_id, Content.city, func.count())
+        .join(Content, Content.id == ContentTags.content_id)
+        .filter(Content.city.isnot(None))
+        .group_by(ContentTags.tags_id, Content.city)
+    )
+    for tag_id, city, count in content_rows:
+        counts[(tag_id, city)][0] = count
+    route_rows = (
+        db.query(RouteTags.tags_id, Route.city, func.count())
+        .join(Route, Route.id == RouteTags.route_id)
+        .filter(Route.city.isnot(None))
+        .group_by(RouteTags.tags_id, Route.city)
+    )
+    for tag_id, city, count in route_rows:
+        counts[(tag_id, city)][1] = count
+    return counts
+
+
+def reconcile_tag_counts(db) -> int:
+    """
+    Сверяет таблицу со связями и исправляет расхождения в одной
+    транзакции. Возвращает число исправленных строк.
+    """
+    actual = actual_tag_counts(db)
+    stored = {(row.tag_id, row.city): row for row in db.query(TagCityCount)}
+
+    corrected = 0
+    for key, (content_count, route_count) in actual.items():
+        row = stored.pop(key, None)
+        if row is None:
+            db.add(
+                TagCityCount(
+                    tag_id=key[0],
+                    city=key[1],
+                    content_count=content_count,
+                    route_count=route_count,
+                )
+            )
+        elif (row.content_count, row.route_count) != (content_count, route_count):
+            logger.warning(
+                "Tag {} in {}: stored counts {}/{}, actual {}/{}",
+                key[0],
+                key[1],
+                row.content_count,
+                row.route_count,
+                content_count,
+                route_count,
+            )
+            row.content_count = content_count
+            row.route_count = route_count
+        else:
+            continue
+        corrected += 1
+
+    # Строк без контента и маршрутов не остаётся; ненулевые из них — расхождение
+    for row in stored.values():
+        if row.content_count or row.route_count:
+            corrected += 1
+        db.delete(row)
+
+    db.commit()
+    return corrected